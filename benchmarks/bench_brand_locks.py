@@ -0,0 +1,86 @@
+"""Show how per-brand lock striping scales spend updates across brands.
+
+Each update holds its brand's lock while waiting on a simulated state
+store round trip (--store-latency), as with a SQLite or Redis backend.
+A single global lock serializes every update; striped locks only
+serialize updates to the same brand.
+
+Usage:
+    python benchmarks/bench_brand_locks.py --threads 1 2 4 8 16 --updates 200
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.brand import Brand
+from src.money import to_micros
+from src.services.budget_service import BudgetService
+from src.services.events import EventBus
+from src.services.locks import LockStripes
+
+
+class SlowStore:
+    """In-memory spend counters with a fixed simulated round-trip latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.spend = {}
+
+    def add_spend(self, name, micros):
+        time.sleep(self.latency)
+        daily, monthly = self.spend.get(name, (0, 0))
+        self.spend[name] = (daily + micros, monthly + micros)
+        return self.spend[name]
+
+
+def run(thread_count, updates, latency, lock_for):
+    store = SlowStore(latency)
+    events = EventBus()
+    brands = [Brand(f"Brand {i}", 10 ** 9, 10 ** 9) for i in range(thread_count)]
+
+    def spend(brand):
+        service = BudgetService(brand, store, events)
+        for _ in range(updates):
+            with lock_for(brand.name):
+                service.update_spend(1)
+
+    threads = [threading.Thread(target=spend, args=(brand,)) for brand in brands]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    expected = to_micros(updates)
+    assert all(store.spend[brand.name] == (expected, expected) for brand in brands), "lost updates"
+    return thread_count * updates / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Brand lock striping benchmark')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help='Thread counts (one brand per thread)')
+    parser.add_argument('--updates', type=int, default=200, help='Updates per thread')
+    parser.add_argument('--store-latency', type=float, default=0.0005, help='Simulated store latency in seconds')
+    parser.add_argument('--stripes', type=int, default=64, help='Number of lock stripes')
+    args = parser.parse_args()
+
+    global_lock = threading.Lock()
+    stripes = LockStripes(args.stripes)
+    baseline = None
+    print(f"{'threads':>7} {'global lock/s':>14} {'striped/s':>12} {'scaling':>8}")
+    for thread_count in args.threads:
+        global_rate = run(thread_count, args.updates, args.store_latency, lambda name: global_lock)
+        striped_rate = run(thread_count, args.updates, args.store_latency, stripes.for_brand)
+        if baseline is None:
+            baseline = striped_rate / thread_count
+        print(f"{thread_count:>7} {global_rate:>14,.0f} {striped_rate:>12,.0f} "
+              f"{striped_rate / (baseline * thread_count):>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare memory used by Brand/Campaign objects and the columnar BrandTable.
+
+Usage:
+    python benchmarks/bench_campaign_memory.py --sizes 10000 100000 1000000 --per-brand 50
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.brand import Brand
+from src.models.campaign import Campaign
+from src.models.tables import BrandTable
+
+
+def build_objects(campaign_count, per_brand):
+    brands = []
+    for i in range(campaign_count):
+        if i % per_brand == 0:
+            brand = Brand(f"Brand {i // per_brand}", 3000, 100)
+            brands.append(brand)
+        brand.add_campaign(Campaign(f"Campaign {i}", (i % 12, 12 + i % 12)))
+    return brands
+
+
+def build_table(campaign_count, per_brand):
+    table = BrandTable()
+    for i in range(campaign_count):
+        if i % per_brand == 0:
+            brand_id = table.add_brand(f"Brand {i // per_brand}", 3000, 100).brand_id
+        table.add_campaign(brand_id, f"Campaign {i}", (i % 12, 12 + i % 12))
+    return table
+
+
+def measure(build, campaign_count, per_brand):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(campaign_count, per_brand)
+    elapsed = time.perf_counter() - start
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Campaign representation memory benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Campaign counts to measure')
+    parser.add_argument('--per-brand', type=int, default=50, help='Campaigns per brand')
+    args = parser.parse_args()
+
+    print(f"{'campaigns':>10} {'objects MB':>11} {'B/campaign':>11} {'table MB':>9} {'B/campaign':>11} {'ratio':>6}")
+    for size in args.sizes:
+        objects_bytes, _ = measure(build_objects, size, args.per_brand)
+        table_bytes, _ = measure(build_table, size, args.per_brand)
+        print(f"{size:>10,} {objects_bytes / 2 ** 20:>11.1f} {objects_bytes / size:>11.0f} "
+              f"{table_bytes / 2 ** 20:>9.1f} {table_bytes / size:>11.0f} {objects_bytes / table_bytes:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
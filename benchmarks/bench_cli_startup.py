@@ -0,0 +1,84 @@
+"""Compare a cold `cli.py` start with a client round trip to the `cli.py serve` daemon.
+
+Runs `python src/cli.py --help` and `python src/cli_client.py ping` as
+fresh processes, plus in-process client round trips, and lists the
+slowest imports of the cold CLI from `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_cli_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def time_process(argv, runs, env=None):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def slowest_imports(argv, count):
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CLI start-up benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Process launches per measurement')
+    parser.add_argument('--top', type=int, default=8, help='Number of slowest imports to list')
+    args = parser.parse_args()
+
+    from src import cli_client
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = os.path.join(tmpdir, 'cli.sock')
+        env = dict(os.environ, BUDGET_CLI_SOCKET=socket_path)
+        daemon = subprocess.Popen([sys.executable, 'src/cli.py', 'serve', '--socket', socket_path], cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.time() + 30
+            while not os.path.exists(socket_path):
+                if time.time() > deadline:
+                    raise RuntimeError('CLI daemon did not start')
+                time.sleep(0.05)
+
+            cold = time_process(['src/cli.py', '--help'], args.runs)
+            client = time_process(['src/cli_client.py', 'ping'], args.runs, env)
+
+            start = time.perf_counter()
+            for _ in range(args.runs * 100):
+                cli_client.send(['ping'], socket_path)
+            in_process = (time.perf_counter() - start) / (args.runs * 100)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"cold cli.py --help:            {cold * 1000:8.1f} ms")
+    print(f"cli_client.py ping (process):  {client * 1000:8.1f} ms  ({cold / client:.1f}x faster)")
+    print(f"client round trip (in-process):{in_process * 1000:8.3f} ms")
+    print("\nslowest imports of cold cli.py --help (cumulative):")
+    for cumulative_us, name in slowest_imports(['src/cli.py', '--help'], args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the vectorized FleetEvaluator with per-brand CampaignService sweeps.
+
+Usage:
+    python benchmarks/bench_fleet_evaluator.py --campaigns 1000000 --per-brand 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.brand import Brand
+from src.models.campaign import Campaign
+from src.models.tables import BrandTable
+from src.money import to_micros
+from src.services.campaign_service import CampaignService
+from src.services.fleet_evaluator import FleetEvaluator
+
+
+def build(campaign_count, per_brand, seed):
+    rng = random.Random(seed)
+    table = BrandTable()
+    brands = []
+    for i in range(campaign_count):
+        if i % per_brand == 0:
+            daily_spend = rng.choice([0, 50, 100])
+            brand = Brand(f"Brand {i // per_brand}", 3000, 100)
+            brand.current_daily_spend = daily_spend
+            brands.append(brand)
+            brand_id = table.add_brand(brand.name, 3000, 100).brand_id
+            table.daily_spend[brand_id] = to_micros(daily_spend)
+        start = rng.randint(0, 23)
+        hours = (start, rng.randint(start + 1, 24))
+        brand.add_campaign(Campaign(f"Campaign {i}", hours))
+        table.add_campaign(brand_id, f"Campaign {i}", hours)
+    return brands, table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet evaluation benchmark')
+    parser.add_argument('--campaigns', type=int, default=1000000, help='Total number of campaigns')
+    parser.add_argument('--per-brand', type=int, default=50, help='Campaigns per brand')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    brands, table = build(args.campaigns, args.per_brand, args.seed)
+    times = [datetime(2023, 1, 1, hour, 0) for hour in (9, 10, 18)]
+
+    start = time.perf_counter()
+    for current_time in times:
+        for brand in brands:
+            CampaignService(brand).activate_campaigns(current_time)
+    loop_elapsed = (time.perf_counter() - start) / len(times)
+
+    evaluator = FleetEvaluator(table)
+    start = time.perf_counter()
+    for current_time in times:
+        changed = evaluator.evaluate(current_time)
+    vector_elapsed = (time.perf_counter() - start) / len(times)
+
+    identical = all(c.is_active == (table.campaigns.is_active[row] == 1)
+                    for row, c in enumerate(c for brand in brands for c in brand.campaigns))
+    print(f"campaigns:            {args.campaigns:,} across {len(brands):,} brands")
+    print(f"per-brand services:   {loop_elapsed * 1000:10.1f} ms per evaluation")
+    print(f"vectorized evaluator: {vector_elapsed * 1000:10.1f} ms per evaluation ({loop_elapsed / vector_elapsed:.0f}x)")
+    print(f"changed on last pass: {len(changed):,}   results identical: {identical}")
+
+
+if __name__ == "__main__":
+    main()
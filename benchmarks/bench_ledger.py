@@ -0,0 +1,61 @@
+"""Measure spend ledger write throughput per group-commit size and recovery time.
+
+Usage:
+    python benchmarks/bench_ledger.py --records 100000 --group-sizes 1 16 256 --brands 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.stores.ledger import SpendLedger, recover
+from src.stores.memory_store import MemoryStore
+
+
+def write(directory, records, group_size, brand_count):
+    ledger = SpendLedger(directory, group_size=group_size, group_interval=0)
+    for i in range(brand_count):
+        ledger.append_brand(f"Brand {i}", 10 ** 9, 10 ** 9, {"Campaign": (0, 24)})
+    start = time.perf_counter()
+    for i in range(records):
+        ledger.append_spend(f"Brand {i % brand_count}", 250000)
+    ledger.close()
+    return records / (time.perf_counter() - start), ledger.syncs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Spend ledger benchmark')
+    parser.add_argument('--records', type=int, default=100000, help='Spend records to write')
+    parser.add_argument('--group-sizes', type=int, nargs='+', default=[1, 16, 256], help='Group commit sizes')
+    parser.add_argument('--brands', type=int, default=1000, help='Number of brands')
+    args = parser.parse_args()
+
+    for group_size in args.group_sizes:
+        # Per-event fsync is slow; keep that run short enough to finish
+        records = min(args.records, 2000) if group_size == 1 else args.records
+        with tempfile.TemporaryDirectory() as directory:
+            records_per_sec, syncs = write(directory, records, group_size, args.brands)
+        print(f"group size {group_size:>5}: {records_per_sec:>12,.0f} records/s ({syncs:,} fsyncs for {records:,} records)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        write(directory, args.records, 256, args.brands)
+        start = time.perf_counter()
+        replayed = recover(directory, MemoryStore())
+        elapsed = time.perf_counter() - start
+        print(f"recovery from ledger tail: {replayed:,} records in {elapsed * 1000:.0f} ms")
+
+        store = MemoryStore()
+        recover(directory, store)
+        ledger = SpendLedger(directory, group_interval=0)
+        ledger.snapshot(store)
+        ledger.close()
+        start = time.perf_counter()
+        recover(directory, MemoryStore())
+        elapsed = time.perf_counter() - start
+        print(f"recovery from snapshot:    {args.brands:,} brands in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
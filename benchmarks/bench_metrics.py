@@ -0,0 +1,73 @@
+"""Measure the per-observation cost of the metrics in src/metrics.py.
+
+Each operation runs in a tight loop and the empty-call overhead is
+subtracted, so the numbers are what instrumentation adds to a task.
+Exits non-zero if any observation costs more than --budget-ns. The
+@timed line is for reference: it also pays for two clock reads.
+
+Usage:
+    python benchmarks/bench_metrics.py --iterations 1000000 --budget-ns 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.metrics import Counter, Gauge, Histogram, Registry, timed
+
+
+def per_call_ns(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Metrics observation overhead')
+    parser.add_argument('--iterations', type=int, default=1000000, help='Observations per operation')
+    parser.add_argument('--budget-ns', type=float, default=1000, help='Maximum cost per observation')
+    args = parser.parse_args()
+
+    registry = Registry()
+    counter = Counter('events_total', 'Events', registry=registry)
+    changes = Counter('changes_total', 'Changes', ['direction'], registry=registry).labels('activated')
+    gauge = Gauge('brands', 'Brands', registry=registry)
+    histogram = Histogram('task_seconds', 'Task latency', ['task'], registry=registry).labels('update_brand_spend')
+
+    def noop():
+        pass
+
+    @timed(histogram)
+    def timed_noop():
+        pass
+
+    operations = [
+        ('Counter.inc()', counter.inc),
+        ('labeled Counter.inc()', changes.inc),
+        ('Gauge.set()', lambda: gauge.set(3)),
+        ('Histogram.observe()', lambda: histogram.observe(0.00042)),
+    ]
+
+    baseline = per_call_ns(noop, args.iterations)
+    print(f"empty call: {baseline:.0f} ns (subtracted below)")
+    over_budget = []
+    for label, func in operations:
+        cost = per_call_ns(func, args.iterations) - baseline
+        print(f"  {label:<24} {cost:7.0f} ns")
+        if cost > args.budget_ns:
+            over_budget.append(label)
+    print(f"  {'@timed call':<24} {per_call_ns(timed_noop, args.iterations) - baseline:7.0f} ns  (not budgeted)")
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"render: {(time.perf_counter() - start) * 1e6:.0f} µs for {len(text)} bytes")
+
+    if over_budget:
+        print(f"over the {args.budget_ns:.0f} ns budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare spend accumulation with float, Decimal and integer micro counters.
+
+Each mode adds the same stream of amounts (with a share in other
+currencies, converted at the day's FX rate) to per-brand daily and monthly
+counters, like BudgetService.update_spend, and reports updates per second
+and how far the float totals drifted from the exact Decimal totals.
+
+Usage:
+    python benchmarks/bench_money.py --updates 1000000 --brands 1000 --foreign 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.money import FxTable, MICROS, to_micros
+
+RATES = {'2024-01-01': {'EUR': '1.0842', 'GBP': '1.2714', 'JPY': '0.006723'}}
+DAY = 19723
+
+
+def make_events(count, brand_count, foreign, seed):
+    rng = random.Random(seed)
+    currencies = list(RATES['2024-01-01'])
+    events = []
+    for _ in range(count):
+        currency = rng.choice(currencies) if rng.random() < foreign else None
+        # Amounts arrive as floats, as parse_event and the CLI produce them
+        events.append((rng.randrange(brand_count), round(rng.uniform(0.01, 5), 4), currency))
+    return events
+
+
+def run_float(events, brand_count):
+    rates = {currency: float(rate) for currency, rate in RATES['2024-01-01'].items()}
+    daily = [0.0] * brand_count
+    monthly = [0.0] * brand_count
+    start = time.perf_counter()
+    for brand, amount, currency in events:
+        if currency is not None:
+            amount *= rates[currency]
+        daily[brand] += amount
+        monthly[brand] += amount
+    return time.perf_counter() - start, monthly
+
+
+def run_decimal(events, brand_count):
+    rates = {currency: Decimal(rate) for currency, rate in RATES['2024-01-01'].items()}
+    micro = Decimal(1) / MICROS
+    daily = [Decimal(0)] * brand_count
+    monthly = [Decimal(0)] * brand_count
+    start = time.perf_counter()
+    for brand, amount, currency in events:
+        amount = Decimal(str(amount))
+        if currency is not None:
+            amount = (amount * rates[currency]).quantize(micro, ROUND_HALF_UP)
+        daily[brand] += amount
+        monthly[brand] += amount
+    return time.perf_counter() - start, monthly
+
+
+def run_micros(events, brand_count):
+    fx = FxTable(RATES)
+    daily = [0] * brand_count
+    monthly = [0] * brand_count
+    start = time.perf_counter()
+    for brand, amount, currency in events:
+        micros = to_micros(amount)
+        if currency is not None:
+            micros = fx.to_base(micros, currency, DAY)
+        daily[brand] += micros
+        monthly[brand] += micros
+    return time.perf_counter() - start, monthly
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Money representation benchmark')
+    parser.add_argument('--updates', type=int, default=1000000, help='Spend events to apply')
+    parser.add_argument('--brands', type=int, default=1000, help='Number of brands')
+    parser.add_argument('--foreign', type=float, default=0.3, help='Share of events in another currency')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    args = parser.parse_args()
+
+    events = make_events(args.updates, args.brands, args.foreign, args.seed)
+    float_seconds, float_totals = run_float(events, args.brands)
+    decimal_seconds, decimal_totals = run_decimal(events, args.brands)
+    micros_seconds, micros_totals = run_micros(events, args.brands)
+
+    print(f"{'mode':<8} {'updates/s':>12} {'vs Decimal':>10}")
+    for mode, seconds in (('float', float_seconds), ('Decimal', decimal_seconds), ('micros', micros_seconds)):
+        print(f"{mode:<8} {args.updates / seconds:>12,.0f} {decimal_seconds / seconds:>9.2f}x")
+
+    float_drift = max(abs(Decimal(total) - exact) for total, exact in zip(float_totals, decimal_totals))
+    micros_drift = max(abs(Decimal(total) / MICROS - exact) for total, exact in zip(micros_totals, decimal_totals))
+    print(f"largest brand total off the exact Decimal sum: float {float_drift:.9f}, micros {micros_drift:.9f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Measure how the fleet simulation scales across worker processes.
+
+Runs the same fleet with 1, 2, 4, ... up to --workers processes and
+reports wall time, speedup over one process and scaling efficiency
+(speedup / workers). Every run simulates the same brands with the same
+seeds, so the overspend column should not change with the worker count.
+
+Usage:
+    python benchmarks/bench_parallel_sim.py --brands 2000 --days 7 --workers 8
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.simulator import generate_brands, run_parallel
+
+
+def worker_counts(maximum):
+    counts = []
+    workers = 1
+    while workers < maximum:
+        counts.append(workers)
+        workers *= 2
+    return counts + [maximum]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet simulation scaling across processes')
+    parser.add_argument('--brands', type=int, default=2000, help='Number of brands')
+    parser.add_argument('--days', type=int, default=7, help='Simulated days')
+    parser.add_argument('--events-per-day', type=float, default=200, help='Average spend opportunities per brand per day')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Largest worker count to try')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    specs = generate_brands(args.brands, args.events_per_day, seed=args.seed)
+    print(f"{args.brands} brands, {args.days} days, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'wall s':>8} {'events/s':>12} {'speedup':>8} {'efficiency':>10} {'overspend':>12}")
+    baseline = None
+    for workers in worker_counts(args.workers):
+        summary, _outcomes = run_parallel(specs, workers, days=args.days)
+        if baseline is None:
+            baseline = summary['wall_seconds']
+        speedup = baseline / summary['wall_seconds']
+        print(f"{workers:>7} {summary['wall_seconds']:>8.2f} {summary['events_per_sec']:>12,.0f} "
+              f"{speedup:>7.2f}x {speedup / workers:>10.0%} {summary['overspend']:>12,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare spend update throughput of the brand state store backends.
+
+Usage:
+    python benchmarks/bench_state_stores.py --updates 20000 --brands 100
+    python benchmarks/bench_state_stores.py --redis-url redis://localhost:6379/15
+
+The Redis backend is skipped when no server answers at --redis-url.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.stores.memory_store import MemoryStore
+from src.stores.sqlite_store import SQLiteStore
+
+
+def run(store, updates, brand_count):
+    names = [f"Brand {i}" for i in range(brand_count)]
+    for name in names:
+        store.save_brand(name, 10 ** 9, 10 ** 9, {"Campaign": (0, 24)})
+
+    start = time.perf_counter()
+    for i in range(updates):
+        store.add_spend(names[i % brand_count], 250000)
+    elapsed = time.perf_counter() - start
+
+    read_start = time.perf_counter()
+    store.get_spend(names)
+    read_elapsed = time.perf_counter() - read_start
+    return updates / elapsed, read_elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Brand state store benchmark')
+    parser.add_argument('--updates', type=int, default=20000, help='Spend updates per backend')
+    parser.add_argument('--brands', type=int, default=100, help='Number of brands')
+    parser.add_argument('--redis-url', default='redis://localhost:6379/15', help='Redis server to benchmark')
+    args = parser.parse_args()
+
+    backends = [('memory', MemoryStore)]
+    tmpdir = tempfile.TemporaryDirectory()
+    backends.append(('sqlite', lambda: SQLiteStore(os.path.join(tmpdir.name, 'state.db'))))
+    try:
+        from src.stores.redis_store import RedisStore
+        redis_store = RedisStore(args.redis_url, prefix='budget-bench')
+        redis_store.client.ping()
+        backends.append(('redis', lambda: redis_store))
+    except Exception as exc:
+        print(f"redis    skipped ({exc.__class__.__name__})")
+
+    for name, factory in backends:
+        store = factory()
+        store.clear()
+        updates_per_sec, read_ms = run(store, args.updates, args.brands)
+        store.clear()
+        print(f"{name:<8} {updates_per_sec:>12,.0f} updates/s   read {args.brands} brands: {read_ms:.2f} ms")
+
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
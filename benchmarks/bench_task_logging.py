@@ -0,0 +1,106 @@
+"""Measure how logging configuration affects update_brand_spend and check_campaign_status latency.
+
+Tasks run in-process against the memory store, logging to a file the
+way a worker logs to its console or a log shipper:
+
+    sync       StreamHandler writing on the task thread
+    queue      QueueHandler; a QueueListener thread formats and writes
+    sampled    queue, plus per-brand sampling of spend status lines
+    silent     INFO disabled, the floor for any logging setup
+
+check_campaign_status is timed in its full, changes and summary log modes.
+
+Usage:
+    python benchmarks/bench_task_logging.py --updates 20000 --brands 1000 --campaigns 10
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import celery_tasks
+from src.logging_config import LOG_FORMAT, LogSampler
+from src.log_queue import enqueue_handlers
+
+
+def configure(mode, path):
+    """Point the root logger at path for one logging mode; return the queue listener, if any."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    handler = logging.StreamHandler(open(path, 'w'))
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING if mode == 'silent' else logging.INFO)
+    celery_tasks.status_log_sampler = LogSampler(100 if mode == 'sampled' else 1)
+    if mode in ('queue', 'sampled'):
+        return enqueue_handlers(root)
+    return None
+
+
+def setup_brands(brand_count, campaign_count):
+    celery_tasks.brands.clear()
+    celery_tasks.store.clear()
+    for b in range(brand_count):
+        campaigns = {f'Campaign {c}': ((b + c) % 24, (b + c) % 24 + 6) for c in range(campaign_count)}
+        celery_tasks.store.save_brand(f'Brand {b}', 1e12, 1e12, campaigns)
+    celery_tasks.sync_brands()
+
+
+def time_spend(updates, brand_count):
+    start = time.perf_counter()
+    for i in range(updates):
+        celery_tasks.update_brand_spend(f'Brand {i % brand_count}', 0.25)
+    return (time.perf_counter() - start) / updates
+
+
+def time_status_checks(log_mode, hours):
+    # Step the clock an hour per run so every run has dayparting transitions to log
+    start = time.perf_counter()
+    with patch('src.celery_tasks.datetime') as clock:
+        for hour in range(hours):
+            clock.now.return_value = datetime(2024, 1, 1, hour)
+            celery_tasks.check_campaign_status(log_mode=log_mode)
+    return (time.perf_counter() - start) / hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Task latency per logging mode')
+    parser.add_argument('--updates', type=int, default=20000, help='update_brand_spend calls per mode')
+    parser.add_argument('--brands', type=int, default=1000, help='Number of brands')
+    parser.add_argument('--campaigns', type=int, default=10, help='Campaigns per brand')
+    parser.add_argument('--hours', type=int, default=24, help='check_campaign_status runs per mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'worker.log')
+        setup_brands(args.brands, args.campaigns)
+
+        print(f"update_brand_spend, {args.updates} calls across {args.brands} brands")
+        for mode in ('sync', 'queue', 'sampled', 'silent'):
+            listener = configure(mode, path)
+            per_call = time_spend(args.updates, args.brands)
+            if listener is not None:
+                listener.stop()
+            print(f"  {mode:<8} {per_call * 1e6:8.1f} µs/call  log {os.path.getsize(path) / 1024:8.0f} KiB")
+
+        print(f"\ncheck_campaign_status, {args.brands} brands x {args.campaigns} campaigns, {args.hours} hourly runs")
+        for log_mode in ('full', 'changes', 'summary'):
+            for mode in ('sync', 'queue'):
+                setup_brands(args.brands, args.campaigns)
+                listener = configure(mode, path)
+                per_run = time_status_checks(log_mode, args.hours)
+                if listener is not None:
+                    listener.stop()
+                print(f"  {log_mode:<8} {mode:<6} {per_run * 1000:8.2f} ms/run  "
+                      f"log {os.path.getsize(path) / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
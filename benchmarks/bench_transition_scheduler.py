@@ -0,0 +1,113 @@
+"""Compare hourly check_campaign_status sweeps with the TransitionScheduler.
+
+Builds a fleet with a mix of hour-tuple and minute-resolution schedules and
+plays one day through both: the hourly sweep runs update_for_time for every
+brand at each hour, the scheduler wakes only at transitions. Reports the
+wall time, the evaluations each does (brand checks for the sweep,
+campaign transitions for the scheduler) and how late campaigns start
+after their window opens. Windows shorter than an hour that fall between
+two sweeps never open at all, hence the different opening counts.
+
+Usage:
+    python benchmarks/bench_transition_scheduler.py --brands 20000 --per-brand 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.brand import Brand
+from src.models.campaign import Campaign
+from src.models.schedule import Schedule
+from src.services.campaign_service import CampaignService
+from src.services.scheduler import TransitionScheduler
+
+DAY = datetime(2024, 1, 1)
+
+
+def build(brand_count, per_brand, scheduled_share, seed, distinct=200):
+    rng = random.Random(seed)
+    # Compiling a schedule walks every minute of the week, so campaigns draw
+    # from a pool of shared schedules, as brands reusing a few templates would
+    schedules = []
+    for _ in range(distinct):
+        start = rng.randrange(0, 23 * 60, 15)
+        end = rng.randrange(start + 15, 24 * 60 + 1, 15)
+        schedules.append(Schedule([(f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}")]))
+    brands = []
+    for index in range(brand_count):
+        brand = Brand(f"Brand {index}", 3000, 100)
+        for number in range(per_brand):
+            if rng.random() < scheduled_share:
+                hours = rng.choice(schedules)
+            else:
+                start = rng.randint(0, 23)
+                hours = (start, rng.randint(start + 1, 24))
+            brand.add_campaign(Campaign(f"Campaign {number}", hours))
+        brands.append(brand)
+    return brands
+
+
+def record_openings(campaigns, now, late):
+    for campaign in campaigns:
+        if campaign.is_active:
+            # Minutes since the window opened: the check ran this long after it
+            opened = now
+            while campaign.is_within_dayparting(opened - timedelta(minutes=1)):
+                opened -= timedelta(minutes=1)
+            late.append((now - opened).total_seconds() / 60)
+
+
+def run_hourly(brands):
+    late = []
+    evaluations = 0
+    started = time.perf_counter()
+    for hour in range(1, 24):
+        now = DAY + timedelta(hours=hour)
+        for brand in brands:
+            changed = CampaignService(brand).update_for_time(now)
+            evaluations += 1
+            record_openings(changed, now, late)
+    return time.perf_counter() - started, evaluations, late
+
+
+def run_scheduler(brands):
+    late = []
+    scheduler = TransitionScheduler(clock=lambda: DAY)
+    started = time.perf_counter()
+    for brand in brands:
+        scheduler.track(brand, DAY)
+    end = DAY + timedelta(hours=23)
+    while scheduler.next_due() is not None and scheduler.next_due() <= end:
+        now = scheduler.next_due()
+        record_openings(scheduler.run_due(now), now, late)
+    return time.perf_counter() - started, scheduler.processed, late
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hourly sweeps vs transition-driven campaign updates')
+    parser.add_argument('--brands', type=int, default=20000, help='Number of brands')
+    parser.add_argument('--per-brand', type=int, default=5, help='Campaigns per brand')
+    parser.add_argument('--scheduled-share', type=float, default=0.5,
+                        help='Fraction of campaigns with minute-resolution schedules')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    print(f"{args.brands} brands x {args.per_brand} campaigns, {args.scheduled_share:.0%} minute schedules, "
+          f"00:00-23:00")
+    print(f"{'mode':>10} {'wall s':>8} {'evaluations':>12} {'openings':>9} {'mean late min':>14} {'max late min':>13}")
+    for mode, run in (('hourly', run_hourly), ('scheduler', run_scheduler)):
+        brands = build(args.brands, args.per_brand, args.scheduled_share, args.seed)
+        for brand in brands:
+            CampaignService(brand).update_for_time(DAY)
+        seconds, evaluations, late = run(brands)
+        mean = sum(late) / len(late) if late else 0.0
+        print(f"{mode:>10} {seconds:>8.2f} {evaluations:>12,} {len(late):>9,} {mean:>14.1f} "
+              f"{max(late, default=0):>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
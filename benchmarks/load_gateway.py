@@ -0,0 +1,81 @@
+"""Load generator for the spend ingestion gateway.
+
+Starts a gateway in-process with a discarding sink (or targets a running
+one with --port) and drives it with keep-alive clients, reporting
+events/sec and the gateway's p50/p99 request latency.
+
+Usage:
+    python benchmarks/load_gateway.py --clients 32 --duration 10 --bulk 100
+    python benchmarks/load_gateway.py --port 8080 --clients 8 --bulk 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.gateway import IngestionGateway, SpendBuffer
+
+
+async def client(port, deadline, bulk, brand_count, client_id, counts):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    path = '/spend/bulk' if bulk > 1 else '/spend'
+    sent = 0
+    while time.perf_counter() < deadline:
+        events = [json.dumps({"brand": f"Brand {(client_id + sent + i) % brand_count}", "amount": 0.01,
+                              "event_id": f"{client_id}-{sent + i}"}) for i in range(bulk)]
+        body = "\n".join(events).encode()
+        writer.write(f'POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        # Response bodies are small JSON objects; read up to the closing brace
+        await reader.readuntil(b'}')
+        if head.startswith(b'HTTP/1.1 503'):
+            # Backpressure: the gateway's buffer is full
+            continue
+        sent += bulk
+    writer.close()
+    counts.append(sent)
+
+
+async def run(args):
+    gateway = None
+    port = args.port
+    if port is None:
+        gateway = IngestionGateway(SpendBuffer(lambda records: None, args.max_batch, args.flush_interval))
+        port = await gateway.start('127.0.0.1', 0)
+
+    counts = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(port, deadline, args.bulk, args.brands, i, counts) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts)
+    print(f"clients: {args.clients}, events per request: {args.bulk}")
+    print(f"events sent: {total:,} in {elapsed:.1f} s -> {total / elapsed:,.0f} events/s")
+
+    if gateway is not None:
+        stats = gateway.stats()
+        await gateway.stop()
+        print(f"request latency p50 {stats['latency_p50_ms']:.3f} ms, p99 {stats['latency_p99_ms']:.3f} ms; "
+              f"{stats['flushes']:,} batches flushed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Spend ingestion gateway load generator')
+    parser.add_argument('--port', type=int, default=None, help='Port of a running gateway (default: start one)')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds to run')
+    parser.add_argument('--bulk', type=int, default=100, help='Events per request (1 uses POST /spend)')
+    parser.add_argument('--brands', type=int, default=1000, help='Number of distinct brands')
+    parser.add_argument('--max-batch', type=int, default=1000, help='Gateway flush size when started in-process')
+    parser.add_argument('--flush-interval', type=float, default=0.05, help='Gateway flush interval when in-process')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
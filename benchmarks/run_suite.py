@@ -0,0 +1,288 @@
+"""Benchmark suite for the budget and campaign hot paths, without a broker.
+
+Sweeps brand count, campaigns per brand and offered spend rate over:
+
+    budget_update        BudgetService.update_spend, in memory and through a MemoryStore
+    activate_campaigns   CampaignService.activate_campaigns for every brand at one hour
+    update_for_time      CampaignService.update_for_time stepping hour by hour
+    check_campaign_status, reset_daily_budgets, reset_monthly_budgets
+                         the Celery tasks executed eagerly with Task.apply()
+    update_brand_spend   the task driven at each --rates events/sec for --duration seconds
+    simulate_day         main.simulate_day for one brand
+
+Results are written as JSON. Compare them with a previous run to spot
+regressions: --compare exits non-zero when a case is more than
+--threshold times slower than the baseline.
+
+Usage:
+    python benchmarks/run_suite.py --output results.json
+    python benchmarks/run_suite.py --brands 100 1000 --campaigns 5 20 --rates 1000 5000 --output new.json
+    python benchmarks/run_suite.py --quick --compare results.json --threshold 1.25
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import celery_tasks
+from src.main import simulate_day
+from src.models.brand import Brand
+from src.models.campaign import Campaign
+from src.services.budget_service import BudgetService
+from src.services.campaign_service import CampaignService
+from src.services.events import EventBus
+from src.stores.memory_store import MemoryStore
+
+# Budgets high enough that no brand runs out while spend is being measured
+UNLIMITED = 1e15
+
+
+def campaign_hours(brand_index, campaign_index):
+    start = (brand_index + campaign_index * 5) % 24
+    return (start, min(24, start + 8))
+
+
+def build_brands(brand_count, campaign_count):
+    brands = []
+    for b in range(brand_count):
+        brand = Brand(f'Brand {b}', UNLIMITED, UNLIMITED)
+        for c in range(campaign_count):
+            brand.add_campaign(Campaign(f'Campaign {c}', campaign_hours(b, c)))
+        brands.append(brand)
+    return brands
+
+
+def load_tasks_state(brand_count, campaign_count):
+    celery_tasks.brands.clear()
+    celery_tasks.store.clear()
+    celery_tasks.spend_dedup.clear()
+    for b in range(brand_count):
+        campaigns = {f'Campaign {c}': campaign_hours(b, c) for c in range(campaign_count)}
+        celery_tasks.store.save_brand(f'Brand {b}', UNLIMITED, UNLIMITED, campaigns)
+    celery_tasks.sync_brands()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_budget_update(brand_count, campaign_count, events):
+    results = {}
+    for backend in ('memory', 'store'):
+        brands = build_brands(brand_count, campaign_count)
+        store = None
+        if backend == 'store':
+            store = MemoryStore()
+            for brand in brands:
+                store.save_brand(brand.name, brand.monthly_budget, brand.daily_budget, {})
+        services = [BudgetService(brand, store, EventBus()) for brand in brands]
+        start = time.perf_counter()
+        for i in range(events):
+            services[i % brand_count].update_spend(0.25)
+        results[f'{backend}_us_per_event'] = (time.perf_counter() - start) / events * 1e6
+    return results
+
+
+def bench_activate_campaigns(brand_count, campaign_count, repeats):
+    services = [CampaignService(brand) for brand in build_brands(brand_count, campaign_count)]
+    noon = datetime(2024, 1, 1, 12)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for service in services:
+            service.activate_campaigns(noon)
+    elapsed = (time.perf_counter() - start) / repeats
+    return {'ms_per_sweep': elapsed * 1e3, 'us_per_campaign': elapsed / (brand_count * campaign_count) * 1e6}
+
+
+def bench_update_for_time(brand_count, campaign_count, hours):
+    services = [CampaignService(brand) for brand in build_brands(brand_count, campaign_count)]
+    for service in services:
+        service.update_for_time(datetime(2024, 1, 1, 0))
+    start = time.perf_counter()
+    changed = 0
+    for hour in range(1, hours + 1):
+        now = datetime(2024, 1, 1 + hour // 24, hour % 24)
+        for service in services:
+            changed += len(service.update_for_time(now))
+    elapsed = (time.perf_counter() - start) / hours
+    return {'ms_per_hour': elapsed * 1e3, 'changed_per_hour': changed / hours}
+
+
+def bench_task(task, brand_count, campaign_count, repeats, **kwargs):
+    load_tasks_state(brand_count, campaign_count)
+    task.apply(kwargs=kwargs).get()  # warm the brand cache and daypart indexes
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        task.apply(kwargs=kwargs).get()
+        durations.append(time.perf_counter() - start)
+    return {'ms_per_call': sum(durations) / repeats * 1e3, 'p99_ms': percentile(durations, 0.99) * 1e3}
+
+
+def bench_spend_rate(brand_count, campaign_count, rate, duration):
+    """Offer update_brand_spend at a fixed rate (open loop) and report what the worker sustained."""
+    load_tasks_state(brand_count, campaign_count)
+    interval = 1.0 / rate
+    latencies = []
+    start = time.perf_counter()
+    next_at = start
+    sent = 0
+    while next_at - start < duration:
+        now = time.perf_counter()
+        if now < next_at:
+            time.sleep(next_at - now)
+        began = time.perf_counter()
+        celery_tasks.update_brand_spend.apply((f'Brand {sent % brand_count}', 0.25)).get()
+        done = time.perf_counter()
+        # Latency counts from the scheduled send time, so falling behind shows up as queueing delay
+        latencies.append(done - min(began, next_at))
+        sent += 1
+        next_at += interval
+    elapsed = time.perf_counter() - start
+    return {
+        'achieved_events_per_sec': sent / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1e3,
+        'p99_ms': percentile(latencies, 0.99) * 1e3,
+        'saturated': sent / elapsed < rate * 0.95,
+    }
+
+
+def bench_simulate_day(campaign_count, repeats):
+    brand = build_brands(1, campaign_count)[0]
+    brand.daily_budget = 100
+    budget_service = BudgetService(brand, events=EventBus())
+    campaign_service = CampaignService(brand)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        brand.current_daily_spend = 0
+        brand.budget_exhausted = False
+        simulate_day(brand, budget_service, campaign_service, 50)
+    return {'ms_per_call': (time.perf_counter() - start) / repeats * 1e3}
+
+
+# Metric compared against a baseline for each case; lower is better except for throughput
+PRIMARY_METRICS = {
+    'budget_update': ('store_us_per_event', False),
+    'activate_campaigns': ('ms_per_sweep', False),
+    'update_for_time': ('ms_per_hour', False),
+    'check_campaign_status': ('ms_per_call', False),
+    'reset_daily_budgets': ('ms_per_call', False),
+    'reset_monthly_budgets': ('ms_per_call', False),
+    'update_brand_spend': ('achieved_events_per_sec', True),
+    'simulate_day': ('ms_per_call', False),
+}
+
+
+def run(args):
+    results = []
+
+    def record(case, params, metrics):
+        results.append({'case': case, 'params': params, 'metrics': metrics})
+        shown = ', '.join(f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}' for k, v in metrics.items())
+        print(f"{case:<22} {json.dumps(params):<52} {shown}")
+
+    for brand_count in args.brands:
+        for campaign_count in args.campaigns:
+            params = {'brands': brand_count, 'campaigns': campaign_count}
+            record('budget_update', params, bench_budget_update(brand_count, campaign_count, args.events))
+            record('activate_campaigns', params, bench_activate_campaigns(brand_count, campaign_count, args.repeats))
+            record('update_for_time', params, bench_update_for_time(brand_count, campaign_count, 48))
+            record('check_campaign_status', params,
+                   bench_task(celery_tasks.check_campaign_status, brand_count, campaign_count, args.repeats,
+                              log_mode='summary'))
+            record('reset_daily_budgets', params,
+                   bench_task(celery_tasks.reset_daily_budgets, brand_count, campaign_count, args.repeats))
+            record('reset_monthly_budgets', params,
+                   bench_task(celery_tasks.reset_monthly_budgets, brand_count, campaign_count, args.repeats))
+            for rate in args.rates:
+                record('update_brand_spend', dict(params, rate=rate),
+                       bench_spend_rate(brand_count, campaign_count, rate, args.duration))
+
+    for campaign_count in args.campaigns:
+        record('simulate_day', {'campaigns': campaign_count}, bench_simulate_day(campaign_count, args.repeats))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the change of each case's primary metric against baseline; return the regressed cases."""
+    previous = {(r['case'], json.dumps(r['params'], sort_keys=True)): r['metrics'] for r in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for result in results:
+        key = (result['case'], json.dumps(result['params'], sort_keys=True))
+        if key not in previous:
+            continue
+        metric, higher_is_better = PRIMARY_METRICS[result['case']]
+        old, new = previous[key][metric], result['metrics'][metric]
+        slowdown = old / new if higher_is_better else new / old
+        flag = ' REGRESSION' if slowdown > threshold else ''
+        print(f"  {result['case']:<22} {key[1]:<52} {metric}: {old:.3f} → {new:.3f} ({slowdown:.2f}x){flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Budget and campaign hot path benchmark suite')
+    parser.add_argument('--brands', type=int, nargs='+', default=[100, 1000], help='Brand counts to sweep')
+    parser.add_argument('--campaigns', type=int, nargs='+', default=[5, 20], help='Campaigns per brand to sweep')
+    parser.add_argument('--rates', type=int, nargs='+', default=[1000, 5000],
+                        help='Offered update_brand_spend events/sec to sweep')
+    parser.add_argument('--events', type=int, default=100000, help='Spend events per budget_update run')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per task and sweep measurement')
+    parser.add_argument('--duration', type=float, default=2.0, help='Seconds per offered spend rate')
+    parser.add_argument('--quick', action='store_true', help='Small sweep for a fast smoke run')
+    parser.add_argument('--output', type=str, default=None, help='Write JSON results here')
+    parser.add_argument('--compare', type=str, default=None, help='Baseline JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Slowdown factor that counts as a regression in --compare')
+    args = parser.parse_args()
+    if args.quick:
+        args.brands, args.campaigns, args.rates = [100], [5], [1000]
+        args.events, args.repeats, args.duration = 20000, 3, 0.5
+
+    # Measure the code, not the console: only errors are logged during the run
+    logging.getLogger().setLevel(logging.ERROR)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.ERROR)
+
+    results = run(args)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
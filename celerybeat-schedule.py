@@ -1,3 +1,5 @@
+import os
+
 from celery import Celery
 from celery.schedules import crontab
 
@@ -7,20 +9,29 @@ app.conf.update(
     result_backend='redis://localhost:6379/0',
 )
 
-# Set up the periodic tasks
+# Set up the periodic tasks. There are no midnight reset sweeps: each brand
+# resets its daily and monthly spend on first use in a new (UTC) day or month.
 app.conf.beat_schedule = {
-    'reset-daily-budgets': {
-        'task': 'celery_tasks.reset_daily_budgets',
-        'schedule': crontab(hour=0, minute=0),  # Run at midnight every day
-    },
-    'reset-monthly-budgets': {
-        'task': 'celery_tasks.reset_monthly_budgets',
-        'schedule': crontab(day_of_month=1, hour=0, minute=0),  # Run on the 1st of every month
-    },
     'check-campaign-status-hourly': {
         'task': 'celery_tasks.check_campaign_status',
         'schedule': crontab(minute=0),  # Run every hour
     },
 }
 
+# Workers running the transition scheduler (CAMPAIGN_SCHEDULER=1) update
+# campaigns when their dayparting windows open or close, so the hourly sweep is
+# only needed for pacing, which re-projects every brand at each check
+if os.environ.get('CAMPAIGN_SCHEDULER', '') not in ('', '0') and not os.environ.get('PACING_HORIZON'):
+    del app.conf.beat_schedule['check-campaign-status-hourly']
+
+# With brand sharding every shard queue gets its own copy of each periodic task,
+# since each shard's workers only hold the brands they own
+BRAND_SHARDS = int(os.environ.get('BRAND_SHARDS', '0'))
+if BRAND_SHARDS:
+    app.conf.beat_schedule = {
+        f'{name}-shard-{index}': dict(entry, options={'queue': f'brand-shard-{index}'})
+        for name, entry in app.conf.beat_schedule.items()
+        for index in range(BRAND_SHARDS)
+    }
+
 app.conf.timezone = 'UTC'
@@ -1,34 +1,70 @@
 from celery import Celery
-from datetime import datetime
+from celery import bootsteps
+from celery.concurrency import get_implementation
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.signals import (after_setup_logger, celeryd_after_setup, task_postrun, task_prerun, worker_init,
+                            worker_process_init, worker_process_shutdown, worker_ready)
+from click import Option
+from datetime import datetime, timezone
+import atexit
 import sys
 import os
+import threading
 
-# Add the src directory to the path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Make `src.*` importable when the worker loads this module as `celery_tasks`
+if not __package__:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.models.brand import Brand
+from src.models.budget_tree import BudgetTree
 from src.models.campaign import Campaign
+from src.models.schedule import format_dayparting
 from src.services.budget_service import BudgetService
 from src.services.campaign_service import CampaignService
+from src.services.dedup import DedupWindow, StoreDedup
+from src.services.events import budget_events
+from src.services.locks import LockStripes
+from src.services.pacing import Pacer
+from src.services.periods import current_periods, next_day_start
+from src.services.scheduler import TransitionScheduler
+from src.money import FxTable, from_micros, to_micros
+from src.routing import BrandRouter, HashRing
+from src.stores.factory import create_store
+from src.stores.ledger import SpendLedger, SPEND_MICROS, RESET_DAILY, RESET_MONTHLY, recover
+from src.logging_config import LogSampler, setup_logging
+from src import metrics
+from src.profiling import NULL_STAGE_TIMER, StageTimer, TaskProfiler
 import logging
-import coloredlogs
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+
+# This module is the worker's entry point; setup_logging is a no-op when
+# another entry point (cli.py, the gateway) already configured logging.
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Configure colored logs for better readability
-coloredlogs.install(
-    level='INFO',
-    logger=logger,
-    fmt='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Per-event status lines are logged for one in LOG_SAMPLE_EVERY events per brand
+status_log_sampler = LogSampler(int(os.environ.get('LOG_SAMPLE_EVERY', '1')))
+
+# What check_campaign_status logs: 'full' (every campaign of every brand),
+# 'changes' (campaigns whose status changed) or 'summary' (one line per run)
+CAMPAIGN_STATUS_LOG = os.environ.get('CAMPAIGN_STATUS_LOG', 'changes')
+
+
+@after_setup_logger.connect
+def enqueue_worker_logging(logger, **kwargs):
+    """Celery replaces the root handlers when a worker starts; put them back behind the log queue.
+
+    Prefork children start their own listener on their first log record.
+    """
+    if os.environ.get('LOG_ASYNC', '') not in ('', '0'):
+        from src.log_queue import enqueue_handlers
+        enqueue_handlers(logger)
+
+
+@worker_process_shutdown.connect
+def flush_worker_logging(**kwargs):
+    """Pool children exit without atexit hooks; write out their queued log records first."""
+    if os.environ.get('LOG_ASYNC', '') not in ('', '0'):
+        from src.log_queue import stop_listeners
+        stop_listeners(logging.getLogger())
 
 # Initialize Celery app
 app = Celery('ad_agency_tasks')
@@ -47,130 +83,765 @@ app.conf.update(
     broker_connection_timeout=30,  # Increase timeout to 30 seconds
 )
 
-# Store brands (in a real app this would be in a database)
+# Brand-affinity routing. With BRAND_SHARDS=N, brand tasks go to one of N
+# brand-shard-<i> queues chosen by consistent hashing, so a worker consuming
+# a shard queue owns a stable subset of brands.
+BRAND_SHARDS = int(os.environ.get('BRAND_SHARDS', '0'))
+brand_ring = HashRing(BRAND_SHARDS) if BRAND_SHARDS else None
+if brand_ring is not None:
+    app.conf.task_routes = (BrandRouter(brand_ring),)
+
+# Shard queues this worker consumes, set once the worker knows its -Q queues;
+# None (no sharding, or not running in a worker) means every brand
+owned_queues = None
+
+
+@celeryd_after_setup.connect
+def record_owned_queues(sender, instance, **kwargs):
+    global owned_queues
+    if brand_ring is not None:
+        owned_queues = frozenset(instance.app.amqp.queues.consume_from) & frozenset(brand_ring.queues)
+        logger.info(f"🧭 Owning brands of shard queues: {', '.join(sorted(owned_queues)) or 'none'}")
+
+
+def owns_brand(name):
+    """Whether this worker's shard queues own name, so fleet-wide tasks should load it."""
+    return owned_queues is None or brand_ring.queue_for(name) in owned_queues
+
+# Shared brand state (spend counters and configuration). Defaults to an
+# in-process store; point BUDGET_STATE_URL at sqlite:/// or redis:// to share
+# state between worker processes and keep it across restarts.
+store = create_store(os.environ.get('BUDGET_STATE_URL', 'memory://'))
+
+# Local cache of brand objects built from the state store
 brands = {}
 
+# Per-brand locks: spend for one brand is serialized, different brands update in
+# parallel under threaded or gevent pools, and resets hold every stripe
+brand_locks = LockStripes(int(os.environ.get('BRAND_LOCK_STRIPES', '64')))
 
-@app.task
-def initialize_brand(name, monthly_budget, daily_budget, campaign_data):
-    """Initialize a brand with its campaigns."""
+# Event IDs of recently applied spend, so redelivered messages are not counted
+# twice. A shared store also shares the IDs, so a redelivery to another worker
+# process is caught too.
+SPEND_DEDUP_WINDOW = int(os.environ.get('SPEND_DEDUP_WINDOW', '3600'))
+if hasattr(store, 'claim_event'):
+    spend_dedup = StoreDedup(store, SPEND_DEDUP_WINDOW)
+else:
+    spend_dedup = DedupWindow(window=SPEND_DEDUP_WINDOW,
+                              max_entries=int(os.environ.get('SPEND_DEDUP_MAX_ENTRIES', '1000000')))
+
+# Predictive pacing. With PACING_HORIZON set (seconds until the next
+# check_campaign_status, e.g. 3600 for the hourly beat), each check also
+# pauses brands whose recent spend rate would exhaust their budget before the
+# next check. PACING_WINDOW is the span, in seconds, the spend rate averages over.
+PACING_HORIZON = float(os.environ.get('PACING_HORIZON', '0'))
+pacer = Pacer(float(os.environ.get('PACING_WINDOW', '900')), PACING_HORIZON) if PACING_HORIZON else None
+
+# Budgets above and below brand level. BUDGET_TREE names a JSON file of
+# nested {daily_budget, monthly_budget, children} nodes: the agency, its
+# brands, campaign groups and campaigns. Spend tagged with a campaign posts
+# at its leaf and rolls up to the agency; a node over budget pauses only the
+# campaigns under it. Node counters are kept in the state store, so with a
+# shared store every worker enforces the same agency and group totals.
+budget_tree = BudgetTree.load(os.environ['BUDGET_TREE'], store) if os.environ.get('BUDGET_TREE') else None
+
+# Spend in other currencies is converted to the budget currency with the
+# rates in the FX_RATES JSON file, loaded once and resolved per day.
+fx_rates = FxTable.load(os.environ['FX_RATES']) if os.environ.get('FX_RATES') else None
+
+# Metrics, served in the Prometheus text format on METRICS_PORT once the worker is ready
+TASK_SECONDS = metrics.Histogram('budget_task_duration_seconds', 'Task run time in seconds', ['task'],
+                                 registry=metrics.registry)
+SPEND_EVENTS = metrics.Counter('budget_spend_events_total', 'Spend events applied',
+                               registry=metrics.registry)
+SPEND_AMOUNT = metrics.Counter('budget_spend_amount_total', 'Spend applied, in budget currency',
+                               registry=metrics.registry)
+DUPLICATE_SPEND_EVENTS = metrics.Counter('budget_spend_duplicate_events_total',
+                                         'Spend events ignored as redeliveries', registry=metrics.registry)
+metrics.Gauge('budget_spend_dedup_checked', 'Spend event IDs checked against the dedup window by this process',
+              registry=metrics.registry, function=lambda: spend_dedup.checked)
+metrics.Gauge('budget_spend_dedup_hit_rate', 'Share of checked spend event IDs that were duplicates',
+              registry=metrics.registry,
+              function=lambda: spend_dedup.duplicates / spend_dedup.checked if spend_dedup.checked else 0.0)
+if isinstance(spend_dedup, DedupWindow):
+    metrics.Gauge('budget_spend_dedup_entries', 'Event IDs held in this process\'s dedup window',
+                  registry=metrics.registry, function=lambda: len(spend_dedup))
+CAMPAIGN_CHANGES = metrics.Counter('budget_campaign_status_changes_total',
+                                   'Campaigns activated or deactivated by check_campaign_status', ['direction'],
+                                   registry=metrics.registry)
+CAMPAIGNS_ACTIVATED = CAMPAIGN_CHANGES.labels('activated')
+CAMPAIGNS_DEACTIVATED = CAMPAIGN_CHANGES.labels('deactivated')
+PACED_BRANDS = metrics.Counter('budget_paced_brands_total',
+                               'Brands paused by pacing before reaching their budget', registry=metrics.registry)
+metrics.Gauge('budget_brands', 'Brands cached by this worker', registry=metrics.registry,
+              function=lambda: len(brands))
+metrics.Gauge('budget_brands_over_budget', 'Cached brands whose daily or monthly budget is exhausted',
+              registry=metrics.registry,
+              function=lambda: sum(1 for brand in list(brands.values()) if brand.budget_exhausted))
+if os.environ.get('METRICS_PER_BRAND', '') not in ('', '0'):
+    # One series per brand and budget; off by default since it grows with the number of brands
+    metrics.Gauge('budget_headroom', 'Budget left per brand', ['brand', 'period'], registry=metrics.registry,
+                  function=lambda: {
+                      key: value
+                      for name, brand in list(brands.items())
+                      for key, value in (((name, 'daily'), brand.daily_headroom),
+                                         ((name, 'monthly'), brand.monthly_headroom))
+                  })
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    if os.environ.get('METRICS_PORT'):
+        port = int(os.environ['METRICS_PORT'])
+        metrics.start_http_server(port, host=os.environ.get('METRICS_HOST', '127.0.0.1'))
+        logger.info(f"📈 Serving metrics on port {port}")
+
+# Opt-in profiling: PROFILE_TASKS (or `celery worker --profile-tasks`) is the
+# fraction of task executions to profile into PROFILE_DIR. While it is on,
+# update_brand_spend also records the time spent in each of its stages.
+TASK_STAGE_SECONDS = metrics.Histogram('budget_task_stage_seconds', 'Time spent in each stage of a task',
+                                       ['task', 'stage'], registry=metrics.registry)
+profiler = None
+_profiled_runs = {}
+
+
+def enable_profiling(fraction, directory=None, mode=None):
+    """Profile a fraction of task executions, writing collapsed stacks (or cProfile stats) to directory."""
+    global profiler
+    profiler = TaskProfiler(
+        fraction,
+        directory or os.environ.get('PROFILE_DIR', 'profiles'),
+        mode=mode or os.environ.get('PROFILE_MODE', 'stack'),
+        interval=float(os.environ.get('PROFILE_INTERVAL', '0.001')),
+    )
+    atexit.register(profiler.close)
+    logger.info(f"🔬 Profiling {fraction:.2%} of task executions ({profiler.mode}) into {profiler.directory}")
+    return profiler
+
+
+@task_prerun.connect
+def start_task_profile(task_id=None, task=None, **kwargs):
+    if profiler is not None:
+        token = profiler.start(task.name.rsplit('.', 1)[-1])
+        if token is not None:
+            _profiled_runs[task_id] = token
+
+
+@task_postrun.connect
+def stop_task_profile(task_id=None, **kwargs):
+    token = _profiled_runs.pop(task_id, None)
+    if token is not None:
+        profiler.stop(token)
+
+
+class ProfilingStep(bootsteps.Step):
+    """Turns on profiling when the worker is started with --profile-tasks."""
+
+    def __init__(self, worker, profile_tasks=None, **options):
+        if profile_tasks:
+            enable_profiling(profile_tasks)
+
+
+app.user_options['worker'].add(Option(('--profile-tasks',), type=float, default=None,
+                                      help='Fraction of task executions to profile (see PROFILE_DIR).'))
+app.steps['worker'].add(ProfilingStep)
+
+
+if os.environ.get('PROFILE_TASKS'):
+    enable_profiling(float(os.environ['PROFILE_TASKS']))
+
+# Optional write-ahead spend ledger. When BUDGET_LEDGER_DIR is set, spend is
+# appended to the ledger before it is applied, and a fresh in-memory store is
+# rebuilt from the latest snapshot plus the ledger tail when the worker starts.
+# Importing this module (the CLI, gateway and CLI daemon do) never touches it.
+LEDGER_DIR = os.environ.get('BUDGET_LEDGER_DIR')
+SNAPSHOT_EVERY = int(os.environ.get('BUDGET_SNAPSHOT_EVERY', '100000'))
+ledger = None
+
+
+@worker_init.connect
+def open_worker_ledger(sender=None, **kwargs):
+    """Recover and open the spend ledger in the worker process, before it takes any task.
+
+    The ledger has a single writer, and its snapshots must see all spend,
+    so the worker process itself has to run every task: a solo, threads,
+    gevent or eventlet pool. A prefork worker refuses to start.
+    """
+    if not LEDGER_DIR:
+        return
+    require_single_process_pool(sender, 'BUDGET_LEDGER_DIR')
+    open_ledger(LEDGER_DIR)
+
+
+@worker_init.connect
+def check_pacing_pool(sender=None, **kwargs):
+    """Refuse a prefork worker when pacing is on.
+
+    The pacer's spend rates live in the process that observes the spend;
+    prefork children would each see a fraction of a brand's spend, and the
+    child running the check would rarely project it over budget.
+    """
+    if PACING_HORIZON:
+        require_single_process_pool(sender, 'PACING_HORIZON')
+
+
+def require_single_process_pool(sender, setting):
+    if issubclass(get_implementation(sender.pool_cls), PreforkPool):
+        raise SystemExit(f"{setting} needs a single-process pool: start the worker with --pool solo "
+                         "or --pool threads")
+
+
+def open_ledger(directory):
+    """Take the ledger directory, rebuild an empty store from it and open the ledger for appends."""
+    global ledger
+    # Opening locks the directory first, so recovery never reads segments another process writes
+    opened = SpendLedger(directory)
+    if not store.brand_names():
+        replayed = recover(directory, store)
+        logger.info(f"📒 Recovered {len(store.brand_names())} brands from ledger ({replayed} records replayed)")
+    ledger = opened
+    atexit.register(ledger.close)
+
+
+def log_to_ledger(kind, brand_name='', amount=0.0):
+    """Append an event to the spend ledger; call under the lock that also covers applying it."""
+    if ledger is None:
+        return
+    ledger.append(kind, brand_name, amount)
+
+
+def snapshot_ledger_if_due():
+    """Snapshot the store every SNAPSHOT_EVERY ledger records; call after applying, holding no brand lock.
+
+    Every ledger append is applied under the same brand lock, so with all
+    stripes held the store has every record of the segments the snapshot
+    replaces.
+    """
+    if ledger is not None and ledger.records_since_snapshot >= SNAPSHOT_EVERY:
+        ledger.snapshot(store, brand_locks.all())
+
+
+@budget_events.subscribe
+def log_budget_event(event):
+    """Log brands pausing or resuming because of their budget."""
+    if event.exhausted:
+        logger.warning(f"⛔ {event.brand_name} {event.reason} budget exhausted, campaigns paused")
+    else:
+        logger.info(f"▶️ {event.brand_name} has budget available again ({event.reason})")
+
+
+def build_brand(name, monthly_budget, daily_budget, campaign_data, daily_spend_micros=0, monthly_spend_micros=0):
+    """Create a Brand with its campaigns from plain configuration values."""
     brand = Brand(name, monthly_budget, daily_budget)
+    brand.daily_spend_micros = daily_spend_micros
+    brand.monthly_spend_micros = monthly_spend_micros
+    brand.budget_exhausted = brand.check_daily_budget() or brand.check_monthly_budget()
     
     for campaign_name, dayparting_hours in campaign_data.items():
+        if not isinstance(dayparting_hours, str):
+            dayparting_hours = tuple(dayparting_hours)
         campaign = Campaign(campaign_name, dayparting_hours)
         brand.add_campaign(campaign)
     
-    brands[name] = brand
+    return brand
+
+
+def get_brand(name):
+    """Return the cached brand, loading it from the state store on first use."""
+    brand = brands.get(name)
+    if brand is not None:
+        return brand
+    with brand_locks.for_brand(name):
+        brand = brands.get(name)
+        if brand is None:
+            record = store.load_brand(name, *current_periods())
+            if record is None:
+                return None
+            brand = build_brand(name, record['monthly_budget'], record['daily_budget'], record['campaigns'],
+                                record['daily_spend'], record['monthly_spend'])
+            brand.daily_period = record['daily_period']
+            brand.monthly_period = record['monthly_period']
+            brands[name] = brand
+            if budget_tree is not None:
+                budget_tree.attach(brand)
+            if campaign_scheduler is not None:
+                campaign_scheduler.track(brand)
+        return brand
+
+
+def sync_brands():
+    """Load brands created by other workers and refresh spend totals from the state store.
+
+    With brand shards, only the brands this worker owns are loaded, so a
+    shared store does not pull the whole fleet into every shard.
+    """
+    names = [name for name in store.brand_names() if owns_brand(name)]
+    for name in names:
+        get_brand(name)
+    periods = current_periods()
+    for name, (daily, monthly) in store.get_spend(names, *periods).items():
+        brand = brands[name]
+        with brand_locks.for_brand(name):
+            brand.daily_spend_micros = daily
+            brand.monthly_spend_micros = monthly
+            brand.daily_period, brand.monthly_period = periods
+            BudgetService(brand).refresh()
+
+
+def roll_over(brand, periods):
+    """Start a new day or month for brand if its counters are from an earlier one; hold the brand lock.
+
+    A brand that is back under budget gets its campaigns re-enabled right
+    away rather than at the next check_campaign_status.
+    """
+    if BudgetService(brand).roll_over(*periods) and not brand.budget_exhausted:
+        CampaignService(brand).update_for_time(datetime.now(timezone.utc))
+
+
+def convert_currency(micros, currency, day):
+    """Micros of currency in the budget currency; ValueError if there is no rate for it."""
+    if fx_rates is None:
+        raise ValueError(f"no FX_RATES table to convert {currency}")
+    return fx_rates.to_base(micros, currency, day)
+
+
+def post_to_budget_tree(brand_name, micros, periods, campaign_name=None):
+    """Roll spend up the budget tree from the campaign's leaf (or the brand); call without holding brand locks.
+
+    Nodes going over budget pause the campaigns under them straight away,
+    whichever brand they belong to.
+    """
+    update_tree_brands(budget_tree.roll_over(*periods))
+    node = budget_tree.leaf_for(brand_name, campaign_name)
+    if node is None:
+        return
+    pause_exhausted_nodes(budget_tree.post(node, micros))
+
+
+def pause_exhausted_nodes(crossed):
+    """Pause the campaigns under budget tree nodes that went over budget; call without holding brand locks.
+
+    The scheduler looks at their brands again the next day.
+    """
+    for node in crossed:
+        logger.warning("⛔ %s budget exhausted, campaigns under it paused", '/'.join(node.path) or node.name)
+    paused = budget_tree.brands_under(crossed)
+    update_tree_brands(paused)
+    if campaign_scheduler is not None:
+        for brand in paused:
+            campaign_scheduler.schedule_refresh(brand, datetime.fromtimestamp(next_day_start(), timezone.utc))
+
+
+def update_tree_brands(affected):
+    """Bring the campaigns of brands the budget tree blocked or released up to date; call without brand locks.
+
+    Each brand is updated under its own lock, one at a time in name order,
+    so this never races the brand's other updates or holds two stripes.
+    """
+    now = datetime.now(timezone.utc)
+    for brand in sorted(affected, key=lambda brand: brand.name):
+        with brand_locks.for_brand(brand.name):
+            # Eligibility changed outside the daypart index
+            brand.daypart_index.invalidate()
+            CampaignService(brand).update_for_time(now)
+
+
+# Transition-driven campaign status. With CAMPAIGN_SCHEDULER set, each worker
+# process runs a thread that sleeps until the next dayparting transition of one
+# of its campaigns (or the new budget day of an exhausted brand) and updates
+# just those campaigns, so windows open on time instead of at the next hourly
+# check_campaign_status. Drop that beat entry once every worker runs with it.
+CAMPAIGN_SCHEDULER = os.environ.get('CAMPAIGN_SCHEDULER', '') not in ('', '0')
+campaign_scheduler = None
+_scheduler_pid = None
+
+
+def refresh_exhausted_brand(brand, now):
+    """Start the brand's new budget period; if it is still exhausted, look again at the next UTC midnight.
+
+    The budget tree rolls over here too. Other brands it releases get a
+    refresh of their own, run under their own lock.
+    """
+    periods = current_periods()
+    if budget_tree is not None:
+        for released in budget_tree.roll_over(*periods):
+            campaign_scheduler.schedule_refresh(released, now)
+    roll_over(brand, periods)
+    if budget_tree is not None and not brand.budget_exhausted:
+        # Its campaigns the tree released, whether or not the brand's own counters rolled over
+        brand.daypart_index.invalidate()
+        CampaignService(brand).update_for_time(datetime.now(timezone.utc))
+    if brand.budget_exhausted or not all(campaign.within_budget for campaign in brand.campaigns):
+        campaign_scheduler.schedule_refresh(brand, datetime.fromtimestamp(next_day_start(), timezone.utc))
+
+
+def log_scheduled_changes(changed):
+    activated = sum(1 for campaign in changed if campaign.is_active)
+    CAMPAIGNS_ACTIVATED.inc(activated)
+    CAMPAIGNS_DEACTIVATED.inc(len(changed) - activated)
+    for campaign in changed:
+        logger.info("⏰ %s %s (dayparting %s)", campaign.name, "ACTIVATED" if campaign.is_active else "DEACTIVATED",
+                    format_dayparting(campaign.dayparting_hours))
+
+
+@budget_events.subscribe
+def schedule_budget_reset(event):
+    """Have the scheduler re-enable an exhausted brand's campaigns when its next budget day starts."""
+    brand = brands.get(event.brand_name)
+    if campaign_scheduler is not None and event.exhausted and brand is not None:
+        campaign_scheduler.schedule_refresh(brand, datetime.fromtimestamp(next_day_start(), timezone.utc))
+
+
+@worker_process_init.connect
+def start_campaign_scheduler(**kwargs):
+    """Start this process's scheduler thread; prefork children start theirs as they are forked."""
+    global campaign_scheduler, _scheduler_pid
+    if not CAMPAIGN_SCHEDULER or _scheduler_pid == os.getpid():
+        return
+    _scheduler_pid = os.getpid()
+    campaign_scheduler = TransitionScheduler(refresh_exhausted_brand,
+                                             is_current=lambda brand: brands.get(brand.name) is brand,
+                                             lock_for=brand_locks.for_brand)
+    # Already cached brands were loaded before the scheduler existed
+    for brand in list(brands.values()):
+        campaign_scheduler.track(brand)
+    sync_brands()
+    threading.Thread(target=campaign_scheduler.run_forever, kwargs={'on_changed': log_scheduled_changes},
+                     name='campaign-scheduler', daemon=True).start()
+    logger.info(f"⏰ Campaign scheduler tracking {len(campaign_scheduler)} transitions across {len(brands)} brands")
+
+
+@worker_ready.connect
+def start_pool_campaign_scheduler(sender=None, **kwargs):
+    """Solo, thread and green pools run tasks in the worker process itself, which gets no worker_process_init.
+
+    A prefork parent runs no tasks, so it gets no scheduler of its own.
+    """
+    if not isinstance(sender.pool, PreforkPool):
+        start_campaign_scheduler()
+
+
+@app.task
+@metrics.timed(TASK_SECONDS.labels('initialize_brand'))
+def initialize_brand(name, monthly_budget, daily_budget, campaign_data):
+    """Initialize a brand with its campaigns.
+
+    Spend already recorded for the brand in the state store is kept.
+    """
+    with brand_locks.for_brand(name):
+        if ledger is not None:
+            ledger.append_brand(name, monthly_budget, daily_budget, campaign_data)
+        store.save_brand(name, monthly_budget, daily_budget, campaign_data)
+        brands.pop(name, None)
+        get_brand(name)
+    snapshot_ledger_if_due()
     logger.info(f"✨ Initialized brand: {name} with {len(campaign_data)} campaigns")
     logger.info(f"📊 Budget limits - Daily: ${daily_budget}, Monthly: ${monthly_budget}")
     
     # Log campaign details
     for campaign_name, hours in campaign_data.items():
-        logger.info(f"  - Campaign: {campaign_name}, Dayparting: {hours[0]}:00-{hours[1]}:00")
+        logger.info(f"  - Campaign: {campaign_name}, Dayparting: {format_dayparting(hours)}")
     
     return name
 
 
 @app.task
-def update_brand_spend(brand_name, amount):
-    """Update a brand's daily and monthly spend."""
-    if brand_name not in brands:
+@metrics.timed(TASK_SECONDS.labels('update_brand_spend'))
+def update_brand_spend(brand_name, amount, event_id=None, campaign_name=None, currency=None):
+    """Update a brand's daily and monthly spend.
+
+    When event_id is given, an event already applied inside the dedup window
+    is acknowledged without being counted again. campaign_name attributes
+    the spend to a campaign of the budget tree, if one is configured, and
+    amount is converted from currency with the FX_RATES table.
+    """
+    stages = StageTimer(TASK_STAGE_SECONDS, 'update_brand_spend') if profiler is not None else NULL_STAGE_TIMER
+    brand = get_brand(brand_name)
+    if brand is None:
         logger.error(f"❌ Brand '{brand_name}' not found")
         return False
     
-    brand = brands[brand_name]
-    budget_service = BudgetService(brand)
+    periods = current_periods()
+    try:
+        micros = to_micros(amount)
+        if currency is not None:
+            micros = convert_currency(micros, currency, periods[0])
+    except (ValueError, OverflowError) as exc:
+        logger.error(f"❌ Skipped spend for {brand_name}: {exc}")
+        return False
+    
+    if event_id is not None and spend_dedup.seen(event_id):
+        DUPLICATE_SPEND_EVENTS.inc()
+        logger.info("🔁 Ignoring duplicate spend event %s for %s", event_id, brand_name)
+        return True
     
-    logger.info(f"💰 Updating spend for {brand_name} by ${amount}")
-    logger.info(f"  Before update - Daily: ${brand.current_daily_spend}/{brand.daily_budget}, " +
-                f"Monthly: ${brand.current_monthly_spend}/{brand.monthly_budget}")
+    budget_service = BudgetService(brand, store)
+    # Sampled per brand: a busy brand would otherwise log three lines per impression
+    verbose = status_log_sampler(brand_name)
+    stages.mark('lookup')
     
-    budget_service.update_daily_spend(amount)
-    budget_service.update_monthly_spend(amount)
+    try:
+        with brand_locks.for_brand(brand_name):
+            roll_over(brand, periods)
+            if verbose:
+                before = (brand.current_daily_spend, brand.current_monthly_spend)
+            
+            log_to_ledger(SPEND_MICROS, brand_name, micros)
+            budget_service.update_spend_micros(micros, periods)
+            if pacer is not None:
+                pacer.observe(brand_name, from_micros(micros))
+            
+            if verbose:
+                after = (brand.current_daily_spend, brand.current_monthly_spend)
+    except BaseException:
+        # Not applied: let the retry count it
+        if event_id is not None:
+            spend_dedup.forget(event_id)
+        raise
     
-    logger.info(f"  After update - Daily: ${brand.current_daily_spend}/{brand.daily_budget}, " +
-                f"Monthly: ${brand.current_monthly_spend}/{brand.monthly_budget}")
+    snapshot_ledger_if_due()
+    if budget_tree is not None:
+        post_to_budget_tree(brand_name, micros, periods, campaign_name)
+    SPEND_EVENTS.inc()
+    SPEND_AMOUNT.inc(from_micros(micros))
+    stages.mark('budget_update')
     
     # Check if any budgets were exceeded
-    if brand.check_daily_budget():
-        logger.warning(f"⚠️ Daily budget exceeded for {brand_name}")
-    if brand.check_monthly_budget():
-        logger.warning(f"⚠️ Monthly budget exceeded for {brand_name}")
+    daily_exceeded = brand.check_daily_budget()
+    monthly_exceeded = brand.check_monthly_budget()
+    stages.mark('threshold_check')
+    
+    if verbose:
+        logger.info("💰 Updating spend for %s by $%s", brand_name, from_micros(micros))
+        logger.info("  Before update - Daily: $%s/%s, Monthly: $%s/%s",
+                    before[0], brand.daily_budget, before[1], brand.monthly_budget)
+        logger.info("  After update - Daily: $%s/%s, Monthly: $%s/%s",
+                    after[0], brand.daily_budget, after[1], brand.monthly_budget)
+        if daily_exceeded:
+            logger.warning("⚠️ Daily budget exceeded for %s", brand_name)
+        if monthly_exceeded:
+            logger.warning("⚠️ Monthly budget exceeded for %s", brand_name)
+    stages.mark('logging')
     
     return True
 
 
 @app.task
+@metrics.timed(TASK_SECONDS.labels('update_brand_spend_batch'))
+def update_brand_spend_batch(records):
+    """Apply a batch of (brand, amount, timestamp[, event_id[, currency]]) spend records, one update per brand.
+
+    Records whose amount cannot be converted are skipped. Event IDs are only
+    claimed for records of known brands, and released again if applying a
+    brand's spend fails, so a retried batch still counts them.
+    """
+    pending = {}
+    invalid = 0
+    periods = current_periods()
+    for brand_name, amount, _timestamp, *extra in records:
+        try:
+            micros = to_micros(amount)
+            if len(extra) > 1 and extra[1] is not None:
+                micros = convert_currency(micros, extra[1], periods[0])
+        except (ValueError, OverflowError) as exc:
+            invalid += 1
+            logger.error(f"❌ Skipped spend for {brand_name}: {exc}")
+            continue
+        pending.setdefault(brand_name, []).append((micros, extra[0] if extra else None))
+
+    crossed = []
+    unknown = []
+    duplicates = 0
+    applied = 0
+    for brand_name, brand_records in pending.items():
+        brand = get_brand(brand_name)
+        if brand is None:
+            unknown.append(brand_name)
+            continue
+
+        total = 0
+        count = 0
+        claimed = []
+        for micros, event_id in brand_records:
+            if event_id is not None:
+                if spend_dedup.seen(event_id):
+                    duplicates += 1
+                    continue
+                claimed.append(event_id)
+            total += micros
+            count += 1
+        if not count:
+            continue
+
+        try:
+            with brand_locks.for_brand(brand_name):
+                roll_over(brand, periods)
+                was_exhausted = brand.budget_exhausted
+                log_to_ledger(SPEND_MICROS, brand_name, total)
+                BudgetService(brand, store).update_spend_micros(total, periods)
+                if pacer is not None:
+                    pacer.observe(brand_name, from_micros(total))
+                now_exhausted = brand.budget_exhausted
+        except BaseException:
+            for event_id in claimed:
+                spend_dedup.forget(event_id)
+            raise
+        applied += count
+        if budget_tree is not None:
+            post_to_budget_tree(brand_name, total, periods)
+        SPEND_EVENTS.inc(count)
+        SPEND_AMOUNT.inc(from_micros(total))
+
+        if not was_exhausted and now_exhausted:
+            crossed.append(brand_name)
+            logger.warning(f"⚠️ Budget exceeded for {brand_name} - Daily: ${brand.current_daily_spend}/{brand.daily_budget}, " +
+                           f"Monthly: ${brand.current_monthly_spend}/{brand.monthly_budget}")
+
+    snapshot_ledger_if_due()
+    if unknown:
+        logger.error(f"❌ Skipped spend for unknown brands: {', '.join(unknown)}")
+    if duplicates:
+        DUPLICATE_SPEND_EVENTS.inc(duplicates)
+        logger.info(f"🔁 Ignored {duplicates} duplicate spend events")
+    logger.info(f"💰 Applied {applied} spend records across {len(pending) - len(unknown)} brands")
+
+    return {'crossed': crossed, 'unknown': unknown, 'duplicates': duplicates}
+
+
+@app.task
+def evict_brands(names):
+    """Drop brands from this worker's cache after they moved to another shard."""
+    evicted = 0
+    for name in names:
+        with brand_locks.for_brand(name):
+            if brands.pop(name, None) is not None:
+                evicted += 1
+    logger.info(f"🚚 Evicted {evicted} brands that moved to other shards")
+    return evicted
+
+
+@app.task
+def spend_dedup_stats():
+    """Return hit rate and memory use of the spend deduplication window."""
+    return spend_dedup.stats()
+
+
+@app.task
+@metrics.timed(TASK_SECONDS.labels('reset_daily_budgets'))
 def reset_daily_budgets():
-    """Reset daily budgets for all brands at the start of a new day."""
-    logger.info(f"🔄 Resetting daily budgets for all brands")
+    """Reset daily budgets for all brands now.
+
+    Not needed at midnight: brands start a new day on first use in it (see
+    roll_over). This is for resetting mid-period by hand.
+    """
+    logger.info("🔄 Resetting daily budgets for all brands")
     
-    for brand_name, brand in brands.items():
-        logger.info(f"  - {brand_name}: Current spend ${brand.current_daily_spend} → $0 (Daily limit: ${brand.daily_budget})")
-        brand.reset_daily_budget()
+    with brand_locks.all():
+        sync_brands()
+        log_to_ledger(RESET_DAILY)
+        store.reset_daily()
+        for brand_name, brand in brands.items():
+            logger.info(f"  - {brand_name}: Current spend ${brand.current_daily_spend} → $0 (Daily limit: ${brand.daily_budget})")
+            BudgetService(brand).reset_daily()
+    snapshot_ledger_if_due()
     
     logger.info(f"✅ Daily budget reset completed for {len(brands)} brands")
     return True
 
 
 @app.task
+@metrics.timed(TASK_SECONDS.labels('reset_monthly_budgets'))
 def reset_monthly_budgets():
-    """Reset monthly budgets for all brands at the start of a new month."""
-    logger.info(f"🔄 Resetting monthly budgets for all brands")
+    """Reset monthly budgets for all brands now; new months start lazily like new days."""
+    logger.info("🔄 Resetting monthly budgets for all brands")
     
-    for brand_name, brand in brands.items():
-        logger.info(f"  - {brand_name}: Current spend ${brand.current_monthly_spend} → $0 (Monthly limit: ${brand.monthly_budget})")
-        brand.reset_monthly_budget()
+    with brand_locks.all():
+        sync_brands()
+        log_to_ledger(RESET_MONTHLY)
+        store.reset_monthly()
+        for brand_name, brand in brands.items():
+            logger.info(f"  - {brand_name}: Current spend ${brand.current_monthly_spend} → $0 (Monthly limit: ${brand.monthly_budget})")
+            BudgetService(brand).reset_monthly()
+    snapshot_ledger_if_due()
     
     logger.info(f"✅ Monthly budget reset completed for {len(brands)} brands")
     return True
 
 
 @app.task
-def check_campaign_status():
-    """Check and update the status of all campaigns based on current time and budgets."""
-    current_time = datetime.now()
-    logger.info(f"🔍 Checking campaign status at {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
+@metrics.timed(TASK_SECONDS.labels('check_campaign_status'))
+def check_campaign_status(log_mode=None):
+    """Check and update the status of all campaigns based on current time and budgets.
+
+    log_mode overrides CAMPAIGN_STATUS_LOG for this run: 'full', 'changes' or 'summary'.
+    """
+    log_mode = log_mode or CAMPAIGN_STATUS_LOG
+    current_time = datetime.now(timezone.utc)
+    logger.info("🔍 Checking campaign status at %s", current_time.strftime('%Y-%m-%d %H:%M:%S'))
     
+    sync_brands()
     if not brands:
         logger.info("  No brands configured yet")
         return True
     
-    for brand_name, brand in brands.items():
-        logger.info(f"  Brand: {brand_name}")
-        logger.info(f"  Budget status - Daily: ${brand.current_daily_spend}/{brand.daily_budget}, " +
-                    f"Monthly: ${brand.current_monthly_spend}/{brand.monthly_budget}")
-        
-        campaign_service = CampaignService(brand)
+    if budget_tree is not None:
+        update_tree_brands(budget_tree.roll_over(*current_periods()))
+        pause_exhausted_nodes(budget_tree.sync())
+    
+    total_changed = 0
+    activated = 0
+    paced = 0
+    for brand_name, brand in list(brands.items()):
+        with brand_locks.for_brand(brand_name):
+            campaign_service = CampaignService(brand)
+            changed = campaign_service.update_for_time(current_time)
+            if pacer is not None and not brand.budget_exhausted and pacer.should_pause(brand):
+                # Paused until the next check, which re-evaluates every campaign of the brand
+                paused = [campaign for campaign in brand.campaigns if campaign.is_active]
+                campaign_service.deactivate_campaigns()
+                # Campaigns update_for_time just activated end up where they started
+                activated_now = set(changed)
+                paused_set = set(paused)
+                changed = ([campaign for campaign in changed if campaign not in paused_set] +
+                           [campaign for campaign in paused if campaign not in activated_now])
+                paced += 1
+                logger.warning("⏸️ Pacing %s: budget projected to run out in %.0f min, campaigns paused until "
+                               "the next check", brand_name, pacer.time_to_exhaustion(brand) / 60)
+        total_changed += len(changed)
+        activated += sum(1 for campaign in changed if campaign.is_active)
         
-        # Save previous status to report changes
-        previous_statuses = {c.name: c.is_active for c in brand.campaigns}
+        if log_mode == 'summary' or (log_mode == 'changes' and not changed):
+            continue
         
-        campaign_service.activate_campaigns(current_time)
+        logger.info("  Brand: %s", brand_name)
+        logger.info("  Budget status - Daily: $%s/%s, Monthly: $%s/%s",
+                    brand.current_daily_spend, brand.daily_budget,
+                    brand.current_monthly_spend, brand.monthly_budget)
         
-        # Log campaign statuses with reasons for being inactive
-        for campaign in brand.campaigns:
-            previous_status = previous_statuses[campaign.name]
-            current_status = campaign.is_active
-            
-            status_change = ""
-            if previous_status != current_status:
-                if current_status:
-                    status_change = " (ACTIVATED)"
-                else:
-                    status_change = " (DEACTIVATED)"
-            
-            status_emoji = '✅ ACTIVE' if current_status else '❌ INACTIVE'
+        # Log the campaigns whose status changed (or all of them), with reasons for deactivation
+        changed_set = set(changed)
+        for campaign in changed if log_mode == 'changes' else brand.campaigns:
+            transition = ""
+            if campaign in changed_set:
+                transition = " (ACTIVATED)" if campaign.is_active else " (DEACTIVATED)"
+            if campaign.is_active:
+                logger.info("    - %s: ✅ ACTIVE%s", campaign.name, transition)
+                continue
             
             reason = ""
-            if not current_status:
-                if not campaign.is_within_dayparting(current_time):
-                    reason = f" (outside dayparting hours {campaign.dayparting_hours[0]}:00-{campaign.dayparting_hours[1]}:00)"
-                elif brand.check_daily_budget():
-                    reason = " (daily budget exceeded)"
-                elif brand.check_monthly_budget():
-                    reason = " (monthly budget exceeded)"
-            
-            logger.info(f"    - {campaign.name}: {status_emoji}{status_change}{reason}")
+            if not campaign.is_within_dayparting(current_time):
+                reason = " (outside dayparting hours %s)" % format_dayparting(campaign.dayparting_hours)
+            elif brand.check_daily_budget():
+                reason = " (daily budget exceeded)"
+            elif brand.check_monthly_budget():
+                reason = " (monthly budget exceeded)"
+            elif not campaign.within_budget:
+                reason = " (budget tree limit exceeded)"
+            logger.info("    - %s: ❌ INACTIVE%s%s", campaign.name, transition, reason)
     
+    CAMPAIGNS_ACTIVATED.inc(activated)
+    CAMPAIGNS_DEACTIVATED.inc(total_changed - activated)
+    PACED_BRANDS.inc(paced)
+    logger.info("✅ Campaign status check completed: %d campaigns changed (%d activated, %d deactivated) "
+                "across %d brands", total_changed, activated, total_changed - activated, len(brands))
     return True
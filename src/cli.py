@@ -1,41 +1,96 @@
 import argparse
+import csv
+import io
 import logging
-import coloredlogs
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timezone
 import sys
 import os
 
-# Add the src directory to the path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from src.celery_tasks import (
-    initialize_brand, 
-    update_brand_spend, 
-    reset_daily_budgets,
-    reset_monthly_budgets,
-    check_campaign_status
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# Make `src.*` importable when run as a script (python src/cli.py)
+if not __package__:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logging_config import setup_logging
+from src.money import parse_amount
+from src.routing import rebalance_plan
+
+# Unix socket shared by `cli.py serve` and src/cli_client.py
+DEFAULT_SOCKET = os.environ.get('BUDGET_CLI_SOCKET', '/tmp/budget-manager-cli.sock')
+
 logger = logging.getLogger(__name__)
 
-# Configure colored logs for better readability
-coloredlogs.install(
-    level='INFO',
-    logger=logger,
-    fmt='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 
+def load_tasks():
+    """Import the Celery app and its tasks on first use; --help and shard-plan never need them."""
+    from src import celery_tasks
+    return celery_tasks
 
-def main():
+
+def read_spend_records(stream):
+    """Parse `brand,amount[,timestamp[,event_id[,currency]]]` CSV lines into spend records."""
+    records = []
+    for line, row in enumerate(csv.reader(stream), 1):
+        if not row or row[0].startswith('#'):
+            continue
+        try:
+            brand_name, amount = row[0], parse_amount(row[1])
+        except (IndexError, ValueError) as exc:
+            raise ValueError(f"line {line}: invalid spend record {row!r}: {exc}") from None
+        timestamp = row[2] if len(row) > 2 and row[2] else datetime.now(timezone.utc).isoformat()
+        event_id = row[3] if len(row) > 3 and row[3] else None
+        if len(row) > 4 and row[4]:
+            records.append((brand_name, amount, timestamp, event_id, row[4]))
+        elif event_id is not None:
+            records.append((brand_name, amount, timestamp, event_id))
+        else:
+            records.append((brand_name, amount, timestamp))
+    return records
+
+
+def send_spend_batches(records, batch_size):
+    """Send spend records in batches, split per brand shard when brand sharding is enabled."""
+    tasks = load_tasks()
+    brand_ring = tasks.brand_ring
+    if brand_ring is None:
+        groups = {None: records}
+    else:
+        groups = {}
+        for record in records:
+            groups.setdefault(brand_ring.queue_for(record[0]), []).append(record)
+    
+    for queue, group in groups.items():
+        for start in range(0, len(group), batch_size):
+            chunk = group[start:start + batch_size]
+            if queue is None:
+                tasks.update_brand_spend_batch.delay(chunk)
+            else:
+                tasks.update_brand_spend_batch.apply_async((chunk,), queue=queue)
+
+
+def send_to_all_shards(task_name):
+    """Send a fleet-wide task once, or to every brand shard queue when sharding is enabled."""
+    tasks = load_tasks()
+    task = getattr(tasks, task_name)
+    brand_ring = tasks.brand_ring
+    if brand_ring is None:
+        task.delay()
+    else:
+        for queue in brand_ring.queues:
+            task.apply_async(queue=queue)
+
+
+@contextmanager
+def open_input(path, stdin=None, cwd=None):
+    """Open a command's input file; '-' means stdin (or the stdin text sent by a CLI client)."""
+    if path == '-':
+        yield io.StringIO(stdin) if stdin is not None else sys.stdin
+    else:
+        with open(os.path.join(cwd or os.getcwd(), path)) as stream:
+            yield stream
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Ad Agency Budget Manager CLI')
     subparsers = parser.add_subparsers(dest='command', help='Command to run')
     
@@ -47,11 +102,29 @@ def main():
     init_parser.add_argument('--campaign', action='append', nargs=3, 
                             metavar=('name', 'start_hour', 'end_hour'),
                             help='Add a campaign with name and dayparting hours')
+    init_parser.add_argument('--schedule', action='append', nargs=2, metavar=('name', 'spec'),
+                            help="Add a campaign with a weekly schedule, e.g. 'mon-fri 09:00-17:30; "
+                                 "sat 10:00-14:00 @ America/New_York'")
     
     # Update spend command
     spend_parser = subparsers.add_parser('update-spend', help='Update brand spend')
     spend_parser.add_argument('brand_name', type=str, help='Brand name')
-    spend_parser.add_argument('amount', type=float, help='Amount to add to spending')
+    spend_parser.add_argument('amount', type=parse_amount, help='Amount to add to spending')
+    spend_parser.add_argument('--event-id', type=str, default=None,
+                              help='Unique spend event ID, so a redelivered event is only counted once')
+    spend_parser.add_argument('--campaign', type=str, default=None, dest='campaign_name',
+                              help='Campaign the spend is for, when workers run with a BUDGET_TREE')
+    spend_parser.add_argument('--currency', type=str, default=None,
+                              help='Currency of the amount, converted with the workers\' FX_RATES table')
+    
+    # Batched update spend command
+    batch_parser = subparsers.add_parser('update-spend-batch',
+                                         help='Update brand spend from a CSV file of '
+                                              'brand,amount[,timestamp[,event_id[,currency]]] lines')
+    batch_parser.add_argument('file', type=str, nargs='?', default='-',
+                              help='CSV file to read (default: stdin)')
+    batch_parser.add_argument('--batch-size', type=int, default=1000,
+                              help='Maximum number of records per task')
     
     # Reset budgets commands
     subparsers.add_parser('reset-daily', help='Reset daily budgets for all brands')
@@ -60,49 +133,115 @@ def main():
     # Check status command
     subparsers.add_parser('check-status', help='Check campaign status based on current time and budgets')
     
-    args = parser.parse_args()
+    # Shard rebalancing command
+    plan_parser = subparsers.add_parser('shard-plan',
+                                        help='Show which brands move when the number of brand shards changes')
+    plan_parser.add_argument('old_shards', type=int, help='Current number of brand shards')
+    plan_parser.add_argument('new_shards', type=int, help='New number of brand shards')
+    plan_parser.add_argument('file', type=str, nargs='?', default='-',
+                             help='File with one brand name per line (default: stdin)')
+    plan_parser.add_argument('--evict', action='store_true',
+                             help='Tell the old owners to drop the moved brands from their cache')
+    
+    # Daemon mode
+    serve_parser = subparsers.add_parser('serve',
+                                         help='Run a long-lived daemon that executes commands sent by src/cli_client.py')
+    serve_parser.add_argument('--socket', type=str, default=DEFAULT_SOCKET, help='Unix socket path to listen on')
     
+    return parser
+
+
+def run_command(args, stdin=None, cwd=None):
+    """Execute a parsed command; stdin and cwd are supplied by the daemon for client requests."""
     if args.command == 'init-brand':
         campaign_data = {}
         if args.campaign:
             for campaign_args in args.campaign:
                 name, start_hour, end_hour = campaign_args
                 campaign_data[name] = (int(start_hour), int(end_hour))
+        for name, spec in args.schedule or ():
+            campaign_data[name] = spec
         
         logger.info(f"🚀 Initializing brand: {args.name}")
         logger.info(f"  Monthly budget: ${args.monthly_budget}")
         logger.info(f"  Daily budget: ${args.daily_budget}")
         
         if campaign_data:
-            logger.info(f"  Campaigns:")
+            logger.info("  Campaigns:")
             for name, hours in campaign_data.items():
-                logger.info(f"    - {name}: {hours[0]}:00-{hours[1]}:00")
+                daypart = hours if isinstance(hours, str) else f"{hours[0]}:00-{hours[1]}:00"
+                logger.info(f"    - {name}: {daypart}")
         
-        initialize_brand.delay(args.name, args.monthly_budget, args.daily_budget, campaign_data)
-        logger.info(f"✅ Brand initialization task sent")
+        load_tasks().initialize_brand.delay(args.name, args.monthly_budget, args.daily_budget, campaign_data)
+        logger.info("✅ Brand initialization task sent")
     
     elif args.command == 'update-spend':
         logger.info(f"💰 Updating spend for brand: {args.brand_name}")
         logger.info(f"  Amount: ${args.amount}")
         
-        update_brand_spend.delay(args.brand_name, args.amount)
-        logger.info(f"✅ Update spend task sent")
+        update_brand_spend = load_tasks().update_brand_spend
+        options = {}
+        if args.event_id:
+            options['event_id'] = args.event_id
+        if args.campaign_name:
+            options['campaign_name'] = args.campaign_name
+        if args.currency:
+            options['currency'] = args.currency
+        update_brand_spend.delay(args.brand_name, args.amount, **options)
+        logger.info("✅ Update spend task sent")
+    
+    elif args.command == 'update-spend-batch':
+        with open_input(args.file, stdin, cwd) as stream:
+            records = read_spend_records(stream)
+        logger.info(f"💰 Sending {len(records)} spend records in batches of {args.batch_size}")
+        
+        send_spend_batches(records, args.batch_size)
+        logger.info("✅ Update spend batch tasks sent")
     
     elif args.command == 'reset-daily':
-        logger.info(f"🔄 Initiating daily budget reset")
-        reset_daily_budgets.delay()
-        logger.info(f"✅ Reset daily budgets task sent")
+        logger.info("🔄 Initiating daily budget reset")
+        send_to_all_shards('reset_daily_budgets')
+        logger.info("✅ Reset daily budgets task sent")
     
     elif args.command == 'reset-monthly':
-        logger.info(f"🔄 Initiating monthly budget reset")
-        reset_monthly_budgets.delay()
-        logger.info(f"✅ Reset monthly budgets task sent")
+        logger.info("🔄 Initiating monthly budget reset")
+        send_to_all_shards('reset_monthly_budgets')
+        logger.info("✅ Reset monthly budgets task sent")
     
     elif args.command == 'check-status':
-        logger.info(f"🔍 Initiating campaign status check")
-        check_campaign_status.delay()
-        logger.info(f"✅ Check campaign status task sent")
+        logger.info("🔍 Initiating campaign status check")
+        send_to_all_shards('check_campaign_status')
+        logger.info("✅ Check campaign status task sent")
+    
+    elif args.command == 'shard-plan':
+        with open_input(args.file, stdin, cwd) as stream:
+            brand_names = [line.strip() for line in stream if line.strip()]
+        moves = rebalance_plan(brand_names, args.old_shards, args.new_shards)
+        logger.info(f"🚚 {len(moves)} of {len(brand_names)} brands move going from "
+                    f"{args.old_shards} to {args.new_shards} shards")
+        
+        by_old_queue = {}
+        for brand_name, (old_queue, new_queue) in sorted(moves.items()):
+            logger.info(f"  - {brand_name}: {old_queue} → {new_queue}")
+            by_old_queue.setdefault(old_queue, []).append(brand_name)
+        
+        if args.evict:
+            evict_brands = load_tasks().evict_brands
+            for old_queue, names in by_old_queue.items():
+                evict_brands.apply_async((names,), queue=old_queue)
+            logger.info(f"✅ Eviction tasks sent to {len(by_old_queue)} shards")
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    setup_logging()
     
+    if args.command == 'serve':
+        from src.cli_daemon import serve
+        serve(args.socket)
+    elif args.command:
+        run_command(args)
     else:
         parser.print_help()
 
@@ -0,0 +1,52 @@
+"""Lightweight client for the `cli.py serve` daemon.
+
+Takes the same arguments as cli.py but only imports the standard library,
+so each call costs a socket round trip instead of a Celery start-up:
+
+    python src/cli_client.py update-spend "Brand A" 50
+    python src/cli_client.py ping
+"""
+import json
+import os
+import socket
+import sys
+
+DEFAULT_SOCKET = os.environ.get('BUDGET_CLI_SOCKET', '/tmp/budget-manager-cli.sock')
+
+# Commands that read their input from stdin when no file is given
+STDIN_COMMANDS = ('update-spend-batch', 'shard-plan')
+
+
+def send(argv, socket_path=DEFAULT_SOCKET, stdin=None):
+    """Send one command to the daemon and return its decoded reply."""
+    request = {'argv': argv, 'cwd': os.getcwd(), 'stdin': stdin}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        reply = sock.makefile('rb').readline()
+    return json.loads(reply)
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    socket_path = DEFAULT_SOCKET
+    if argv[:1] == ['--socket']:
+        socket_path, argv = argv[1], argv[2:]
+
+    stdin = None
+    if argv and argv[0] in STDIN_COMMANDS and not sys.stdin.isatty():
+        stdin = sys.stdin.read()
+
+    try:
+        reply = send(argv, socket_path, stdin)
+    except OSError as exc:
+        print(f"cannot reach CLI daemon at {socket_path}: {exc}", file=sys.stderr)
+        return 2
+    if not reply['ok']:
+        print(reply['error'], file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+import socketserver
+
+from src.cli import build_parser, load_tasks, run_command
+
+logger = logging.getLogger(__name__)
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Runs one CLI command per connection.
+
+    Request:  one JSON line {"argv": [...], "cwd": "...", "stdin": "..." or null}
+    Response: one JSON line {"ok": true} or {"ok": false, "error": "..."}
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            argv = request['argv']
+            if argv != ['ping']:
+                args = self.server.parser.parse_args(argv)
+                if args.command in (None, 'serve'):
+                    raise ValueError('a command other than serve is required')
+                run_command(args, stdin=request.get('stdin'), cwd=request.get('cwd'))
+            reply = {'ok': True}
+        except SystemExit:
+            reply = {'ok': False, 'error': f"invalid arguments: {' '.join(argv)}"}
+        except Exception as exc:
+            logger.exception("Command failed")
+            reply = {'ok': False, 'error': str(exc)}
+        self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+
+class CLIDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-lived process that keeps Celery imported between commands.
+
+    Tasks sent from here reuse connections from the Celery app's producer
+    pool, so only the first command pays for connecting to the broker.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.parser = build_parser()
+        super().__init__(socket_path, CommandHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def serve(socket_path):
+    """Serve CLI commands on socket_path until interrupted."""
+    # Import Celery up front so the first command does not pay for it
+    load_tasks()
+    server = CLIDaemon(socket_path)
+    logger.info(f"🛰️ CLI daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
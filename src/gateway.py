@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from functools import partial
+from datetime import datetime, timezone
+
+# Make `src.*` importable when run as a script (python src/gateway.py)
+if not __package__:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logging_config import setup_logging
+from src.money import parse_amount
+
+logger = logging.getLogger(__name__)
+
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 503: 'Service Unavailable'}
+MAX_BODY = 16 * 1024 * 1024
+
+
+def parse_event(event):
+    """Turn a decoded JSON spend event into a (brand, amount, timestamp[, event_id[, currency]]) record."""
+    brand_name = event['brand']
+    if not isinstance(brand_name, str) or not brand_name:
+        raise ValueError(f"brand must be a non-empty string, got {brand_name!r}")
+    amount = parse_amount(event['amount'])
+    timestamp = event.get('timestamp') or datetime.now(timezone.utc).isoformat()
+    if event.get('currency') is not None:
+        return (brand_name, amount, timestamp, event.get('event_id'), event['currency'])
+    if event.get('event_id') is not None:
+        return (brand_name, amount, timestamp, event['event_id'])
+    return (brand_name, amount, timestamp)
+
+
+class LatencyTracker:
+    """Keeps the most recent samples and reports percentiles over them."""
+
+    def __init__(self, size=10000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SpendBuffer:
+    """In-memory buffer of spend records flushed to a sink in micro-batches.
+
+    A batch is flushed as soon as it holds ``max_batch`` records, or when
+    the oldest buffered record is ``flush_interval`` seconds old. The sink
+    is a blocking callable taking a list of records and runs in the default
+    executor so slow brokers never stall request handling.
+
+    At most ``max_inflight`` batches run in the executor at once; records
+    wait in the buffer until one finishes, and the gateway turns requests
+    away while ``max_buffered`` records are waiting. A batch the sink fails
+    on goes back to the front of the buffer and is retried ``retry_delay``
+    seconds later, up to ``max_retries`` times, then dropped and counted.
+    """
+
+    def __init__(self, sink, max_batch=1000, flush_interval=0.05, max_inflight=4, max_buffered=100000,
+                 max_retries=3, retry_delay=0.5):
+        self.sink = sink
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_inflight = max_inflight
+        self.max_buffered = max_buffered
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.records = []
+        self.accepted = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.retried = 0
+        self.dropped = 0
+        self.flush_latency = LatencyTracker()
+        self._first_buffered_at = None
+        self._timer = None
+        self._inflight = set()
+        # Failed attempts so far of records requeued at the front of the buffer
+        self._attempts = []
+
+    @property
+    def full(self):
+        return len(self.records) >= self.max_buffered
+
+    def add(self, records):
+        if not records:
+            return
+        if not self.records:
+            self._first_buffered_at = time.perf_counter()
+        self.records.extend(records)
+        self.accepted += len(records)
+        if len(self.records) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.records or len(self._inflight) >= self.max_inflight:
+            # A finishing batch flushes what is left
+            return
+        if self._attempts:
+            # A retried batch goes out on its own, so it is dropped alone if it keeps failing
+            count, attempts = self._attempts.pop(0)
+        else:
+            count, attempts = len(self.records), 0
+        batch, self.records = self.records[:count], self.records[count:]
+        self.flush_latency.observe(time.perf_counter() - self._first_buffered_at)
+        self._first_buffered_at = time.perf_counter()
+        task = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(None, self.sink, batch))
+        self._inflight.add(task)
+        task.add_done_callback(partial(self._flushed, batch, attempts))
+        self.flushes += 1
+
+    def _flushed(self, batch, attempts, task):
+        self._inflight.discard(task)
+        error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+        if error is None:
+            self.flushed += len(batch)
+        elif attempts >= self.max_retries:
+            self.dropped += len(batch)
+            logger.error(f"❌ Dropped spend batch of {len(batch)} after {attempts + 1} attempts: {error}")
+        else:
+            logger.warning(f"⚠️ Failed to flush spend batch of {len(batch)} (attempt {attempts + 1}), "
+                           f"retrying: {error}")
+            if not self.records:
+                self._first_buffered_at = time.perf_counter()
+            self.records[:0] = batch
+            self._attempts.insert(0, (len(batch), attempts + 1))
+            self.retried += len(batch)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = asyncio.get_running_loop().call_later(self.retry_delay, self.flush)
+            return
+        if self.records and self._timer is None:
+            self.flush()
+
+    async def drain(self):
+        """Flush until every buffered record has reached the sink or been dropped, retries included."""
+        while self.records or self._inflight:
+            self.flush()
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+                # Let the done callbacks requeue failed batches
+                await asyncio.sleep(0)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class IngestionGateway:
+    """Minimal asyncio HTTP/1.1 server accepting spend events.
+
+    POST /spend        one JSON event: {"brand": ..., "amount": ..., "timestamp": ..., "event_id": ...}
+    POST /spend/bulk   newline-delimited JSON events
+    GET  /stats        accepted/flushed counts and p50/p99 request latency
+
+    Events are answered 400 when malformed and 503 while the buffer is full.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.latency = LatencyTracker()
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.buffer.drain()
+
+    def stats(self):
+        return {
+            'accepted': self.buffer.accepted,
+            'flushed': self.buffer.flushed,
+            'flushes': self.buffer.flushes,
+            'retried': self.buffer.retried,
+            'dropped': self.buffer.dropped,
+            'buffered': len(self.buffer.records),
+            'requests': self.latency.count,
+            'latency_p50_ms': self.latency.percentile(0.50) * 1000,
+            'latency_p99_ms': self.latency.percentile(0.99) * 1000,
+            'flush_delay_p50_ms': self.buffer.flush_latency.percentile(0.50) * 1000,
+            'flush_delay_p99_ms': self.buffer.flush_latency.percentile(0.99) * 1000,
+        }
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                method, path, _version = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {'error': 'body too large'})
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = self.dispatch(method, path, body)
+                await self.respond(writer, status, payload)
+                self.latency.observe(time.perf_counter() - started)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, method, path, body):
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, self.stats()
+        if path not in ('/spend', '/spend/bulk'):
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        if self.buffer.full:
+            return 503, {'error': 'spend buffer full, retry later'}
+        try:
+            if path == '/spend':
+                records = [parse_event(json.loads(body))]
+            else:
+                records = [parse_event(json.loads(line)) for line in body.splitlines() if line.strip()]
+        except (ValueError, KeyError, TypeError) as exc:
+            return 400, {'error': f'invalid spend event: {exc}'}
+        self.buffer.add(records)
+        return 202, {'accepted': len(records)}
+
+    async def respond(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write(
+            f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+
+
+def celery_sink(records):
+    """Publish a micro-batch to the workers as update_brand_spend_batch tasks."""
+    from src.cli import send_spend_batches
+    send_spend_batches(records, len(records))
+
+
+def local_sink(records):
+    """Apply a micro-batch to this process's brand state directly."""
+    from src.celery_tasks import update_brand_spend_batch
+    update_brand_spend_batch(records)
+
+
+SINKS = {'celery': celery_sink, 'local': local_sink, 'discard': lambda records: None}
+
+
+async def serve(host, port, sink, max_batch, flush_interval, stats_interval, max_inflight=4, max_buffered=100000):
+    gateway = IngestionGateway(SpendBuffer(sink, max_batch, flush_interval, max_inflight, max_buffered))
+    port = await gateway.start(host, port)
+    logger.info(f"🚪 Spend ingestion gateway listening on http://{host}:{port}")
+    try:
+        while True:
+            await asyncio.sleep(stats_interval)
+            stats = gateway.stats()
+            logger.info(f"📈 {stats['accepted']} events accepted, {stats['flushes']} batches flushed, "
+                        f"latency p50 {stats['latency_p50_ms']:.2f} ms / p99 {stats['latency_p99_ms']:.2f} ms")
+    finally:
+        await gateway.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ad Agency Budget Manager spend ingestion gateway')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--sink', choices=sorted(SINKS), default='celery',
+                        help='Where micro-batches go: Celery workers, this process, or nowhere')
+    parser.add_argument('--max-batch', type=int, default=1000, help='Flush when this many events are buffered')
+    parser.add_argument('--flush-interval', type=float, default=0.05,
+                        help='Flush when the oldest buffered event is this many seconds old')
+    parser.add_argument('--max-inflight', type=int, default=4, help='Batches handed to the sink at once')
+    parser.add_argument('--max-buffered', type=int, default=100000,
+                        help='Answer 503 while this many events wait to be flushed')
+    parser.add_argument('--stats-interval', type=float, default=10, help='Seconds between stats log lines')
+    args = parser.parse_args()
+    setup_logging()
+
+    try:
+        asyncio.run(serve(args.host, args.port, SINKS[args.sink], args.max_batch, args.flush_interval,
+                          args.stats_interval, args.max_inflight, args.max_buffered))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
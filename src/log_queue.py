@@ -0,0 +1,73 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats the message in the logging thread before
+    enqueueing it; records here stay in-process, so the record is passed
+    through as is and the %-style arguments are merged by the listener.
+
+    A forked process inherits the handler but not the listener thread, so
+    the first record logged after a fork starts a fresh queue and listener
+    for that process.
+    """
+
+    def __init__(self, log_queue, targets=()):
+        super().__init__(log_queue)
+        self.targets = targets
+        self.listener = None
+        self._listener_pid = None
+
+    def start(self):
+        """Start a listener writing this process's queue to the target handlers, and return it."""
+        self._listener_pid = os.getpid()
+        self.listener = logging.handlers.QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(_stop, self.listener)
+        return self.listener
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        # Runs under the handler lock, which logging re-creates in a forked child
+        if self._listener_pid is not None and self._listener_pid != os.getpid():
+            # Records the parent had queued are the parent's to write
+            self.queue = queue.SimpleQueue()
+            self.start()
+        self.queue.put_nowait(record)
+
+
+def enqueue_handlers(logger):
+    """Move logger's handlers behind a queue drained by a background QueueListener.
+
+    Returns the started listener; it is stopped (and the queue flushed) at exit.
+    """
+    handlers = logger.handlers[:]
+    handler = DeferredQueueHandler(queue.SimpleQueue(), handlers)
+    for target in handlers:
+        logger.removeHandler(target)
+    logger.addHandler(handler)
+    return handler.start()
+
+
+def stop_listeners(logger):
+    """Write out what logger's queue handlers hold in this process and stop their listeners.
+
+    For processes that end without running atexit hooks, such as Celery's
+    prefork pool children.
+    """
+    for handler in logger.handlers:
+        if isinstance(handler, DeferredQueueHandler) and handler._listener_pid == os.getpid():
+            _stop(handler.listener)
+
+
+def _stop(listener):
+    # QueueListener.stop raises when called twice
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,56 @@
+import logging
+import os
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_configured = False
+
+
+def setup_logging(level='INFO', use_queue=None):
+    """Configure colored console logging for this process; later calls are no-ops.
+
+    Entry points call this from main() rather than at import time, so
+    importing a module never touches logging handlers or loads coloredlogs.
+    With use_queue (default: the LOG_ASYNC environment variable), records are
+    handed to a background thread that formats and writes them.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    import coloredlogs
+    coloredlogs.install(level=level, fmt=LOG_FORMAT, datefmt=DATE_FORMAT)
+
+    if use_queue is None:
+        use_queue = os.environ.get('LOG_ASYNC', '') not in ('', '0')
+    if use_queue:
+        from src.log_queue import enqueue_handlers
+        enqueue_handlers(logging.getLogger())
+
+
+class LogSampler:
+    """Per-key sampling for repetitive log lines: lets through the first of every ``every`` calls.
+
+    Call it before building the log line so skipped lines cost a dict update
+    rather than a LogRecord:
+
+        if sampler(brand_name):
+            logger.info("...", ...)
+    """
+
+    def __init__(self, every=1):
+        self.every = every
+        self.counts = {}
+        self.suppressed = 0
+
+    def __call__(self, key):
+        if self.every <= 1:
+            return True
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        if count % self.every == 0:
+            return True
+        self.suppressed += 1
+        return False
@@ -1,34 +1,23 @@
 import logging
 import argparse
-from datetime import datetime, time
-import coloredlogs
+from datetime import datetime, time, timezone
 import sys
 import os
 
-# Add the src directory to the path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.models.brand import Brand
-from src.models.campaign import Campaign
-from src.services.budget_service import BudgetService
-from src.services.campaign_service import CampaignService
+# Make `src.*` importable when run as a script (python src/main.py)
+if not __package__:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logging_config import setup_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-# Configure colored logs for better readability
-coloredlogs.install(
-    level='INFO',
-    logger=logger,
-    fmt='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
 
 
 def simulate_day(brand, budget_service, campaign_service, spend_amount):
@@ -37,7 +26,7 @@ def simulate_day(brand, budget_service, campaign_service, spend_amount):
     logger.info(f"📊 Initial budget status - Daily limit: ${brand.daily_budget}, Monthly limit: ${brand.monthly_budget}")
     
     # Morning check (9 AM)
-    morning = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    morning = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
     logger.info(f"☀️ Morning check ({morning.strftime('%H:%M')})")
     campaign_service.activate_campaigns(morning)
     
@@ -65,7 +54,7 @@ def simulate_day(brand, budget_service, campaign_service, spend_amount):
         logger.warning(f"⚠️ Monthly budget exceeded for {brand.name}")
     
     # Evening check (6 PM)
-    evening = datetime.now().replace(hour=18, minute=0, second=0, microsecond=0)
+    evening = datetime.now(timezone.utc).replace(hour=18, minute=0, second=0, microsecond=0)
     logger.info(f"🌙 Evening check ({evening.strftime('%H:%M')})")
     campaign_service.activate_campaigns(evening)
     
@@ -89,11 +78,86 @@ def simulate_day(brand, budget_service, campaign_service, spend_amount):
     logger.info(f"🏁 Simulation completed for {brand.name}")
 
 
+def simulate_fleet(args):
+    """Simulate many brands over days of virtual time and log what they would have seen."""
+    from src.simulator import generate_brands, run_parallel, write_report
+    
+    specs = generate_brands(args.brands, args.events_per_day, args.campaigns, args.demand_ratio, args.seed)
+    logger.info(f"🚀 Simulating {args.brands} brands over {args.days} days on {args.workers} worker(s), "
+                f"checking campaigns every {args.check_interval:g} minutes")
+    options = dict(
+        days=args.days,
+        check_interval=int(args.check_interval * 60),
+        check_offset=int(args.check_offset * 60),
+    )
+    pacing = None if args.pacing == 'off' else args.pacing
+    summary, outcomes = run_parallel(specs, args.workers, pacing=pacing, pacing_window=int(args.pacing_window * 60),
+                                     **options)
+    
+    logger.info(f"⚡ Processed {summary['arrivals']} spend opportunities in {summary['wall_seconds']:.1f}s "
+                f"({summary['events_per_sec']:,.0f} events/sec)")
+    logger.info(f"📈 Peak arrival rate: {summary['peak_arrivals_per_sec']:.1f} events/sec "
+                f"({summary['spend_events']} served)")
+    logger.info(f"💸 Overspend: ${summary['overspend']:,.2f} ({summary['overspend_pct']:.2f}% of budget) "
+                f"across {summary['brands_overspent']} brands")
+    logger.info(f"📉 Underdelivery: ${summary['underdelivered']:,.2f} ({summary['underdelivered_pct']:.2f}% of budget)")
+    
+    if pacing:
+        # Same brands and demand without pacing, to show what the pacer saved
+        baseline, _outcomes = run_parallel(specs, args.workers, **options)
+        reduction = 100 * (1 - summary['overspend'] / baseline['overspend']) if baseline['overspend'] else 0.0
+        logger.info(f"🎯 Pacing ({pacing}) cut overspend from ${baseline['overspend']:,.2f} to "
+                    f"${summary['overspend']:,.2f} ({reduction:.1f}% less); underdelivery "
+                    f"{baseline['underdelivered_pct']:.2f}% → {summary['underdelivered_pct']:.2f}% of budget, "
+                    f"{summary['paced_pauses']} paced pauses")
+    
+    worst = sorted(outcomes, key=lambda outcome: outcome.overspend, reverse=True)[:5]
+    for outcome in worst:
+        if outcome.overspend > 0:
+            logger.info(f"  - {outcome.name}: overspent ${outcome.overspend:,.2f} "
+                        f"(daily budget ${outcome.daily_budget}, paused {outcome.pauses} times)")
+    
+    if args.report:
+        write_report(outcomes, args.report)
+        logger.info(f"📝 Per-brand report written to {args.report}")
+    return summary
+
+
 def main():
     parser = argparse.ArgumentParser(description='Ad Agency Budget Manager')
     parser.add_argument('--simulate', action='store_true', help='Run a simulation')
     parser.add_argument('--spend', type=float, default=50.0, help='Simulated spend amount')
+    
+    fleet = parser.add_argument_group('fleet simulation')
+    fleet.add_argument('--fleet', action='store_true',
+                       help='Run the discrete-event simulation of many brands instead of one brand for a day')
+    fleet.add_argument('--brands', type=positive_int, default=1000, help='Number of brands')
+    fleet.add_argument('--days', type=positive_int, default=30, help='Simulated days')
+    fleet.add_argument('--events-per-day', type=float, default=200, help='Average spend opportunities per brand per day')
+    fleet.add_argument('--campaigns', type=int, default=3, help='Campaigns per brand')
+    fleet.add_argument('--check-interval', type=float, default=60, help='Minutes between campaign status checks')
+    fleet.add_argument('--check-offset', type=float, default=0, help='Minutes after midnight of the first check')
+    fleet.add_argument('--demand-ratio', type=float, default=1.3, help='Daily ad demand as a multiple of daily budget')
+    fleet.add_argument('--seed', type=int, default=0, help='Random seed')
+    fleet.add_argument('--pacing', choices=('off', 'pause', 'throttle'), default='off',
+                       help='Pace brands projected to exhaust their budget before the next check, and compare '
+                            'overspend with an unpaced run')
+    fleet.add_argument('--pacing-window', type=float, default=15, help='Minutes of spend the pacing rate averages over')
+    fleet.add_argument('--workers', type=positive_int, default=1,
+                       help='Worker processes to shard brands across (python benchmarks/bench_parallel_sim.py '
+                            'reports the speedup)')
+    fleet.add_argument('--report', type=str, default=None, help='Write a per-brand CSV report here')
     args = parser.parse_args()
+    setup_logging()
+    
+    if args.fleet:
+        simulate_fleet(args)
+        return
+    
+    from src.models.brand import Brand
+    from src.models.campaign import Campaign
+    from src.services.budget_service import BudgetService
+    from src.services.campaign_service import CampaignService
     
     # Example usage
     brand = Brand("Brand A", 1000, 100)
@@ -0,0 +1,271 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from threading import get_ident
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; spans in-process updates (µs) to store round trips and fleet-wide checks (s)
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for metric families: an unlabeled value, or one child per label combination."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._init_value()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *labelvalues):
+        """Return the child for labelvalues; keep it around on hot paths to skip the lookup."""
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.get(labelvalues)
+                if child is None:
+                    child = self._new_child()
+                    self._children[labelvalues] = child
+        return child
+
+    def _new_child(self):
+        child = object.__new__(type(self))
+        child._lock = threading.Lock()
+        child._init_value()
+        return child
+
+    def _init_value(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        """Yield (suffix, labelvalues, extra labels, value) for every sample of this family."""
+        if self.labelnames:
+            for labelvalues, child in list(self._children.items()):
+                for suffix, extra, value in child._child_samples():
+                    yield suffix, labelvalues, extra, value
+        else:
+            for suffix, extra, value in self._child_samples():
+                yield suffix, (), extra, value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labelvalues, extra, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, labelvalues, extra)} '
+                         f'{_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. spend events applied. Name it with a _total suffix.
+
+    Each thread adds to its own cell, so increments from a threaded pool are
+    never lost and need no lock; the cells are summed when read.
+    """
+
+    kind = 'counter'
+
+    def _init_value(self):
+        self._cells = {}
+
+    def inc(self, amount=1):
+        ident = get_ident()
+        self._cells[ident] = self._cells.get(ident, 0) + amount
+
+    @property
+    def value(self):
+        return sum(list(self._cells.values()))
+
+    def _child_samples(self):
+        yield '', (), self.value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down.
+
+    Pass ``function`` to compute the value when metrics are rendered instead
+    of updating it in the hot path. For a labeled gauge the function returns
+    a dict of {labelvalues tuple: value}.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, function=None):
+        self.function = function
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _init_value(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def _child_samples(self):
+        yield '', (), self.value
+
+    def _samples(self):
+        if self.function is None:
+            yield from super()._samples()
+        elif self.labelnames:
+            for labelvalues, value in self.function().items():
+                yield '', labelvalues, (), value
+        else:
+            yield '', (), (), self.function()
+
+
+class Histogram(_Metric):
+    """Counts observations into fixed, cumulative buckets, e.g. task latency in seconds."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        child = object.__new__(Histogram)
+        child._lock = threading.Lock()
+        child.buckets = self.buckets
+        child._init_value()
+        return child
+
+    def _init_value(self):
+        # Per-thread cells, as for Counter: one slot per bucket, one for +Inf and one for the sum
+        self._cells = {}
+
+    def observe(self, value):
+        ident = get_ident()
+        cell = self._cells.get(ident)
+        if cell is None:
+            cell = self._cells[ident] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self):
+        return _Timer(self)
+
+    @property
+    def counts(self):
+        """Observations per bucket (not cumulative), the last one for +Inf."""
+        return [sum(column) for column in zip(*list(self._cells.values()))][:-1] or [0] * (len(self.buckets) + 1)
+
+    @property
+    def sum(self):
+        return sum(cell[-1] for cell in list(self._cells.values()))
+
+    def _child_samples(self):
+        counts = self.counts
+        total = self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            yield '_bucket', (('le', _format_value(float(bound))),), cumulative
+        yield '_sum', (), total
+        yield '_count', (), cumulative
+
+
+class _Timer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+def timed(histogram):
+    """Decorator recording each call's run time in histogram (a Histogram or one of its children)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class Registry:
+    """Collection of metric families rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self.metrics.values()) + '\n'
+
+
+# Process-wide registry used by the tasks
+registry = Registry()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown out the task logs
+        pass
+
+
+def start_http_server(port, host='127.0.0.1', registry=registry):
+    """Serve registry at http://host:port/metrics from a daemon thread; return the server."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,23 +1,87 @@
+from src.models.daypart_index import DaypartIndex
+from src.money import from_micros, to_micros
+
+
 class Brand:
+    """A brand's budgets, spend and campaigns.
+
+    Budgets and spend are kept as integer micros (see src/money.py), so
+    millions of small increments add up exactly and the budget checks are
+    integer comparisons. The currency-unit attributes (daily_budget,
+    current_daily_spend, ...) convert on access.
+    """
+
+    __slots__ = ('name', 'monthly_budget_micros', 'daily_budget_micros', 'monthly_spend_micros',
+                 'daily_spend_micros', 'budget_exhausted', 'campaigns', 'daypart_index', 'daily_period',
+                 'monthly_period')
+
     def __init__(self, name, monthly_budget, daily_budget):
         self.name = name
-        self.monthly_budget = monthly_budget
-        self.daily_budget = daily_budget
-        self.current_monthly_spend = 0
-        self.current_daily_spend = 0
+        self.monthly_budget_micros = to_micros(monthly_budget)
+        self.daily_budget_micros = to_micros(daily_budget)
+        self.monthly_spend_micros = 0
+        self.daily_spend_micros = 0
+        self.budget_exhausted = False
         self.campaigns = []
+        self.daypart_index = DaypartIndex()
+        # Day and month the spend counters belong to (see services/periods.py); None until first used
+        self.daily_period = None
+        self.monthly_period = None
+
+    @property
+    def monthly_budget(self):
+        return from_micros(self.monthly_budget_micros)
+
+    @monthly_budget.setter
+    def monthly_budget(self, value):
+        self.monthly_budget_micros = to_micros(value)
+
+    @property
+    def daily_budget(self):
+        return from_micros(self.daily_budget_micros)
+
+    @daily_budget.setter
+    def daily_budget(self, value):
+        self.daily_budget_micros = to_micros(value)
+
+    @property
+    def current_monthly_spend(self):
+        return from_micros(self.monthly_spend_micros)
+
+    @current_monthly_spend.setter
+    def current_monthly_spend(self, value):
+        self.monthly_spend_micros = to_micros(value)
+
+    @property
+    def current_daily_spend(self):
+        return from_micros(self.daily_spend_micros)
+
+    @current_daily_spend.setter
+    def current_daily_spend(self, value):
+        self.daily_spend_micros = to_micros(value)
 
     def add_campaign(self, campaign):
         self.campaigns.append(campaign)
+        self.daypart_index.add(campaign)
 
     def check_monthly_budget(self):
-        return self.current_monthly_spend >= self.monthly_budget
+        return self.monthly_spend_micros >= self.monthly_budget_micros
 
     def check_daily_budget(self):
-        return self.current_daily_spend >= self.daily_budget
+        return self.daily_spend_micros >= self.daily_budget_micros
+
+    @property
+    def daily_headroom(self):
+        return from_micros(self.daily_budget_micros - self.daily_spend_micros)
+
+    @property
+    def monthly_headroom(self):
+        return from_micros(self.monthly_budget_micros - self.monthly_spend_micros)
 
     def reset_daily_budget(self):
-        self.current_daily_spend = 0
+        self.daily_spend_micros = 0
+        self.budget_exhausted = self.check_monthly_budget()
 
     def reset_monthly_budget(self):
-        self.current_monthly_spend = 0
\ No newline at end of file
+        self.monthly_spend_micros = 0
+        self.budget_exhausted = self.check_daily_budget()
@@ -0,0 +1,310 @@
+import json
+import math
+import threading
+
+from src.money import to_micros
+
+
+def _micros(budget):
+    return None if budget is None else to_micros(budget)
+
+
+def _headroom(budget_micros, spend_micros):
+    return math.inf if budget_micros is None else budget_micros - spend_micros
+
+
+class BudgetNode:
+    """One level of the budget tree: the agency, a brand, a campaign group or a campaign.
+
+    Amounts are integer micros. ``daily_headroom`` and ``monthly_headroom``
+    are kept up to date as spend posts through the node (a missing budget is
+    unlimited, with infinite headroom), so threshold checks are a comparison
+    rather than a sum over children. ``blocked`` counts the exhausted nodes
+    on the path from the root down to this one; campaigns under a node are
+    only eligible while it is 0.
+    """
+
+    __slots__ = ('name', 'parent', 'children', 'daily_budget_micros', 'monthly_budget_micros', 'daily_spend_micros',
+                 'monthly_spend_micros', 'daily_headroom', 'monthly_headroom', 'exhausted', 'blocked', 'campaigns',
+                 'brand', 'key')
+
+    def __init__(self, name, parent=None, daily_budget_micros=None, monthly_budget_micros=None):
+        self.name = name
+        self.parent = parent
+        self.children = {}
+        self.daily_budget_micros = daily_budget_micros
+        self.monthly_budget_micros = monthly_budget_micros
+        self.daily_spend_micros = 0
+        self.monthly_spend_micros = 0
+        self.daily_headroom = _headroom(daily_budget_micros, 0)
+        self.monthly_headroom = _headroom(monthly_budget_micros, 0)
+        self.exhausted = False
+        self.blocked = 0
+        # Campaign objects whose budget this node is, and the Brand they belong to
+        self.campaigns = []
+        self.brand = None
+        # The node's counters in a shared store: its path, which names alone cannot collide on
+        self.key = json.dumps(list(self.path))
+
+    @property
+    def path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    @property
+    def enabled(self):
+        return self.blocked == 0
+
+    @property
+    def over_budget(self):
+        return self.daily_headroom <= 0 or self.monthly_headroom <= 0
+
+    def walk(self):
+        """Yield this node and all its descendants."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+
+class BudgetTree:
+    """Hierarchical budgets: agency -> brand -> campaign groups -> campaign.
+
+    Spend posts at a leaf (a campaign, or the brand node for spend that is
+    not attributed to a campaign) and rolls up through its ancestors, so an
+    event costs O(depth). When a node crosses its budget only its subtree is
+    disabled: its campaigns are ineligible (``Campaign.within_budget``)
+    until the next day or month resets it. The tree never changes campaign
+    statuses itself; callers bring the brands it reports up to date, each
+    under its own brand lock. Brand budgets themselves stay on Brand and
+    BudgetService; the brand level of the tree only rolls spend up.
+
+    Budgets are given in currency units and kept, like spend, as integer
+    micros. With a store (see src/stores), node counters are kept there and
+    every worker posting through a node sees the same totals, so agency and
+    group budgets hold across workers and shards; a node exhausted by other
+    workers' spend is noticed at this worker's next post through it or at
+    the next sync. Without one, counters live in this process.
+    """
+
+    def __init__(self, daily_budget=None, monthly_budget=None, name='agency', store=None):
+        self.root = BudgetNode(name, None, _micros(daily_budget), _micros(monthly_budget))
+        self.store = store
+        # Campaign nodes (those below brand level with no children) by full path
+        self.leaves = {}
+        # Full path of each campaign's leaf by (brand, campaign name), rebuilt after nodes are added
+        self._campaign_paths = None
+        self.day = None
+        self.month = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, store=None):
+        """Build a tree from nested dicts of daily_budget, monthly_budget and children.
+
+        The top level is the agency and its children are brands; nodes under
+        a brand with no children are campaigns, matched to the brand's
+        campaigns by name, and anything in between is a campaign group.
+        Raises ValueError if a brand has two campaign leaves of one name.
+        """
+        tree = cls(config.get('daily_budget'), config.get('monthly_budget'), store=store)
+        stack = [((), config)]
+        while stack:
+            path, node_config = stack.pop()
+            for name, child in node_config.get('children', {}).items():
+                tree.add(path + (name,), child.get('daily_budget'), child.get('monthly_budget'))
+                stack.append((path + (name,), child))
+        tree._campaign_index()
+        return tree
+
+    @classmethod
+    def load(cls, path, store=None):
+        with open(path) as f:
+            return cls.from_config(json.load(f), store)
+
+    def node(self, path):
+        """Return the node at path (a tuple of names below the agency), or None."""
+        node = self.root
+        for name in path:
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    def add(self, path, daily_budget=None, monthly_budget=None):
+        """Add the node at path, creating unlimited parents as needed, and return it."""
+        with self._lock:
+            node = self.root
+            for depth, name in enumerate(path):
+                child = node.children.get(name)
+                if child is None:
+                    if depth >= 2 and not node.children:
+                        del self.leaves[path[:depth]]
+                    child = node.children[name] = BudgetNode(name, node)
+                    child.blocked = node.blocked
+                    if depth >= 1:
+                        self.leaves[path[:depth + 1]] = child
+                    self._campaign_paths = None
+                node = child
+            node.daily_budget_micros = _micros(daily_budget)
+            node.monthly_budget_micros = _micros(monthly_budget)
+            node.daily_headroom = _headroom(node.daily_budget_micros, node.daily_spend_micros)
+            node.monthly_headroom = _headroom(node.monthly_budget_micros, node.monthly_spend_micros)
+            return node
+
+    def attach(self, brand):
+        """Point each of brand's campaigns at its leaf (or the brand node) and return the brand node.
+
+        Call again whenever the Brand object is rebuilt.
+        """
+        campaign_paths = self._campaign_index()
+        with self._lock:
+            brand_node = self.root.children.get(brand.name)
+            if brand_node is None:
+                brand_node = self.root.children[brand.name] = BudgetNode(brand.name, self.root)
+                brand_node.blocked = self.root.blocked
+            for node in brand_node.walk():
+                node.brand = brand
+                node.campaigns = []
+            for campaign in brand.campaigns:
+                path = campaign_paths.get((brand.name, campaign.name))
+                leaf = self.leaves[path] if path is not None else brand_node
+                leaf.campaigns.append(campaign)
+                campaign.budget = leaf
+                if not leaf.enabled:
+                    campaign.deactivate()
+            return brand_node
+
+    def leaf_for(self, brand_name, campaign_name=None):
+        """The node spend for a campaign posts to: its leaf, or the brand node if it has none."""
+        path = self._campaign_index().get((brand_name, campaign_name))
+        return self.leaves[path] if path is not None else self.root.children.get(brand_name)
+
+    def _campaign_index(self):
+        campaign_paths = self._campaign_paths
+        if campaign_paths is None:
+            with self._lock:
+                campaign_paths = {}
+                for path in self.leaves:
+                    if (path[0], path[-1]) in campaign_paths:
+                        raise ValueError(f"campaign {path[-1]!r} appears twice under brand {path[0]!r}")
+                    campaign_paths[path[0], path[-1]] = path
+                self._campaign_paths = campaign_paths
+        return campaign_paths
+
+    def post(self, node, micros):
+        """Add micros to node and every ancestor; return the nodes that went over budget.
+
+        The campaigns of brands_under(crossed) are now ineligible; the
+        caller brings their statuses up to date.
+        """
+        nodes = []
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        if self.store is None:
+            with self._lock:
+                return self._update(nodes, [(node.daily_spend_micros + micros, node.monthly_spend_micros + micros)
+                                            for node in nodes])
+        periods = (self.day, self.month)
+        totals = self.store.add_node_spend([node.key for node in nodes], micros, *periods)
+        with self._lock:
+            if (self.day, self.month) != periods:
+                # Counted in a day or month that has ended since
+                return []
+            return self._update(nodes, totals)
+
+    def sync(self):
+        """Load the node counters of the current period from the store; return the nodes that went over budget.
+
+        Catches nodes exhausted by other workers' spend that this worker
+        has not posted through since.
+        """
+        if self.store is None:
+            return []
+        periods = (self.day, self.month)
+        nodes = list(self.root.walk())
+        spend = self.store.get_node_spend([node.key for node in nodes], *periods)
+        nodes = [node for node in nodes if node.key in spend]
+        with self._lock:
+            if (self.day, self.month) != periods:
+                return []
+            return self._update(nodes, [spend[node.key] for node in nodes])
+
+    def _update(self, nodes, totals):
+        """Set the counters of nodes to their (daily, monthly) totals; hold the lock and return the crossed nodes."""
+        crossed = []
+        for node, (daily, monthly) in zip(nodes, totals):
+            # Store totals from concurrent posts can arrive out of order; counters only grow within a period
+            node.daily_spend_micros = max(node.daily_spend_micros, daily)
+            node.monthly_spend_micros = max(node.monthly_spend_micros, monthly)
+            node.daily_headroom = _headroom(node.daily_budget_micros, node.daily_spend_micros)
+            node.monthly_headroom = _headroom(node.monthly_budget_micros, node.monthly_spend_micros)
+            if not node.exhausted and node.over_budget:
+                node.exhausted = True
+                self._block(node, 1)
+                crossed.append(node)
+        return crossed
+
+    def headroom(self, node):
+        """Micros left for spend posted at node: the smallest headroom on its path to the root."""
+        headroom = math.inf
+        while node is not None:
+            headroom = min(headroom, node.daily_headroom, node.monthly_headroom)
+            node = node.parent
+        return headroom
+
+    def roll_over(self, day, month):
+        """Zero the counters of an earlier day or month, like BudgetService.roll_over.
+
+        Returns the brands with campaigns that became eligible again, whose
+        statuses the caller should bring up to date.
+        """
+        with self._lock:
+            if self.day == day and self.month == month:
+                return []
+            new_day = self.day is not None and self.day < day
+            new_month = self.month is not None and self.month < month
+            self.day = max(day, self.day or day)
+            self.month = max(month, self.month or month)
+            if not new_day and not new_month:
+                return []
+            released = []
+            for node in self.root.walk():
+                if new_day:
+                    node.daily_spend_micros = 0
+                    node.daily_headroom = _headroom(node.daily_budget_micros, 0)
+                if new_month:
+                    node.monthly_spend_micros = 0
+                    node.monthly_headroom = _headroom(node.monthly_budget_micros, 0)
+                if node.exhausted and not node.over_budget:
+                    node.exhausted = False
+                    released.append(node)
+            brands = {}
+            for node in released:
+                for brand in self._block(node, -1):
+                    brands[brand.name] = brand
+            return list(brands.values())
+
+    def brands_under(self, nodes):
+        """The brands with campaigns under any of nodes, e.g. the nodes post() reports crossed."""
+        brands = {}
+        for node in nodes:
+            for descendant in node.walk():
+                if descendant.campaigns:
+                    brands[id(descendant.brand)] = descendant.brand
+        return list(brands.values())
+
+    def _block(self, node, delta):
+        """Add delta to the blocked count of node's subtree; return the brands with campaigns it made eligible."""
+        brands = {}
+        for descendant in node.walk():
+            descendant.blocked += delta
+            if descendant.campaigns and descendant.blocked == 0:
+                brands[id(descendant.brand)] = descendant.brand
+        return list(brands.values())
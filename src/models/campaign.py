@@ -1,8 +1,42 @@
+from datetime import timedelta
+
+from src.models.schedule import compile_dayparting
+
+
+def hours_mask(start_hour, end_hour):
+    """Return a 24-bit mask with bit h set for every hour h in [start_hour, end_hour).
+
+    An end before the start runs overnight: (22, 6) covers 22:00 to 06:00.
+    """
+    for hour in (start_hour, end_hour):
+        if not isinstance(hour, int) or isinstance(hour, bool):
+            raise ValueError(f"Dayparting hours must be whole hours, got ({start_hour!r}, {end_hour!r}); "
+                             f"use a schedule such as '09:30-17:00' for minutes")
+    if end_hour < start_hour:
+        return hours_mask(start_hour, 24) | hours_mask(0, end_hour)
+    mask = 0
+    for hour in range(max(start_hour, 0), min(end_hour, 24)):
+        mask |= 1 << hour
+    return mask
+
+
 class Campaign:
+    """A campaign with dayparting as a (start_hour, end_hour) tuple or a Schedule (or its text form).
+
+    Hour tuples keep the 24-bit activation_mask fast path; campaigns with a
+    Schedule have activation_mask 0 and are looked up in their schedule.
+    ``budget`` is the campaign's BudgetNode when a BudgetTree is in use.
+    """
+
+    __slots__ = ('name', 'is_active', 'dayparting_hours', 'activation_mask', 'schedule', 'budget')
+
     def __init__(self, name, dayparting_hours):
         self.name = name
         self.is_active = False
         self.dayparting_hours = dayparting_hours
+        self.schedule = compile_dayparting(dayparting_hours)
+        self.activation_mask = hours_mask(*dayparting_hours) if self.schedule is None else 0
+        self.budget = None
 
     def activate(self):
         self.is_active = True
@@ -10,6 +44,24 @@ class Campaign:
     def deactivate(self):
         self.is_active = False
 
+    @property
+    def within_budget(self):
+        """False while a node of the campaign's budget tree path is over budget."""
+        return self.budget is None or self.budget.blocked == 0
+
     def is_within_dayparting(self, current_time):
-        start_hour, end_hour = self.dayparting_hours
-        return start_hour <= current_time.hour < end_hour
\ No newline at end of file
+        if self.schedule is not None:
+            return self.schedule.is_active(current_time)
+        return (self.activation_mask >> current_time.hour) & 1 == 1
+
+    def next_transition(self, current_time):
+        """Return when the campaign next enters or leaves its dayparting window, or None if it never does."""
+        if self.schedule is not None:
+            return self.schedule.next_transition(current_time)
+        mask = self.activation_mask
+        hour = current_time.hour
+        for step in range(1, 25):
+            boundary = (hour + step) % 24
+            if (mask >> boundary) & 1 != (mask >> ((boundary - 1) % 24)) & 1:
+                return current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=step)
+        return None
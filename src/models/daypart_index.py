@@ -0,0 +1,36 @@
+class DaypartIndex:
+    """Hour-bucketed index of a brand's campaigns by dayparting eligibility.
+
+    For every hour of the day it keeps the campaigns that become eligible
+    (opening) or stop being eligible (closing) at that hour boundary, so an
+    hourly check only has to touch those instead of every campaign.
+    """
+
+    def __init__(self):
+        self.opening = [[] for _ in range(24)]
+        self.closing = [[] for _ in range(24)]
+        # Campaigns with a Schedule can change at any minute, so every check evaluates them
+        self.scheduled = []
+        # (hour, budget_available) the campaign statuses were last brought in line with
+        self.applied = None
+
+    def add(self, campaign):
+        if campaign.schedule is not None:
+            self.scheduled.append(campaign)
+            self.applied = None
+            return
+        mask = campaign.activation_mask
+        for hour in range(24):
+            now = (mask >> hour) & 1
+            before = (mask >> ((hour - 1) % 24)) & 1
+            if now and not before:
+                self.opening[hour].append(campaign)
+            elif before and not now:
+                self.closing[hour].append(campaign)
+        self.applied = None
+
+    def changes_at(self, hour):
+        return self.opening[hour], self.closing[hour]
+
+    def invalidate(self):
+        self.applied = None
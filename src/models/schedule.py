@@ -0,0 +1,188 @@
+import bisect
+from datetime import timedelta
+from functools import lru_cache
+
+SLOTS_PER_DAY = 24 * 60
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+
+DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def parse_days(text):
+    """Parse 'mon-fri', 'sat,sun' or 'fri-mon' into a tuple of weekdays (Monday is 0)."""
+    days = []
+    for part in text.lower().split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = (DAY_NAMES.index(name.strip()[:3]) for name in part.split('-'))
+            days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+        else:
+            days.append(DAY_NAMES.index(part[:3]))
+    return tuple(days)
+
+
+def parse_minute(value):
+    """Minutes after midnight of an hour (9), or an 'HH:MM' string ('09:30', '24:00')."""
+    if isinstance(value, str):
+        hours, _, minutes = value.strip().partition(':')
+        value = int(hours) * 60 + int(minutes or 0)
+    else:
+        value = int(value * 60)
+    if not 0 <= value <= SLOTS_PER_DAY:
+        raise ValueError(f"Time of day out of range: {value // 60}:{value % 60:02d}")
+    return value
+
+
+class Schedule:
+    """Weekly dayparting schedule compiled into one bit per minute of the week.
+
+    ``windows`` is a list of (start, end) or (days, start, end), with start
+    and end as hours or 'HH:MM' strings and days as in parse_days (default:
+    every day). A window whose end is before its start runs overnight into
+    the next day. With ``timezone`` (a pytz zone name) lookups convert the
+    time to the brand's zone first; naive datetimes are taken as UTC, so
+    callers pass aware UTC times (``datetime.now(timezone.utc)``), never
+    the local ``datetime.now()``.
+
+    The compiled form is a fixed 1260-byte bitset, so is_active() is O(1),
+    and next_transition() bisects a sorted list of the slots where the
+    schedule switches on or off. A compiled Schedule is never modified, so
+    campaigns with the same spec share one (see compile_dayparting).
+    """
+
+    __slots__ = ('windows', 'timezone', 'bits', 'transitions', '_tz')
+
+    def __init__(self, windows, timezone=None):
+        self.windows = tuple(tuple(window) for window in windows)
+        self.timezone = timezone
+        self._tz = None
+        if timezone is not None:
+            import pytz
+            self._tz = pytz.timezone(timezone)
+
+        bits = bytearray(SLOTS_PER_WEEK // 8)
+        for window in self.windows:
+            days, start, end = window if len(window) == 3 else (None, *window)
+            if days is None:
+                days = range(7)
+            elif isinstance(days, str):
+                days = parse_days(days)
+            start, end = parse_minute(start), parse_minute(end)
+            length = end - start if end >= start else SLOTS_PER_DAY - start + end
+            for day in days:
+                first = day * SLOTS_PER_DAY + start
+                for slot in range(first, first + length):
+                    slot %= SLOTS_PER_WEEK
+                    bits[slot >> 3] |= 1 << (slot & 7)
+        self.bits = bytes(bits)
+
+        self.transitions = [slot for slot in range(SLOTS_PER_WEEK)
+                            if self._bit(slot) != self._bit(slot - 1)]
+
+    @classmethod
+    def parse(cls, text):
+        """Build a Schedule from text such as 'mon-fri 09:00-17:30; sat 10:00-14:00; 22:00-06:00 @ Europe/Paris'."""
+        spec, _, timezone = text.partition('@')
+        windows = []
+        for part in spec.split(';'):
+            part = part.strip()
+            if not part:
+                continue
+            days, _, hours = part.rpartition(' ')
+            start, end = hours.split('-')
+            windows.append((days.strip() or None, start, end))
+        return cls(windows, timezone.strip() or None)
+
+    def __str__(self):
+        parts = []
+        for window in self.windows:
+            days, start, end = window if len(window) == 3 else (None, *window)
+            if days is not None and not isinstance(days, str):
+                days = ','.join(DAY_NAMES[day] for day in days)
+            start, end = parse_minute(start), parse_minute(end)
+            hours = f'{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}'
+            parts.append(f'{days} {hours}' if days else hours)
+        text = '; '.join(parts)
+        return f'{text} @ {self.timezone}' if self.timezone else text
+
+    def __repr__(self):
+        return f'Schedule.parse({str(self)!r})'
+
+    def __eq__(self, other):
+        return isinstance(other, Schedule) and self.bits == other.bits and self.timezone == other.timezone
+
+    def __hash__(self):
+        return hash((self.bits, self.timezone))
+
+    def _bit(self, slot):
+        slot %= SLOTS_PER_WEEK
+        return (self.bits[slot >> 3] >> (slot & 7)) & 1
+
+    def _local(self, when):
+        if self._tz is None:
+            return when
+        if when.tzinfo is None:
+            import pytz
+            when = pytz.utc.localize(when)
+        return when.astimezone(self._tz)
+
+    def slot(self, when):
+        local = self._local(when)
+        return local.weekday() * SLOTS_PER_DAY + local.hour * 60 + local.minute
+
+    def is_active(self, when):
+        slot = self.slot(when)
+        return (self.bits[slot >> 3] >> (slot & 7)) & 1 == 1
+
+    def next_transition(self, when):
+        """Return the first time after when at which the schedule switches on or off, or None if it never does.
+
+        The result has when's tzinfo (naive in, naive out).
+        """
+        if not self.transitions:
+            return None
+        local = self._local(when)
+        slot = local.weekday() * SLOTS_PER_DAY + local.hour * 60 + local.minute
+        index = bisect.bisect_right(self.transitions, slot)
+        if index < len(self.transitions):
+            minutes = self.transitions[index] - slot
+        else:
+            minutes = self.transitions[0] + SLOTS_PER_WEEK - slot
+        wall = local.replace(second=0, microsecond=0, tzinfo=None) + timedelta(minutes=minutes)
+        if self._tz is None:
+            return wall.replace(tzinfo=when.tzinfo)
+        # Step in local wall-clock time, so DST changes move the transition with the clocks
+        result = self._tz.normalize(self._tz.localize(wall, is_dst=False))
+        if when.tzinfo is None:
+            import pytz
+            return result.astimezone(pytz.utc).replace(tzinfo=None)
+        return result.astimezone(when.tzinfo)
+
+
+def compile_dayparting(dayparting):
+    """Return the Schedule for a dayparting spec, or None for the original (start_hour, end_hour) tuple."""
+    if isinstance(dayparting, Schedule):
+        return dayparting
+    if isinstance(dayparting, str):
+        spec, _, timezone = dayparting.partition('@')
+        return _compiled_schedule(spec.strip(), timezone.strip() or None)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _compiled_schedule(spec, timezone):
+    # Brands tend to share a handful of specs; each compiles to a 10080-slot bitset
+    return Schedule.parse(f'{spec} @ {timezone}' if timezone else spec)
+
+
+def dayparting_to_json(dayparting):
+    """Dayparting in the form stores keep: [start, end] for hour tuples, spec text for schedules."""
+    if isinstance(dayparting, (Schedule, str)):
+        return str(dayparting)
+    return list(dayparting)
+
+
+def format_dayparting(dayparting):
+    if isinstance(dayparting, (Schedule, str)):
+        return str(dayparting)
+    return "%s:00-%s:00" % tuple(dayparting)
@@ -0,0 +1,299 @@
+from array import array
+
+from src.models.campaign import hours_mask
+from src.models.daypart_index import DaypartIndex
+from src.money import from_micros, to_micros
+
+# Period column value of a brand that has not rolled over yet (Brand uses None)
+NO_PERIOD = -1
+
+
+class CampaignTable:
+    """Columnar storage for campaigns: one typed array per attribute, one row per campaign."""
+
+    def __init__(self):
+        self.names = []
+        self.brand_ids = array('i')
+        self.start_hours = array('b')
+        self.end_hours = array('b')
+        self.masks = array('i')
+        self.is_active = array('b')
+
+    def __len__(self):
+        return len(self.names)
+
+    def append(self, brand_id, name, dayparting_hours):
+        start_hour, end_hour = dayparting_hours
+        self.names.append(name)
+        self.brand_ids.append(brand_id)
+        self.start_hours.append(start_hour)
+        self.end_hours.append(end_hour)
+        self.masks.append(hours_mask(start_hour, end_hour))
+        self.is_active.append(0)
+        return len(self.names) - 1
+
+    def view(self, row):
+        return CampaignView(self, row)
+
+
+class CampaignView:
+    """Campaign-compatible view of one CampaignTable row."""
+
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __eq__(self, other):
+        return isinstance(other, CampaignView) and self.table is other.table and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    def __repr__(self):
+        return f"CampaignView({self.name!r}, row={self.row})"
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    @property
+    def is_active(self):
+        return self.table.is_active[self.row] == 1
+
+    @property
+    def dayparting_hours(self):
+        return (self.table.start_hours[self.row], self.table.end_hours[self.row])
+
+    @property
+    def activation_mask(self):
+        return self.table.masks[self.row]
+
+    @property
+    def schedule(self):
+        # Tables hold hour-tuple dayparting only
+        return None
+
+    @property
+    def within_budget(self):
+        # Nor are table campaigns part of a budget tree
+        return True
+
+    def activate(self):
+        self.table.is_active[self.row] = 1
+
+    def deactivate(self):
+        self.table.is_active[self.row] = 0
+
+    def is_within_dayparting(self, current_time):
+        return (self.table.masks[self.row] >> current_time.hour) & 1 == 1
+
+
+class BrandTable:
+    """Columnar storage for brands and their campaigns.
+
+    Brands are addressed by integer id; BrandView exposes one row with the
+    same interface as Brand so BudgetService and CampaignService run on it
+    unchanged. Budget and spend columns hold integer micros, like Brand, and
+    the period columns hold NO_PERIOD until a brand's first roll-over.
+    """
+
+    def __init__(self, campaigns=None):
+        self.campaigns = campaigns if campaigns is not None else CampaignTable()
+        self.names = []
+        self.ids = {}
+        self.monthly_budgets = array('q')
+        self.daily_budgets = array('q')
+        self.monthly_spend = array('q')
+        self.daily_spend = array('q')
+        self.exhausted = array('b')
+        self.daily_periods = array('i')
+        self.monthly_periods = array('i')
+        self.campaign_rows = []
+        self.daypart_indexes = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return (BrandView(self, brand_id) for brand_id in range(len(self.names)))
+
+    def add_brand(self, name, monthly_budget, daily_budget):
+        brand_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = brand_id
+        self.monthly_budgets.append(to_micros(monthly_budget))
+        self.daily_budgets.append(to_micros(daily_budget))
+        self.monthly_spend.append(0)
+        self.daily_spend.append(0)
+        self.exhausted.append(0)
+        self.daily_periods.append(NO_PERIOD)
+        self.monthly_periods.append(NO_PERIOD)
+        self.campaign_rows.append(array('i'))
+        return BrandView(self, brand_id)
+
+    def add_campaign(self, brand_id, name, dayparting_hours):
+        row = self.campaigns.append(brand_id, name, dayparting_hours)
+        self.campaign_rows[brand_id].append(row)
+        index = self.daypart_indexes.get(brand_id)
+        if index is not None:
+            index.add(CampaignView(self.campaigns, row))
+        return CampaignView(self.campaigns, row)
+
+    def brand(self, name):
+        return BrandView(self, self.ids[name])
+
+
+class BrandView:
+    """Brand-compatible view of one BrandTable row."""
+
+    __slots__ = ('table', 'brand_id')
+
+    def __init__(self, table, brand_id):
+        self.table = table
+        self.brand_id = brand_id
+
+    def __eq__(self, other):
+        return isinstance(other, BrandView) and self.table is other.table and self.brand_id == other.brand_id
+
+    def __hash__(self):
+        return hash((id(self.table), self.brand_id))
+
+    def __repr__(self):
+        return f"BrandView({self.name!r}, brand_id={self.brand_id})"
+
+    @property
+    def name(self):
+        return self.table.names[self.brand_id]
+
+    @property
+    def monthly_budget_micros(self):
+        return self.table.monthly_budgets[self.brand_id]
+
+    @monthly_budget_micros.setter
+    def monthly_budget_micros(self, value):
+        self.table.monthly_budgets[self.brand_id] = value
+
+    @property
+    def daily_budget_micros(self):
+        return self.table.daily_budgets[self.brand_id]
+
+    @daily_budget_micros.setter
+    def daily_budget_micros(self, value):
+        self.table.daily_budgets[self.brand_id] = value
+
+    @property
+    def monthly_spend_micros(self):
+        return self.table.monthly_spend[self.brand_id]
+
+    @monthly_spend_micros.setter
+    def monthly_spend_micros(self, value):
+        self.table.monthly_spend[self.brand_id] = value
+
+    @property
+    def daily_spend_micros(self):
+        return self.table.daily_spend[self.brand_id]
+
+    @daily_spend_micros.setter
+    def daily_spend_micros(self, value):
+        self.table.daily_spend[self.brand_id] = value
+
+    @property
+    def monthly_budget(self):
+        return from_micros(self.monthly_budget_micros)
+
+    @monthly_budget.setter
+    def monthly_budget(self, value):
+        self.monthly_budget_micros = to_micros(value)
+
+    @property
+    def daily_budget(self):
+        return from_micros(self.daily_budget_micros)
+
+    @daily_budget.setter
+    def daily_budget(self, value):
+        self.daily_budget_micros = to_micros(value)
+
+    @property
+    def current_monthly_spend(self):
+        return from_micros(self.monthly_spend_micros)
+
+    @current_monthly_spend.setter
+    def current_monthly_spend(self, value):
+        self.monthly_spend_micros = to_micros(value)
+
+    @property
+    def current_daily_spend(self):
+        return from_micros(self.daily_spend_micros)
+
+    @current_daily_spend.setter
+    def current_daily_spend(self, value):
+        self.daily_spend_micros = to_micros(value)
+
+    @property
+    def budget_exhausted(self):
+        return self.table.exhausted[self.brand_id] == 1
+
+    @budget_exhausted.setter
+    def budget_exhausted(self, value):
+        self.table.exhausted[self.brand_id] = 1 if value else 0
+
+    @property
+    def daily_period(self):
+        period = self.table.daily_periods[self.brand_id]
+        return None if period == NO_PERIOD else period
+
+    @daily_period.setter
+    def daily_period(self, value):
+        self.table.daily_periods[self.brand_id] = NO_PERIOD if value is None else value
+
+    @property
+    def monthly_period(self):
+        period = self.table.monthly_periods[self.brand_id]
+        return None if period == NO_PERIOD else period
+
+    @monthly_period.setter
+    def monthly_period(self, value):
+        self.table.monthly_periods[self.brand_id] = NO_PERIOD if value is None else value
+
+    @property
+    def campaigns(self):
+        table = self.table.campaigns
+        return [CampaignView(table, row) for row in self.table.campaign_rows[self.brand_id]]
+
+    @property
+    def daypart_index(self):
+        # Built on first use so brands that are never checked hourly cost no per-campaign objects
+        index = self.table.daypart_indexes.get(self.brand_id)
+        if index is None:
+            index = DaypartIndex()
+            for campaign in self.campaigns:
+                index.add(campaign)
+            self.table.daypart_indexes[self.brand_id] = index
+        return index
+
+    def add_campaign(self, campaign):
+        return self.table.add_campaign(self.brand_id, campaign.name, campaign.dayparting_hours)
+
+    def check_monthly_budget(self):
+        return self.monthly_spend_micros >= self.monthly_budget_micros
+
+    def check_daily_budget(self):
+        return self.daily_spend_micros >= self.daily_budget_micros
+
+    @property
+    def daily_headroom(self):
+        return from_micros(self.daily_budget_micros - self.daily_spend_micros)
+
+    @property
+    def monthly_headroom(self):
+        return from_micros(self.monthly_budget_micros - self.monthly_spend_micros)
+
+    def reset_daily_budget(self):
+        self.daily_spend_micros = 0
+        self.budget_exhausted = self.check_monthly_budget()
+
+    def reset_monthly_budget(self):
+        self.monthly_spend_micros = 0
+        self.budget_exhausted = self.check_daily_budget()
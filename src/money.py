@@ -0,0 +1,89 @@
+import bisect
+import json
+import math
+from datetime import date
+from decimal import Decimal, ROUND_HALF_EVEN
+
+# Spend counters and budgets are integer micros: millionths of the budget currency
+MICROS = 1_000_000
+
+# FX rates are integer parts per RATE_SCALE, so conversions are integer arithmetic
+RATE_SCALE = 1_000_000_000
+
+_EPOCH = date(1970, 1, 1)
+
+
+def to_micros(amount):
+    """Integer micros for an amount given as an int, float, numeric string or Decimal.
+
+    Floats are rounded to the nearest micro, which absorbs their binary
+    representation error (0.1 becomes exactly 100000); strings and Decimals
+    are converted exactly.
+    """
+    if isinstance(amount, int):
+        return amount * MICROS
+    if isinstance(amount, float):
+        return round(amount * MICROS)
+    return int((Decimal(amount) * MICROS).to_integral_value(ROUND_HALF_EVEN))
+
+
+def parse_amount(value):
+    """A spend amount from an event or CSV field as a float; rejects NaN, infinity and negatives."""
+    amount = float(value)
+    if not math.isfinite(amount) or amount < 0:
+        raise ValueError(f"spend amount must be a finite, non-negative number, got {value!r}")
+    return amount
+
+
+def from_micros(micros):
+    """The amount in currency units, as a float for display and reporting."""
+    return micros / MICROS
+
+
+class FxTable:
+    """Exchange rates into the budget currency, loaded once and resolved per day period.
+
+    ``rates`` maps an effective date ('YYYY-MM-DD') to {currency: rate},
+    the value of one unit of currency in the budget currency; a currency's
+    rate on a day is the latest one dated on or before it. Each day's table is
+    looked up once and cached, so converting spend is a dict lookup plus
+    integer arithmetic, with no floats or Decimals in the hot path.
+    """
+
+    def __init__(self, rates, base='USD'):
+        self.base = base
+        dated = sorted(((date.fromisoformat(effective) - _EPOCH).days, table) for effective, table in rates.items())
+        self._days = [day for day, _table in dated]
+        self._tables = []
+        in_force = {}
+        for _day, table in dated:
+            in_force = dict(in_force)
+            for currency, rate in table.items():
+                in_force[currency] = int((Decimal(str(rate)) * RATE_SCALE).to_integral_value(ROUND_HALF_EVEN))
+            self._tables.append(in_force)
+        self._by_day = {}
+
+    @classmethod
+    def load(cls, path):
+        """Read {"base": "USD", "rates": {"2024-01-01": {"EUR": "1.0842", ...}, ...}} from a JSON file."""
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config['rates'], config.get('base', 'USD'))
+
+    def rates_for(self, day):
+        """The rate table in force on day, a day period from current_periods()."""
+        rates = self._by_day.get(day)
+        if rates is None:
+            index = bisect.bisect_right(self._days, day) - 1
+            rates = self._by_day[day] = dict(self._tables[index]) if index >= 0 else {}
+            rates[self.base] = RATE_SCALE
+        return rates
+
+    def to_base(self, micros, currency, day):
+        """Convert micros of currency into micros of the budget currency, rounding half up."""
+        if currency is None or currency == self.base:
+            return micros
+        rate = self.rates_for(day).get(currency)
+        if rate is None:
+            raise ValueError(f"No {currency} exchange rate for day {day}")
+        return (micros * rate + RATE_SCALE // 2) // RATE_SCALE
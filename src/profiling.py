@@ -0,0 +1,148 @@
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from threading import get_ident
+
+
+def collapse_stack(frame):
+    """Render a frame and its callers as one collapsed-stack line: root;...;leaf."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class TaskProfiler:
+    """Profiles a random ``fraction`` of task executions.
+
+    In 'stack' mode a single background thread samples the wall-clock stack
+    of every thread running a profiled task each ``interval`` seconds; the
+    samples are written per task as collapsed stacks
+    (``<task>.<pid>.collapsed``), the input format of flamegraph.pl and
+    speedscope. In 'cprofile' mode each profiled execution runs under
+    cProfile and the results are merged into ``<task>.<pid>.prof``.
+
+    Files are rewritten every ``flush_every`` profiled executions and at exit.
+    """
+
+    def __init__(self, fraction, directory, mode='stack', interval=0.001, flush_every=100):
+        if mode not in ('stack', 'cprofile'):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.fraction = fraction
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self.flush_every = flush_every
+        self.profiled = 0
+        self.stacks = {}
+        self.profiles = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._sampler_pid = None
+        self._stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self, task_name):
+        """Begin profiling this execution if it is sampled; pass the result to stop()."""
+        if random.random() >= self.fraction:
+            return None
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+            profile.enable()
+            return task_name, profile
+        # Forked pool processes do not inherit the parent's sampler thread
+        if self._sampler_pid != os.getpid():
+            self._sampler_pid = os.getpid()
+            threading.Thread(target=self._sample_periodically, daemon=True).start()
+        self._active[get_ident()] = task_name
+        return task_name, None
+
+    def stop(self, token):
+        if token is None:
+            return
+        task_name, profile = token
+        if profile is not None:
+            profile.disable()
+            with self._lock:
+                stats = self.profiles.get(task_name)
+                if stats is None:
+                    self.profiles[task_name] = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+        else:
+            self._active.pop(get_ident(), None)
+        self.profiled += 1
+        if self.profiled % self.flush_every == 0:
+            self.flush()
+
+    def _sample_periodically(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Record the current stack of every thread running a profiled task."""
+        frames = sys._current_frames()
+        for ident, task_name in list(self._active.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = collapse_stack(frame)
+            with self._lock:
+                self.stacks.setdefault(task_name, Counter())[stack] += 1
+
+    def flush(self):
+        """Write the samples collected so far, replacing this process's previous files."""
+        pid = os.getpid()
+        with self._lock:
+            for task_name, stacks in self.stacks.items():
+                path = os.path.join(self.directory, f'{task_name}.{pid}.collapsed')
+                with open(path + '.tmp', 'w') as f:
+                    for stack, count in stacks.most_common():
+                        f.write(f'{stack} {count}\n')
+                os.replace(path + '.tmp', path)
+            for task_name, stats in self.profiles.items():
+                stats.dump_stats(os.path.join(self.directory, f'{task_name}.{pid}.prof'))
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+
+
+class StageTimer:
+    """Records the time between successive mark() calls as stages of one task execution.
+
+        stages = StageTimer(histogram, 'update_brand_spend')
+        ...                      # look up the brand
+        stages.mark('lookup')
+    """
+
+    __slots__ = ('histogram', 'task', 'last')
+
+    def __init__(self, histogram, task):
+        self.histogram = histogram
+        self.task = task
+        self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.histogram.labels(self.task, stage).observe(now - self.last)
+        self.last = now
+
+
+class NullStageTimer:
+    """StageTimer stand-in used when profiling is off."""
+
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+
+NULL_STAGE_TIMER = NullStageTimer()
@@ -0,0 +1,65 @@
+import bisect
+import hashlib
+
+# Tasks whose first argument is a brand name and that are routed to that brand's shard.
+# Matched on the bare function name, since the module prefix depends on how the
+# worker was started (celery_tasks.* or src.celery_tasks.*).
+BRAND_TASKS = ('initialize_brand', 'update_brand_spend')
+
+
+def shard_queue(index):
+    return f'brand-shard-{index}'
+
+
+def _hash(key):
+    # md5 rather than hash() so every process and node agrees on placement
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring mapping brand names to shard queues.
+
+    Each shard owns ``replicas`` points on the ring; growing from N to N+1
+    shards moves only about 1/(N+1) of the brands.
+    """
+
+    def __init__(self, shard_count, replicas=128):
+        self.shard_count = shard_count
+        self.queues = [shard_queue(i) for i in range(shard_count)]
+        points = []
+        for queue in self.queues:
+            for replica in range(replicas):
+                points.append((_hash(f'{queue}#{replica}'), queue))
+        points.sort()
+        self._points = [point for point, _queue in points]
+        self._owners = [queue for _point, queue in points]
+
+    def queue_for(self, brand_name):
+        i = bisect.bisect(self._points, _hash(brand_name)) % len(self._points)
+        return self._owners[i]
+
+
+class BrandRouter:
+    """Celery router sending brand tasks to the queue of the shard that owns the brand."""
+
+    def __init__(self, ring):
+        self.ring = ring
+
+    def __call__(self, name, args, kwargs, options, task=None, **kw):
+        if name.rsplit('.', 1)[-1] not in BRAND_TASKS:
+            return None
+        brand_name = args[0] if args else kwargs.get('brand_name', kwargs.get('name'))
+        return {'queue': self.ring.queue_for(brand_name)}
+
+
+def rebalance_plan(brand_names, old_shard_count, new_shard_count):
+    """Return {brand: (old_queue, new_queue)} for the brands that change owner."""
+    old_ring = HashRing(old_shard_count)
+    new_ring = HashRing(new_shard_count)
+    moves = {}
+    for brand_name in brand_names:
+        old_queue = old_ring.queue_for(brand_name)
+        new_queue = new_ring.queue_for(brand_name)
+        if old_queue != new_queue:
+            moves[brand_name] = (old_queue, new_queue)
+    return moves
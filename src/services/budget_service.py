@@ -1,17 +1,114 @@
+from src.money import to_micros
+from src.services.events import BudgetEvent, budget_events
+
+
 class BudgetService:
-    def __init__(self, brand):
+    """Applies spend to a brand and pauses its campaigns when a budget runs out.
+
+    Campaigns are deactivated, and a BudgetEvent published, only on the
+    transition from under to over budget; further spend on an exhausted
+    brand is a constant-time counter update. Amounts are in currency units,
+    except for update_spend_micros, which takes integer micros.
+    """
+
+    def __init__(self, brand, store=None, events=None):
         self.brand = brand
+        self.store = store
+        self.events = events if events is not None else budget_events
 
     def update_daily_spend(self, amount):
-        self.brand.current_daily_spend += amount
-        if self.brand.check_daily_budget():
-            self.deactivate_campaigns()
+        self.brand.daily_spend_micros += to_micros(amount)
+        if not self.brand.budget_exhausted and self.brand.check_daily_budget():
+            self._exhaust('daily')
 
     def update_monthly_spend(self, amount):
-        self.brand.current_monthly_spend += amount
-        if self.brand.check_monthly_budget():
-            self.deactivate_campaigns()
+        self.brand.monthly_spend_micros += to_micros(amount)
+        if not self.brand.budget_exhausted and self.brand.check_monthly_budget():
+            self._exhaust('monthly')
+
+    def update_spend(self, amount, periods=None):
+        """Add amount to both daily and monthly spend, through the state store when one is set.
+
+        With periods, a (day, month) pair from current_periods(), counters
+        left over from an earlier day or month are reset first.
+        """
+        self.update_spend_micros(to_micros(amount), periods)
+
+    def update_spend_micros(self, micros, periods=None):
+        if periods is not None:
+            self.roll_over(*periods)
+        brand = self.brand
+        if self.store is None:
+            brand.daily_spend_micros += micros
+            brand.monthly_spend_micros += micros
+        elif periods is None:
+            brand.daily_spend_micros, brand.monthly_spend_micros = self.store.add_spend(brand.name, micros)
+        else:
+            brand.daily_spend_micros, brand.monthly_spend_micros = self.store.add_spend(brand.name, micros, *periods)
+        if not self.brand.budget_exhausted:
+            if self.brand.check_daily_budget():
+                self._exhaust('daily')
+            elif self.brand.check_monthly_budget():
+                self._exhaust('monthly')
+
+    def roll_over(self, day, month):
+        """Start a new day or month if the brand's counters belong to an earlier one.
+
+        Brands reset lazily, on first use in a new period, instead of in a
+        sweep over every brand at midnight. Returns True if a counter was reset.
+        """
+        brand = self.brand
+        if brand.daily_period == day and brand.monthly_period == month:
+            return False
+        reset = False
+        if brand.monthly_period is not None and brand.monthly_period < month:
+            brand.monthly_spend_micros = 0
+            reset = True
+        if brand.daily_period is not None and brand.daily_period < day:
+            brand.daily_spend_micros = 0
+            reset = True
+        brand.daily_period = max(day, brand.daily_period or day)
+        brand.monthly_period = max(month, brand.monthly_period or month)
+        if reset:
+            was_exhausted = brand.budget_exhausted
+            brand.budget_exhausted = brand.check_daily_budget() or brand.check_monthly_budget()
+            if was_exhausted and not brand.budget_exhausted:
+                self.events.publish(BudgetEvent(brand.name, False, 'reset'))
+        return reset
+
+    def reset_daily(self):
+        self._reset(self.brand.reset_daily_budget)
+
+    def reset_monthly(self):
+        self._reset(self.brand.reset_monthly_budget)
+
+    def _reset(self, reset_budget):
+        was_exhausted = self.brand.budget_exhausted
+        reset_budget()
+        if was_exhausted and not self.brand.budget_exhausted:
+            self.events.publish(BudgetEvent(self.brand.name, False, 'reset'))
+
+    def refresh(self, reason='sync'):
+        """Re-evaluate the exhausted state after spend was changed outside this service."""
+        if self.brand.check_daily_budget():
+            exhausted_by = 'daily'
+        elif self.brand.check_monthly_budget():
+            exhausted_by = 'monthly'
+        else:
+            exhausted_by = None
+
+        if exhausted_by and not self.brand.budget_exhausted:
+            self._exhaust(exhausted_by)
+        elif not exhausted_by and self.brand.budget_exhausted:
+            self.brand.budget_exhausted = False
+            self.events.publish(BudgetEvent(self.brand.name, False, reason))
+
+    def _exhaust(self, reason):
+        self.brand.budget_exhausted = True
+        self.deactivate_campaigns()
+        self.events.publish(BudgetEvent(self.brand.name, True, reason))
 
     def deactivate_campaigns(self):
         for campaign in self.brand.campaigns:
-            campaign.deactivate()
\ No newline at end of file
+            campaign.deactivate()
+        self.brand.daypart_index.invalidate()
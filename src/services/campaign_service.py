@@ -3,12 +3,60 @@ class CampaignService:
         self.brand = brand
 
     def activate_campaigns(self, current_time):
+        bit = 1 << current_time.hour
+        budget_available = not self.brand.check_daily_budget() and not self.brand.check_monthly_budget()
         for campaign in self.brand.campaigns:
-            if campaign.is_within_dayparting(current_time) and not self.brand.check_daily_budget() and not self.brand.check_monthly_budget():
+            if campaign.schedule is not None:
+                within = campaign.schedule.is_active(current_time)
+            else:
+                within = campaign.activation_mask & bit
+            if budget_available and within and campaign.within_budget:
                 campaign.activate()
             else:
                 campaign.deactivate()
+        self.brand.daypart_index.applied = (current_time.hour, budget_available)
+
+    def update_for_time(self, current_time):
+        """Bring campaign statuses in line with current_time and return the campaigns that changed.
+
+        When the previous check left every campaign consistent with the hour
+        before and the budget state is unchanged, only the campaigns whose
+        dayparting window opens or closes at this hour are touched, plus any
+        campaigns with a Schedule, which can change at any minute.
+        """
+        hour = current_time.hour
+        budget_available = not self.brand.check_daily_budget() and not self.brand.check_monthly_budget()
+        index = self.brand.daypart_index
+
+        if index.applied == (hour, budget_available):
+            if not index.scheduled:
+                return []
+            candidates = index.scheduled
+        elif index.applied == ((hour - 1) % 24, budget_available):
+            opening, closing = index.changes_at(hour)
+            candidates = opening + closing + index.scheduled
+        else:
+            candidates = self.brand.campaigns
+
+        bit = 1 << hour
+        changed = []
+        for campaign in candidates:
+            if campaign.schedule is not None:
+                should_be_active = budget_available and campaign.schedule.is_active(current_time)
+            else:
+                should_be_active = budget_available and campaign.activation_mask & bit != 0
+            if should_be_active and not campaign.within_budget:
+                should_be_active = False
+            if campaign.is_active != should_be_active:
+                if should_be_active:
+                    campaign.activate()
+                else:
+                    campaign.deactivate()
+                changed.append(campaign)
+        index.applied = (hour, budget_available)
+        return changed
 
     def deactivate_campaigns(self):
         for campaign in self.brand.campaigns:
-            campaign.deactivate()
\ No newline at end of file
+            campaign.deactivate()
+        self.brand.daypart_index.invalidate()
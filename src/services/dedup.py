@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+
+
+class DedupWindow:
+    """Memory-bounded set of recently seen event IDs.
+
+    IDs are kept in two generations of plain sets. The current generation
+    is rotated out every ``window`` seconds, or early once it holds half of
+    ``max_entries``, so an ID is remembered for at least ``window`` seconds
+    unless the memory bound forces it out sooner. Lookups are exact and O(1).
+    """
+
+    def __init__(self, window=3600, max_entries=1000000, clock=time.monotonic):
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._current = set()
+        self._previous = set()
+        self._rotated_at = clock()
+        self.checked = 0
+        self.duplicates = 0
+        self.rotations = 0
+
+    def seen(self, event_id):
+        """Record event_id and return True if it was already seen inside the window.
+
+        Call forget(event_id) if the event then fails to apply, so a retry
+        is not taken for a duplicate.
+        """
+        with self._lock:
+            self.checked += 1
+            if event_id in self._current or event_id in self._previous:
+                self.duplicates += 1
+                return True
+            if self.clock() - self._rotated_at >= self.window or len(self._current) >= self.max_entries // 2:
+                self._rotate()
+            self._current.add(event_id)
+            return False
+
+    def forget(self, event_id):
+        with self._lock:
+            self._current.discard(event_id)
+            self._previous.discard(event_id)
+
+    def _rotate(self):
+        self._previous = self._current
+        self._current = set()
+        self._rotated_at = self.clock()
+        self.rotations += 1
+
+    def clear(self):
+        with self._lock:
+            self._current = set()
+            self._previous = set()
+            self._rotated_at = self.clock()
+            self.checked = self.duplicates = self.rotations = 0
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def stats(self):
+        with self._lock:
+            size_bytes = sys.getsizeof(self._current) + sys.getsizeof(self._previous)
+            size_bytes += sum(sys.getsizeof(event_id) for event_id in self._current)
+            size_bytes += sum(sys.getsizeof(event_id) for event_id in self._previous)
+            return {
+                'checked': self.checked,
+                'duplicates': self.duplicates,
+                'hit_rate': self.duplicates / self.checked if self.checked else 0.0,
+                'entries': len(self._current) + len(self._previous),
+                'rotations': self.rotations,
+                'memory_bytes': size_bytes,
+            }
+
+
+class StoreDedup:
+    """Event IDs claimed in a shared state store, with the interface of DedupWindow.
+
+    A per-process window misses redeliveries that land on another worker
+    process, e.g. after a worker is lost or a visibility timeout expires.
+    Claims go through the store's atomic claim_event (Redis SET NX EX, or a
+    SQLite row) and expire after ``window`` seconds.
+    """
+
+    def __init__(self, store, window=3600):
+        self.store = store
+        self.window = window
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.duplicates = 0
+
+    def seen(self, event_id):
+        """Claim event_id and return True if another delivery already claimed it inside the window."""
+        duplicate = not self.store.claim_event(event_id, self.window)
+        with self._lock:
+            self.checked += 1
+            if duplicate:
+                self.duplicates += 1
+        return duplicate
+
+    def forget(self, event_id):
+        self.store.release_event(event_id)
+
+    def clear(self):
+        with self._lock:
+            self.checked = self.duplicates = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'duplicates': self.duplicates,
+                'hit_rate': self.duplicates / self.checked if self.checked else 0.0,
+                'shared': True,
+            }
@@ -0,0 +1,25 @@
+from collections import namedtuple
+
+# Emitted when a brand moves between "budget available" and "budget exhausted".
+# reason is 'daily' or 'monthly' when exhausted, 'reset' or 'sync' when restored.
+BudgetEvent = namedtuple('BudgetEvent', ['brand_name', 'exhausted', 'reason'])
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def publish(self, event):
+        for callback in list(self._subscribers):
+            callback(event)
+
+
+# Process-wide bus used by BudgetService unless another one is passed in
+budget_events = EventBus()
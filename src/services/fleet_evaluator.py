@@ -0,0 +1,42 @@
+import numpy as np
+
+
+class FleetEvaluator:
+    """Evaluates campaign activation for a whole BrandTable in one vectorized pass.
+
+    The typed-array columns of the table are viewed through NumPy without
+    copying, so the result matches running CampaignService.activate_campaigns
+    on every brand, but without a Python-level loop per campaign.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def compute(self, current_time):
+        """Return (changed_rows, new_is_active) without modifying the table."""
+        table = self.table
+        campaigns = table.campaigns
+        daily_ok = np.frombuffer(table.daily_spend, dtype=np.int64) < np.frombuffer(table.daily_budgets, dtype=np.int64)
+        monthly_ok = np.frombuffer(table.monthly_spend, dtype=np.int64) < np.frombuffer(table.monthly_budgets, dtype=np.int64)
+        budget_ok = daily_ok & monthly_ok
+
+        brand_ids = np.frombuffer(campaigns.brand_ids, dtype=np.int32)
+        masks = np.frombuffer(campaigns.masks, dtype=np.int32)
+        is_active = np.frombuffer(campaigns.is_active, dtype=np.int8)
+
+        in_window = (masks >> current_time.hour) & 1
+        new_active = (budget_ok[brand_ids] & (in_window == 1)).astype(np.int8)
+        changed = np.flatnonzero(new_active != is_active)
+        return changed, new_active
+
+    def evaluate(self, current_time):
+        """Apply activation for current_time to every campaign and return the indices of changed rows."""
+        changed, new_active = self.compute(current_time)
+        if len(changed):
+            is_active = np.frombuffer(self.table.campaigns.is_active, dtype=np.int8)
+            is_active[changed] = new_active[changed]
+            # Release the buffer export so the table's arrays can grow again
+            del is_active
+        for index in self.table.daypart_indexes.values():
+            index.invalidate()
+        return changed
@@ -0,0 +1,31 @@
+import threading
+from contextlib import contextmanager
+
+
+class LockStripes:
+    """Fixed pool of re-entrant locks shared out to brands by name hash.
+
+    Updates to one brand always take the same lock and are serialized,
+    while updates to brands on different stripes run in parallel. Memory
+    stays constant however many brands exist.
+    """
+
+    def __init__(self, stripes=64):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def for_brand(self, brand_name):
+        return self._locks[hash(brand_name) % len(self._locks)]
+
+    @contextmanager
+    def all(self):
+        """Hold every stripe, e.g. while resetting all brands at once."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
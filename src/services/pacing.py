@@ -0,0 +1,76 @@
+import math
+import time
+
+
+class SpendRate:
+    """Exponentially weighted spend rate, in currency per second, over roughly ``window`` seconds.
+
+    Each observation decays the estimate by the time since the previous one
+    and adds ``amount / window``, so an update is O(1) and no event history
+    is kept. For a steady stream the estimate converges to the true rate.
+    """
+
+    __slots__ = ('window', 'rate', 'updated')
+
+    def __init__(self, window=900.0):
+        self.window = window
+        self.rate = 0.0
+        self.updated = None
+
+    def observe(self, amount, now):
+        if self.updated is None:
+            self.updated = now
+        elif now > self.updated:
+            self.rate *= math.exp((self.updated - now) / self.window)
+            self.updated = now
+        self.rate += amount / self.window
+
+    def rate_at(self, now):
+        if self.updated is None or now <= self.updated:
+            return self.rate
+        return self.rate * math.exp((self.updated - now) / self.window)
+
+
+class Pacer:
+    """Projects each brand's spend forward and paces brands that would cross a budget before the next check.
+
+    Call observe() for every spend event and should_pause() or throttle()
+    at each check, with ``horizon`` the seconds until the next one. Budget
+    checks alone only react once spend has reached the limit, so spend
+    in flight until the next check overshoots it.
+    """
+
+    def __init__(self, window=900.0, horizon=3600.0, clock=time.time):
+        self.window = window
+        self.horizon = horizon
+        self.clock = clock
+        self.rates = {}
+
+    def observe(self, brand_name, amount, now=None):
+        rate = self.rates.get(brand_name)
+        if rate is None:
+            rate = self.rates[brand_name] = SpendRate(self.window)
+        rate.observe(amount, self.clock() if now is None else now)
+
+    def rate(self, brand_name, now=None):
+        rate = self.rates.get(brand_name)
+        if rate is None:
+            return 0.0
+        return rate.rate_at(self.clock() if now is None else now)
+
+    def time_to_exhaustion(self, brand, now=None):
+        """Seconds until the brand's daily or monthly budget runs out at its current spend rate."""
+        headroom = min(brand.daily_headroom, brand.monthly_headroom)
+        if headroom <= 0:
+            return 0.0
+        rate = self.rate(brand.name, now)
+        return headroom / rate if rate > 0 else math.inf
+
+    def should_pause(self, brand, now=None, horizon=None):
+        """True when the brand is projected to exhaust its budget before the next check."""
+        return self.time_to_exhaustion(brand, now) < (self.horizon if horizon is None else horizon)
+
+    def throttle(self, brand, now=None, horizon=None):
+        """Fraction of demand to serve so the budget lasts until the next check, from 0 to 1."""
+        horizon = self.horizon if horizon is None else horizon
+        return min(1.0, self.time_to_exhaustion(brand, now) / horizon)
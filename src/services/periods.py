@@ -0,0 +1,29 @@
+import time
+from datetime import datetime, timezone
+
+# Month epoch of each day epoch seen so far; a process sees one new day per day
+_months = {}
+
+
+def current_periods(timestamp=None):
+    """Return the (day, month) budget periods containing timestamp (default: now).
+
+    Periods are UTC, like the beat schedule: the day is the number of days
+    since 1970-01-01 and the month is year * 12 + month - 1, so a later
+    period always compares greater.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    day = int(timestamp // 86400)
+    month = _months.get(day)
+    if month is None:
+        date = datetime.fromtimestamp(day * 86400, timezone.utc)
+        month = _months[day] = date.year * 12 + date.month - 1
+    return day, month
+
+
+def next_day_start(timestamp=None):
+    """Timestamp of the next UTC midnight after timestamp (default: now), when a new day period begins."""
+    if timestamp is None:
+        timestamp = time.time()
+    return (int(timestamp // 86400) + 1) * 86400
@@ -0,0 +1,106 @@
+import heapq
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import partial
+
+
+class TransitionScheduler:
+    """Min-heap of the next time each tracked campaign can change status.
+
+    Instead of re-checking every campaign of every brand each hour, the
+    scheduler keeps one entry per campaign for its next dayparting
+    transition, plus one per exhausted brand for the start of its next
+    budget period. run_due() pops only the entries that are due, so the
+    work done is proportional to transitions rather than to fleet size.
+
+    Entries hold the brand object they were created for; when a brand is
+    replaced or dropped, its stale entries are discarded as they come due
+    (``is_current(brand)`` decides).
+    """
+
+    def __init__(self, refresh=None, is_current=None, lock_for=None, clock=partial(datetime.now, timezone.utc)):
+        # refresh(brand, now) runs when an exhausted brand's budget period ends
+        self.refresh = refresh
+        self.is_current = is_current
+        self.lock_for = lock_for
+        self.clock = clock
+        self.heap = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self.processed = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _push(self, at, brand, campaign):
+        with self._lock:
+            self._sequence += 1
+            earliest = not self.heap or at < self.heap[0][0]
+            heapq.heappush(self.heap, (at, self._sequence, brand, campaign))
+        if earliest:
+            self._changed.set()
+
+    def track(self, brand, now=None):
+        """Schedule the next dayparting transition of every campaign of brand."""
+        now = self.clock() if now is None else now
+        for campaign in brand.campaigns:
+            self.track_campaign(brand, campaign, now)
+
+    def track_campaign(self, brand, campaign, now):
+        at = campaign.next_transition(now)
+        if at is not None:
+            self._push(at, brand, campaign)
+
+    def schedule_refresh(self, brand, at):
+        """Call refresh(brand, now) at ``at``, e.g. when an exhausted brand's budget resets."""
+        self._push(at, brand, None)
+
+    def next_due(self):
+        with self._lock:
+            return self.heap[0][0] if self.heap else None
+
+    def run_due(self, now=None):
+        """Apply every transition due by now; return the campaigns whose status changed."""
+        now = self.clock() if now is None else now
+        changed = []
+        while True:
+            with self._lock:
+                if not self.heap or self.heap[0][0] > now:
+                    break
+                _at, _sequence, brand, campaign = heapq.heappop(self.heap)
+            if self.is_current is not None and not self.is_current(brand):
+                continue
+            self.processed += 1
+            with self.lock_for(brand.name) if self.lock_for is not None else nullcontext():
+                if campaign is None:
+                    if self.refresh is not None:
+                        self.refresh(brand, now)
+                    continue
+                should_be_active = (not brand.budget_exhausted and campaign.within_budget
+                                    and campaign.is_within_dayparting(now))
+                if campaign.is_active != should_be_active:
+                    if should_be_active:
+                        campaign.activate()
+                    else:
+                        campaign.deactivate()
+                    # Campaign statuses moved on without update_for_time
+                    brand.daypart_index.invalidate()
+                    changed.append(campaign)
+            self.track_campaign(brand, campaign, now)
+        return changed
+
+    def run_forever(self, stop=None, on_changed=None, max_sleep=60.0):
+        """Sleep until the next transition is due (or an earlier one is added) and apply it, until stop is set."""
+        stop = stop if stop is not None else threading.Event()
+        while not stop.is_set():
+            due = self.next_due()
+            timeout = max_sleep
+            if due is not None:
+                timeout = min(max_sleep, max(0.0, (due - self.clock()).total_seconds()))
+            self._changed.wait(timeout)
+            self._changed.clear()
+            changed = self.run_due()
+            if changed and on_changed is not None:
+                on_changed(changed)
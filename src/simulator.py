@@ -0,0 +1,342 @@
+import csv
+import heapq
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from src.models.brand import Brand
+from src.models.campaign import Campaign
+from src.services.budget_service import BudgetService
+from src.services.campaign_service import CampaignService
+from src.services.events import EventBus
+from src.services.pacing import Pacer
+
+# Relative ad demand per hour of day: quiet overnight, peaking in the evening
+DIURNAL = (0.25, 0.15, 0.1, 0.1, 0.1, 0.15, 0.3, 0.55, 0.8, 0.95, 1.0, 1.05,
+           1.1, 1.05, 1.0, 1.0, 1.05, 1.15, 1.3, 1.45, 1.5, 1.3, 0.9, 0.5)
+
+# Event kinds, in the order they run when scheduled for the same instant
+MONTHLY_RESET = 0
+DAILY_RESET = 1
+CHECK = 2
+SPEND = 3
+
+DAY = 86400
+
+
+class BrandOutcome:
+    """What one brand saw over the simulation."""
+
+    __slots__ = ('name', 'daily_budget', 'monthly_budget', 'spend', 'overspend', 'underdelivered', 'events',
+                 'pauses', 'paced')
+
+    def __init__(self, name, daily_budget, monthly_budget):
+        self.name = name
+        self.daily_budget = daily_budget
+        self.monthly_budget = monthly_budget
+        self.spend = 0.0
+        self.overspend = 0.0
+        self.underdelivered = 0.0
+        self.events = 0
+        self.pauses = 0
+        self.paced = 0
+
+
+def generate_brands(brand_count, events_per_day=200, campaigns_per_brand=3, demand_ratio=1.3, seed=0):
+    """Return compact brand specs: (name, daily budget, monthly budget, campaign hours, arrival rate, mean amount, seed).
+
+    Specs are plain tuples so shards of a fleet are cheap to send to worker
+    processes; each brand has its own random seed, so a brand sees the same
+    arrivals whichever shard simulates it.
+    """
+    rng = random.Random(seed)
+    specs = []
+    for b in range(brand_count):
+        daily_budget = round(rng.uniform(50, 500), 2)
+        campaigns = []
+        for _ in range(campaigns_per_brand):
+            start_hour = rng.choice((0, 0, 6, 8, 9, 12, 17))
+            campaigns.append((start_hour, min(24, start_hour + rng.choice((8, 10, 12, 24)))))
+        # Brands differ in traffic; the mean amount is set so expected demand is demand_ratio x budget
+        events = events_per_day * rng.lognormvariate(0, 0.5)
+        rate = events / DAY / (sum(DIURNAL) / 24)
+        specs.append((f'Brand {b}', daily_budget, round(daily_budget * 30, 2), tuple(campaigns), rate,
+                      demand_ratio * daily_budget / events, rng.getrandbits(32)))
+    return specs
+
+
+class FleetSimulator:
+    """Discrete-event simulation of many brands over days of virtual time.
+
+    Spend opportunities arrive per brand as a Poisson process whose rate
+    follows the DIURNAL curve. Campaign checks run every ``check_interval``
+    seconds (starting ``check_offset`` seconds after midnight), daily resets
+    at midnight and monthly resets on the 1st. The ad server is modelled as
+    serving the campaigns that were active at the last check:
+
+    - Spend served while the brand is already over budget is overspend.
+    - Demand for a campaign that should be live (in its daypart, with
+      budget) but was not active at the last check is underdelivery.
+
+    ``demand_ratio`` is the expected daily demand as a multiple of the daily
+    budget; above 1, brands run out of budget during the day.
+
+    ``pacing`` runs a Pacer (EWMA window ``pacing_window`` seconds) at every
+    check: 'pause' stops a brand that is projected to exhaust its budget
+    before the next check, 'throttle' serves just enough of its demand for
+    the budget to last until then.
+    """
+
+    def __init__(self, brand_count=1000, days=30, events_per_day=200, campaigns_per_brand=3, check_interval=3600,
+                 check_offset=0, demand_ratio=1.3, start=datetime(2024, 1, 1), seed=0, specs=None, pacing=None,
+                 pacing_window=900):
+        if pacing not in (None, 'pause', 'throttle'):
+            raise ValueError(f"Unknown pacing mode: {pacing}")
+        self.days = days
+        self.check_interval = check_interval
+        self.check_offset = check_offset
+        self.start = start
+        self.bus = EventBus()
+        self.bus.subscribe(self._count_pause)
+        if specs is None:
+            specs = generate_brands(brand_count, events_per_day, campaigns_per_brand, demand_ratio, seed)
+
+        self.brands = []
+        self.budget_services = []
+        self.campaign_services = []
+        self.outcomes = []
+        self.rates = []
+        self.amounts = []
+        self.rngs = []
+        self.served = []
+        for name, daily_budget, monthly_budget, campaigns, rate, amount, brand_seed in specs:
+            brand = Brand(name, monthly_budget, daily_budget)
+            for c, hours in enumerate(campaigns):
+                brand.add_campaign(Campaign(f'Campaign {c}', hours))
+            self.brands.append(brand)
+            self.budget_services.append(BudgetService(brand, events=self.bus))
+            self.campaign_services.append(CampaignService(brand))
+            self.outcomes.append(BrandOutcome(name, daily_budget, monthly_budget))
+            self.rates.append(rate)
+            self.amounts.append(amount)
+            self.rngs.append(random.Random(brand_seed))
+            self.served.append([False] * len(campaigns))
+        self._index = {brand.name: b for b, brand in enumerate(self.brands)}
+        self.pacing = pacing
+        self.pacer = Pacer(pacing_window, check_interval) if pacing else None
+        # Share of demand served per brand while throttled, and the credit towards the next served event
+        self.throttle = [1.0] * len(self.brands)
+        self._credit = [0.0] * len(self.brands)
+
+        self.clock = 0.0
+        self.queue = []
+        self._sequence = 0
+        self.hourly_arrivals = [0] * (24 * days)
+        self.checks = 0
+
+    def now(self):
+        """Virtual wall-clock time; the services only ever see this, never datetime.now()."""
+        return self.start + timedelta(seconds=self.clock)
+
+    def _count_pause(self, event):
+        if event.exhausted:
+            self.outcomes[self._index[event.brand_name]].pauses += 1
+
+    def schedule(self, at, kind, brand_index=-1):
+        self._sequence += 1
+        heapq.heappush(self.queue, (at, kind, self._sequence, brand_index))
+
+    def _next_arrival(self, brand_index, after):
+        # Thinning: draw from the peak rate and keep a draw with probability DIURNAL[hour] / peak
+        peak = max(DIURNAL)
+        rate = self.rates[brand_index] * peak
+        rng = self.rngs[brand_index]
+        at = after
+        while True:
+            at += rng.expovariate(rate)
+            if rng.random() * peak <= DIURNAL[int(at // 3600) % 24]:
+                return at
+
+    def run(self):
+        """Run the whole simulation and return a summary dict."""
+        end = self.days * DAY
+        for day in range(1, self.days + 1):
+            if (self.start + timedelta(days=day)).day == 1:
+                self.schedule(day * DAY, MONTHLY_RESET)
+            self.schedule(day * DAY, DAILY_RESET)
+        for at in range(self.check_offset, end, self.check_interval):
+            self.schedule(at, CHECK)
+        for b in range(len(self.brands)):
+            self.schedule(self._next_arrival(b, 0.0), SPEND, b)
+
+        started = time.perf_counter()
+        arrivals = 0
+        while self.queue:
+            at, kind, _sequence, b = heapq.heappop(self.queue)
+            if at >= end:
+                break
+            self.clock = at
+            if kind == SPEND:
+                self._spend(b)
+                arrivals += 1
+                self.schedule(self._next_arrival(b, at), SPEND, b)
+            elif kind == CHECK:
+                self._check()
+            elif kind == DAILY_RESET:
+                for service in self.budget_services:
+                    service.reset_daily()
+            elif kind == MONTHLY_RESET:
+                for service in self.budget_services:
+                    service.reset_monthly()
+        elapsed = time.perf_counter() - started
+
+        return self.summary(arrivals, elapsed)
+
+    def _spend(self, b):
+        brand = self.brands[b]
+        outcome = self.outcomes[b]
+        hour = int(self.clock // 3600) % 24
+        rng = self.rngs[b]
+        amount = rng.expovariate(1.0 / self.amounts[b])
+        campaign_index = rng.randrange(len(brand.campaigns))
+        self.hourly_arrivals[int(self.clock // 3600)] += 1
+
+        if self.served[b][campaign_index] and self.pacer is not None:
+            self.pacer.observe(brand.name, amount, self.clock)
+            if self.throttle[b] < 1.0:
+                # Serve a steady share of the demand rather than a random one, so runs stay comparable
+                self._credit[b] += self.throttle[b]
+                if self._credit[b] < 1.0:
+                    outcome.underdelivered += amount
+                    return
+                self._credit[b] -= 1.0
+
+        if not self.served[b][campaign_index]:
+            campaign = brand.campaigns[campaign_index]
+            if not brand.budget_exhausted and (campaign.activation_mask >> hour) & 1:
+                outcome.underdelivered += amount
+            return
+
+        over_before = self._over_budget(brand)
+        self.budget_services[b].update_spend(amount)
+        outcome.overspend += self._over_budget(brand) - over_before
+        outcome.spend += amount
+        outcome.events += 1
+
+    @staticmethod
+    def _over_budget(brand):
+        return max(0.0, brand.current_daily_spend - brand.daily_budget,
+                   brand.current_monthly_spend - brand.monthly_budget)
+
+    def _check(self):
+        current_time = self.now()
+        for b, service in enumerate(self.campaign_services):
+            service.update_for_time(current_time)
+            brand = self.brands[b]
+            if self.pacing == 'pause' and not brand.budget_exhausted and \
+                    self.pacer.should_pause(brand, self.clock):
+                service.deactivate_campaigns()
+                self.outcomes[b].paced += 1
+            elif self.pacing == 'throttle':
+                self.throttle[b] = self.pacer.throttle(brand, self.clock)
+            self.served[b] = [campaign.is_active for campaign in brand.campaigns]
+        self.checks += 1
+
+    def summary(self, arrivals, elapsed):
+        return summarize(self.outcomes, self.hourly_arrivals, self.days, self.check_interval, self.checks,
+                         arrivals, elapsed)
+
+    def write_report(self, path):
+        write_report(self.outcomes, path)
+
+
+def summarize(outcomes, hourly_arrivals, days, check_interval, checks, arrivals, elapsed):
+    budget = sum(outcome.daily_budget for outcome in outcomes) * days
+    overspend = sum(outcome.overspend for outcome in outcomes)
+    underdelivered = sum(outcome.underdelivered for outcome in outcomes)
+    return {
+        'brands': len(outcomes),
+        'days': days,
+        'check_interval': check_interval,
+        'checks': checks,
+        'arrivals': arrivals,
+        'spend_events': sum(outcome.events for outcome in outcomes),
+        'wall_seconds': elapsed,
+        'events_per_sec': arrivals / elapsed if elapsed else (math.inf if arrivals else 0.0),
+        'peak_arrivals_per_sec': max(hourly_arrivals) / 3600,
+        'spend': sum(outcome.spend for outcome in outcomes),
+        'overspend': overspend,
+        'overspend_pct': 100 * overspend / budget if budget else 0.0,
+        'underdelivered': underdelivered,
+        'underdelivered_pct': 100 * underdelivered / budget if budget else 0.0,
+        'brands_overspent': sum(1 for outcome in outcomes if outcome.overspend > 0),
+        'paced_pauses': sum(outcome.paced for outcome in outcomes),
+    }
+
+
+def write_report(outcomes, path):
+    """Write one CSV row per brand with its spend, overspend and underdelivery."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['brand', 'daily_budget', 'monthly_budget', 'spend', 'overspend', 'underdelivered',
+                         'spend_events', 'pauses'])
+        for outcome in outcomes:
+            writer.writerow([outcome.name, outcome.daily_budget, outcome.monthly_budget,
+                             round(outcome.spend, 2), round(outcome.overspend, 2),
+                             round(outcome.underdelivered, 2), outcome.events, outcome.pauses])
+
+
+def _run_shard(specs, options):
+    """Simulate one shard of brands in a worker process; return plain tuples rather than objects."""
+    simulator = FleetSimulator(specs=specs, **options)
+    summary = simulator.run()
+    outcomes = [tuple(getattr(outcome, field) for field in BrandOutcome.__slots__) for outcome in simulator.outcomes]
+    return outcomes, simulator.hourly_arrivals, summary['arrivals'], summary['checks']
+
+
+def run_parallel(specs, workers, **options):
+    """Simulate specs split into one shard per worker process and merge the results.
+
+    Brands interact with nothing but the shared clock, so each shard runs
+    the full time range for its brands; outcomes are identical to a single
+    process run. Returns (summary, outcomes).
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    days = options.get('days', 30)
+    check_interval = options.get('check_interval', 3600)
+    if not specs:
+        summary = summarize([], [0] * (24 * days), days, check_interval, 0, 0, 0.0)
+        summary['workers'] = workers
+        return summary, []
+    shard_size = math.ceil(len(specs) / workers)
+    shards = [specs[i:i + shard_size] for i in range(0, len(specs), shard_size)]
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_run_shard(shards[0], options)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_shard, shards, [options] * len(shards)))
+    elapsed = time.perf_counter() - started
+
+    outcomes = []
+    hourly_arrivals = None
+    arrivals = 0
+    for rows, shard_hourly, shard_arrivals, checks in results:
+        for row in rows:
+            outcome = BrandOutcome(row[0], row[1], row[2])
+            for field, value in zip(BrandOutcome.__slots__, row):
+                setattr(outcome, field, value)
+            outcomes.append(outcome)
+        if hourly_arrivals is None:
+            hourly_arrivals = shard_hourly
+        else:
+            hourly_arrivals = [a + b for a, b in zip(hourly_arrivals, shard_hourly)]
+        arrivals += shard_arrivals
+
+    summary = summarize(outcomes, hourly_arrivals, days, check_interval, checks, arrivals, elapsed)
+    summary['workers'] = workers
+    return summary, outcomes
@@ -0,0 +1,17 @@
+def create_store(url):
+    """Build a brand state store from a URL.
+
+    Supported forms: ``memory://``, ``sqlite:///relative/state.db``,
+    ``sqlite:////absolute/state.db`` and ``redis://host:port/db``. Backends are imported lazily so the Redis
+    client is only needed when it is actually used.
+    """
+    if url.startswith('memory://'):
+        from src.stores.memory_store import MemoryStore
+        return MemoryStore()
+    if url.startswith('sqlite://'):
+        from src.stores.sqlite_store import SQLiteStore
+        return SQLiteStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        from src.stores.redis_store import RedisStore
+        return RedisStore(url)
+    raise ValueError(f"Unsupported state store URL: {url}")
@@ -0,0 +1,277 @@
+import fcntl
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import nullcontext
+
+from src.models.schedule import dayparting_to_json
+from src.money import to_micros
+from src.services.periods import current_periods
+
+# Record kinds. SPEND amounts are in currency units (ledgers written before
+# integer micros); SPEND_MICROS amounts are integer micros, which the double
+# in the header holds exactly up to 2**53.
+SPEND = 1
+RESET_DAILY = 2
+RESET_MONTHLY = 3
+BRAND = 4
+SPEND_MICROS = 5
+
+# kind, timestamp, amount, name length, payload length; followed by name,
+# payload and a CRC32 of everything before it
+_HEADER = struct.Struct('<BddHI')
+_CRC = struct.Struct('<I')
+
+SNAPSHOT_FILE = 'snapshot.json'
+
+# Held with flock by the one SpendLedger writing to a directory
+LOCK_FILE = 'LOCK'
+
+
+def _segment_name(number):
+    return f'ledger-{number:08d}.bin'
+
+
+def _segment_numbers(directory):
+    numbers = []
+    for filename in os.listdir(directory):
+        if filename.startswith('ledger-') and filename.endswith('.bin'):
+            numbers.append(int(filename[len('ledger-'):-len('.bin')]))
+    return sorted(numbers)
+
+
+def encode_record(kind, name='', amount=0.0, timestamp=0.0, payload=b''):
+    name_bytes = name.encode()
+    body = _HEADER.pack(kind, timestamp, amount, len(name_bytes), len(payload)) + name_bytes + payload
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _scan(data):
+    """Yield (end_offset, kind, name, amount, timestamp, payload) for each intact record in data."""
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        kind, timestamp, amount, name_len, payload_len = _HEADER.unpack_from(data, offset)
+        end = offset + _HEADER.size + name_len + payload_len
+        if end + _CRC.size > len(data):
+            return
+        (crc,) = _CRC.unpack_from(data, end)
+        if crc != zlib.crc32(data[offset:end]):
+            return
+        name_start = offset + _HEADER.size
+        name = data[name_start:name_start + name_len].decode()
+        payload = data[name_start + name_len:end]
+        offset = end + _CRC.size
+        yield offset, kind, name, amount, timestamp, payload
+
+
+def read_records(path):
+    """Yield (kind, name, amount, timestamp, payload) from a segment.
+
+    Reading stops at the first torn or corrupt record, which is what a crash
+    in the middle of a write leaves behind.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    for record in _scan(data):
+        yield record[1:]
+
+
+def _truncate_torn_tail(path):
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        data = f.read()
+    valid_length = 0
+    for valid_length, *_record in _scan(data):
+        pass
+    if valid_length < len(data):
+        with open(path, 'r+b') as f:
+            f.truncate(valid_length)
+
+
+class SpendLedger:
+    """Append-only, binary write-ahead log of spend and reset events.
+
+    Appends are buffered and made durable with one fsync per group of
+    records (group commit): a group is synced when it reaches
+    ``group_size`` records or, from a background thread, when its oldest
+    record is ``group_interval`` seconds old.
+
+    A directory has one writer: opening takes an exclusive lock on it, so
+    no other process appends to, truncates or snapshots its segments, and
+    RuntimeError is raised while another ledger holds it. Open the ledger
+    in the process that writes it, after any fork, since the flusher
+    thread does not survive one.
+    """
+
+    def __init__(self, directory, group_size=256, group_interval=0.05):
+        self.directory = directory
+        self.group_size = group_size
+        self.group_interval = group_interval
+        os.makedirs(directory, exist_ok=True)
+        self._dir_lock = open(os.path.join(directory, LOCK_FILE), 'a')
+        try:
+            fcntl.flock(self._dir_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._dir_lock.close()
+            raise RuntimeError(f"ledger directory {directory} is in use by another process") from None
+
+        segments = _segment_numbers(directory)
+        self.segment = segments[-1] if segments else 1
+        _truncate_torn_tail(os.path.join(directory, _segment_name(self.segment)))
+        self._file = open(os.path.join(directory, _segment_name(self.segment)), 'ab')
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._pending = 0
+        self._oldest_pending = None
+        self.records_since_snapshot = 0
+        self.syncs = 0
+
+        self._closed = threading.Event()
+        self._flusher = None
+        if group_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def append(self, kind, name='', amount=0.0, timestamp=None, payload=b''):
+        record = encode_record(kind, name, amount, time.time() if timestamp is None else timestamp, payload)
+        with self._lock:
+            self._file.write(record)
+            self._pending += 1
+            self.records_since_snapshot += 1
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            if self._pending >= self.group_size:
+                self._sync_locked()
+
+    def append_spend(self, name, micros, timestamp=None):
+        self.append(SPEND_MICROS, name, micros, timestamp)
+
+    def append_brand(self, name, monthly_budget, daily_budget, campaign_data):
+        payload = json.dumps({
+            'monthly_budget': monthly_budget,
+            'daily_budget': daily_budget,
+            'campaigns': {campaign: dayparting_to_json(hours) for campaign, hours in campaign_data.items()},
+        }).encode()
+        self.append(BRAND, name, payload=payload)
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if not self._pending:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._oldest_pending = None
+        self.syncs += 1
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.group_interval):
+            with self._lock:
+                if self._oldest_pending is not None and \
+                        time.monotonic() - self._oldest_pending >= self.group_interval:
+                    self._sync_locked()
+
+    def snapshot(self, store, quiesce=None):
+        """Write a compact snapshot of every brand in store and drop the segments it covers.
+
+        Records in the closed segments must already be applied to store when
+        it is read. ``quiesce`` is a context manager that holds off every
+        writer between its append and its apply (the worker passes
+        ``brand_locks.all()``); without one, the caller must not be writing.
+        Only one snapshot runs at a time, and appends are only blocked while
+        the segment rotates. Segments can be removed because this ledger is
+        the directory's only writer.
+        """
+        with self._snapshot_lock:
+            with quiesce if quiesce is not None else nullcontext():
+                with self._lock:
+                    self._sync_locked()
+                    self._file.close()
+                    self.segment += 1
+                    self._file = open(os.path.join(self.directory, _segment_name(self.segment)), 'ab')
+                    self.records_since_snapshot = 0
+                    segment = self.segment
+                brands = {name: store.load_brand(name) for name in store.brand_names()}
+
+            write_snapshot(self.directory, {
+                'segment': segment,
+                'created_at': time.time(),
+                'units': 'micros',
+                'brands': brands,
+            })
+            for number in _segment_numbers(self.directory):
+                if number < segment:
+                    os.remove(os.path.join(self.directory, _segment_name(number)))
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+        self._dir_lock.close()
+
+
+def write_snapshot(directory, state):
+    """Atomically replace the snapshot file with state."""
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(directory):
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def recover(directory, store):
+    """Rebuild store from the latest snapshot plus the ledger tail; return the number of replayed records."""
+    if not os.path.isdir(directory):
+        return 0
+    snapshot = load_snapshot(directory)
+    first_segment = 1
+    if snapshot is not None:
+        first_segment = snapshot['segment']
+        # Older snapshots hold spend in currency units
+        convert = to_micros if snapshot.get('units') != 'micros' else int
+        for name, record in snapshot['brands'].items():
+            store.save_brand(name, record['monthly_budget'], record['daily_budget'], record['campaigns'])
+            store.set_spend(name, convert(record['daily_spend']), convert(record['monthly_spend']),
+                            record.get('daily_period'), record.get('monthly_period'))
+
+    replayed = 0
+    for number in _segment_numbers(directory):
+        if number < first_segment:
+            continue
+        for kind, name, amount, timestamp, payload in read_records(os.path.join(directory, _segment_name(number))):
+            if kind == SPEND or kind == SPEND_MICROS:
+                micros = int(amount) if kind == SPEND_MICROS else to_micros(amount)
+                # Spend from a later day or month than the counters resets them, as it did when applied
+                try:
+                    store.add_spend(name, micros, *current_periods(timestamp))
+                except KeyError:
+                    pass
+            elif kind == RESET_DAILY:
+                store.reset_daily()
+            elif kind == RESET_MONTHLY:
+                store.reset_monthly()
+            elif kind == BRAND:
+                config = json.loads(payload)
+                store.save_brand(name, config['monthly_budget'], config['daily_budget'], config['campaigns'])
+            replayed += 1
+    return replayed
@@ -0,0 +1,112 @@
+import threading
+
+from src.models.schedule import dayparting_to_json
+
+
+def _roll_over(spend, day, month):
+    """Zero the counters of spend ([daily, monthly, day, month]) that belong to an earlier period."""
+    if day is not None and (spend[2] is None or spend[2] < day):
+        if spend[2] is not None:
+            spend[0] = 0
+        spend[2] = day
+    if month is not None and (spend[3] is None or spend[3] < month):
+        if spend[3] is not None:
+            spend[1] = 0
+        spend[3] = month
+
+
+class MemoryStore:
+    """Process-local brand state store, mainly for tests and single-process runs.
+
+    Spend counters are integer micros (see src/money.py). Methods taking
+    ``day`` and ``month`` periods (see services/periods.py) reset counters
+    recorded in an earlier period before using them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._brands = {}
+        self._spend = {}
+        self._nodes = {}
+
+    def save_brand(self, name, monthly_budget, daily_budget, campaign_data):
+        with self._lock:
+            self._brands[name] = {
+                'monthly_budget': monthly_budget,
+                'daily_budget': daily_budget,
+                'campaigns': {campaign: dayparting_to_json(hours) for campaign, hours in campaign_data.items()},
+            }
+            self._spend.setdefault(name, [0, 0, None, None])
+
+    def load_brand(self, name, day=None, month=None):
+        with self._lock:
+            config = self._brands.get(name)
+            if config is None:
+                return None
+            spend = self._spend[name]
+            _roll_over(spend, day, month)
+            daily, monthly, daily_period, monthly_period = spend
+            return dict(config, daily_spend=daily, monthly_spend=monthly, daily_period=daily_period,
+                        monthly_period=monthly_period)
+
+    def brand_names(self):
+        with self._lock:
+            return list(self._brands)
+
+    def add_spend(self, name, micros, day=None, month=None):
+        with self._lock:
+            spend = self._spend[name]
+            _roll_over(spend, day, month)
+            spend[0] += micros
+            spend[1] += micros
+            return spend[0], spend[1]
+
+    def set_spend(self, name, daily, monthly, day=None, month=None):
+        with self._lock:
+            self._spend[name] = [daily, monthly, day, month]
+
+    def get_spend(self, names, day=None, month=None):
+        with self._lock:
+            spend = {}
+            for name in names:
+                if name in self._spend:
+                    _roll_over(self._spend[name], day, month)
+                    spend[name] = tuple(self._spend[name][:2])
+            return spend
+
+    def add_node_spend(self, keys, micros, day=None, month=None):
+        """Add micros to the budget tree node counters at keys; return their (daily, monthly) totals."""
+        with self._lock:
+            totals = []
+            for key in keys:
+                spend = self._nodes.setdefault(key, [0, 0, None, None])
+                _roll_over(spend, day, month)
+                spend[0] += micros
+                spend[1] += micros
+                totals.append((spend[0], spend[1]))
+            return totals
+
+    def get_node_spend(self, keys, day=None, month=None):
+        with self._lock:
+            spend = {}
+            for key in keys:
+                if key in self._nodes:
+                    _roll_over(self._nodes[key], day, month)
+                    spend[key] = tuple(self._nodes[key][:2])
+            return spend
+
+    def reset_daily(self):
+        with self._lock:
+            for spend in self._spend.values():
+                spend[0] = 0
+
+    def reset_monthly(self):
+        with self._lock:
+            for spend in self._spend.values():
+                spend[1] = 0
+
+    def clear(self):
+        with self._lock:
+            self._brands.clear()
+            self._spend.clear()
+            self._nodes.clear()
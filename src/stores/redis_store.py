@@ -0,0 +1,245 @@
+import json
+
+import redis
+
+from src.models.schedule import dayparting_to_json
+
+# KEYS: daily, monthly, daily period, monthly period; ARGV: micros, day, month ('' for none).
+# Counters recorded in an earlier period are zeroed before the increment, atomically.
+_ADD_SPEND = """
+local function roll_over(counter, period_key, period)
+    if period == '' then
+        return
+    end
+    local stored = redis.call('GET', period_key)
+    if not stored or tonumber(stored) < tonumber(period) then
+        if stored then
+            redis.call('SET', counter, 0)
+        end
+        redis.call('SET', period_key, period)
+    end
+end
+roll_over(KEYS[1], KEYS[3], ARGV[2])
+roll_over(KEYS[2], KEYS[4], ARGV[3])
+return {redis.call('INCRBY', KEYS[1], ARGV[1]), redis.call('INCRBY', KEYS[2], ARGV[1])}
+"""
+
+
+# KEYS: old daily, old monthly, their period keys, then the same four micros keys.
+# Moves currency-unit float counters written before spend was kept in micros to
+# the micros keys, with their periods, and deletes them. Atomic per brand, so
+# workers starting together never convert a counter twice.
+_MIGRATE_TO_MICROS = """
+for i = 1, 2 do
+    local old = redis.call('GET', KEYS[i])
+    if old and not redis.call('GET', KEYS[i + 4]) then
+        redis.call('SET', KEYS[i + 4], string.format('%.0f', math.floor(tonumber(old) * 1000000 + 0.5)))
+        local period = redis.call('GET', KEYS[i + 2])
+        if period then
+            redis.call('SET', KEYS[i + 6], period)
+        end
+    end
+    redis.call('DEL', KEYS[i], KEYS[i + 2])
+end
+"""
+
+# Bumped when the layout of the keys changes; 1 is spend counters in micros
+_SCHEMA_VERSION = 1
+
+
+def _current(value, stored_period, period):
+    """Counter value as seen in period: zero if it was recorded in an earlier one."""
+    if period is not None and stored_period is not None and int(stored_period) < period:
+        return 0
+    return int(value or 0)
+
+
+def _latest(stored_period, period):
+    if stored_period is None:
+        return period
+    if period is None:
+        return int(stored_period)
+    return max(int(stored_period), period)
+
+
+class RedisStore:
+    """Brand state store in Redis, shared by every worker node.
+
+    Spend counters are plain integer keys of micros, updated with INCRBY so
+    concurrent workers never lose increments, and multi-brand reads are
+    pipelined. Next to each counter is the day or month period it belongs
+    to; a spend in a later period resets the counter in the same Lua script.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='budget', client=None):
+        self.client = client if client is not None else redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._names_key = f'{prefix}:brands'
+        self._add_spend = self.client.register_script(_ADD_SPEND)
+        self._version_key = f'{prefix}:schema_version'
+        if int(self.client.get(self._version_key) or 0) < _SCHEMA_VERSION:
+            self._migrate_to_micros()
+
+    def _migrate_to_micros(self):
+        """Convert the currency-unit counters of earlier versions into micros, once."""
+        migrate = self.client.register_script(_MIGRATE_TO_MICROS)
+        for name in self.brand_names():
+            old_keys = [f'{self.prefix}:spend:{name}:daily', f'{self.prefix}:spend:{name}:monthly']
+            new_keys = [self._daily_key(name), self._monthly_key(name)]
+            migrate(keys=old_keys + [self._period_key(key) for key in old_keys]
+                    + new_keys + [self._period_key(key) for key in new_keys])
+        self.client.set(self._version_key, _SCHEMA_VERSION)
+
+    def _config_key(self, name):
+        return f'{self.prefix}:brand:{name}'
+
+    # Counters are suffixed _micros: the unsuffixed keys of earlier versions
+    # held currency-unit floats, moved over by _migrate_to_micros
+    def _daily_key(self, name):
+        return f'{self.prefix}:spend:{name}:daily_micros'
+
+    def _monthly_key(self, name):
+        return f'{self.prefix}:spend:{name}:monthly_micros'
+
+    def _period_key(self, counter_key):
+        return f'{counter_key}_period'
+
+    def save_brand(self, name, monthly_budget, daily_budget, campaign_data):
+        campaigns = json.dumps({campaign: dayparting_to_json(hours) for campaign, hours in campaign_data.items()})
+        pipe = self.client.pipeline()
+        pipe.hset(self._config_key(name), mapping={
+            'monthly_budget': monthly_budget,
+            'daily_budget': daily_budget,
+            'campaigns': campaigns,
+        })
+        pipe.setnx(self._daily_key(name), 0)
+        pipe.setnx(self._monthly_key(name), 0)
+        pipe.sadd(self._names_key, name)
+        pipe.execute()
+
+    def load_brand(self, name, day=None, month=None):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._config_key(name))
+        self._queue_spend(pipe, name)
+        config, daily, monthly, daily_period, monthly_period = pipe.execute()
+        if not config:
+            return None
+        return {
+            'monthly_budget': float(config[b'monthly_budget']),
+            'daily_budget': float(config[b'daily_budget']),
+            'campaigns': json.loads(config[b'campaigns']),
+            'daily_spend': _current(daily, daily_period, day),
+            'monthly_spend': _current(monthly, monthly_period, month),
+            'daily_period': _latest(daily_period, day),
+            'monthly_period': _latest(monthly_period, month),
+        }
+
+    def brand_names(self):
+        return [name.decode() for name in self.client.smembers(self._names_key)]
+
+    def _node_keys(self, key):
+        return f'{self.prefix}:node:{key}:daily_micros', f'{self.prefix}:node:{key}:monthly_micros'
+
+    def _queue_spend(self, pipe, name):
+        self._queue_counters(pipe, self._daily_key(name), self._monthly_key(name))
+
+    def _queue_counters(self, pipe, daily_key, monthly_key):
+        pipe.get(daily_key)
+        pipe.get(monthly_key)
+        pipe.get(self._period_key(daily_key))
+        pipe.get(self._period_key(monthly_key))
+
+    def add_spend(self, name, micros, day=None, month=None):
+        if day is None and month is None:
+            pipe = self.client.pipeline()
+            pipe.incrby(self._daily_key(name), micros)
+            pipe.incrby(self._monthly_key(name), micros)
+            daily, monthly = pipe.execute()
+            return daily, monthly
+        daily_key, monthly_key = self._daily_key(name), self._monthly_key(name)
+        daily, monthly = self._add_spend(
+            keys=[daily_key, monthly_key, self._period_key(daily_key), self._period_key(monthly_key)],
+            args=[micros, '' if day is None else day, '' if month is None else month],
+        )
+        return int(daily), int(monthly)
+
+    def set_spend(self, name, daily, monthly, day=None, month=None):
+        daily_key, monthly_key = self._daily_key(name), self._monthly_key(name)
+        pipe = self.client.pipeline()
+        pipe.mset({daily_key: daily, monthly_key: monthly})
+        for key, period in ((daily_key, day), (monthly_key, month)):
+            if period is None:
+                pipe.delete(self._period_key(key))
+            else:
+                pipe.set(self._period_key(key), period)
+        pipe.execute()
+
+    def get_spend(self, names, day=None, month=None):
+        names = list(names)
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            self._queue_spend(pipe, name)
+        values = pipe.execute()
+        spend = {}
+        for i, name in enumerate(names):
+            daily, monthly, daily_period, monthly_period = values[4 * i:4 * i + 4]
+            if daily is not None or monthly is not None:
+                spend[name] = (_current(daily, daily_period, day), _current(monthly, monthly_period, month))
+        return spend
+
+    def add_node_spend(self, keys, micros, day=None, month=None):
+        """Add micros to the budget tree node counters at keys; return their (daily, monthly) totals."""
+        pipe = self.client.pipeline()
+        for key in keys:
+            daily_key, monthly_key = self._node_keys(key)
+            self._add_spend(keys=[daily_key, monthly_key, self._period_key(daily_key), self._period_key(monthly_key)],
+                            args=[micros, '' if day is None else day, '' if month is None else month], client=pipe)
+        return [(int(daily), int(monthly)) for daily, monthly in pipe.execute()]
+
+    def get_node_spend(self, keys, day=None, month=None):
+        keys = list(keys)
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            self._queue_counters(pipe, *self._node_keys(key))
+        values = pipe.execute()
+        spend = {}
+        for i, key in enumerate(keys):
+            daily, monthly, daily_period, monthly_period = values[4 * i:4 * i + 4]
+            if daily is not None or monthly is not None:
+                spend[key] = (_current(daily, daily_period, day), _current(monthly, monthly_period, month))
+        return spend
+
+    def _reset(self, key_for):
+        pipe = self.client.pipeline()
+        for name in self.brand_names():
+            pipe.set(key_for(name), 0)
+        pipe.execute()
+
+    def reset_daily(self):
+        self._reset(self._daily_key)
+
+    def reset_monthly(self):
+        self._reset(self._monthly_key)
+
+    def _event_key(self, event_id):
+        return f'{self.prefix}:event:{event_id}'
+
+    def claim_event(self, event_id, ttl):
+        """Claim a spend event ID for ttl seconds; return False if it is already claimed."""
+        return bool(self.client.set(self._event_key(event_id), 1, nx=True, ex=ttl))
+
+    def release_event(self, event_id):
+        self.client.delete(self._event_key(event_id))
+
+    def clear(self):
+        for pattern in (self._event_key('*'), f'{self.prefix}:node:*'):
+            scanned = list(self.client.scan_iter(match=pattern))
+            if scanned:
+                self.client.delete(*scanned)
+        names = self.brand_names()
+        keys = [self._names_key]
+        for name in names:
+            daily_key, monthly_key = self._daily_key(name), self._monthly_key(name)
+            keys.extend([self._config_key(name), daily_key, monthly_key,
+                         self._period_key(daily_key), self._period_key(monthly_key)])
+        self.client.delete(*keys)
@@ -0,0 +1,202 @@
+import json
+import sqlite3
+import threading
+import time
+
+from src.models.schedule import dayparting_to_json
+
+
+# Expired event claims are purged once every this many claims
+_PURGE_EVERY = 1000
+
+# Spend counters as seen in the given day and month: zero if recorded in an earlier period
+_CURRENT_SPEND = ('CASE WHEN daily_period < :day THEN 0 ELSE daily_spend END, '
+                  'CASE WHEN monthly_period < :month THEN 0 ELSE monthly_spend END')
+
+# Adds :micros to both counters, zeroing those recorded in an earlier period first
+_ADD_SPEND = ('daily_spend = CASE WHEN daily_period < :day THEN 0 ELSE daily_spend END + :micros, '
+              'monthly_spend = CASE WHEN monthly_period < :month THEN 0 ELSE monthly_spend END + :micros, '
+              'daily_period = COALESCE(MAX(daily_period, :day), daily_period, :day), '
+              'monthly_period = COALESCE(MAX(monthly_period, :month), monthly_period, :month)')
+
+
+class SQLiteStore:
+    """Brand state store backed by a SQLite file in WAL mode, shared by all workers on one node.
+
+    Spend counters are integer micros. Each row keeps the day and month
+    period its counters belong to, so a new period resets a brand's counters
+    on first use instead of in a sweep.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._claims = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            existed = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'brands'").fetchone()
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS brands ('
+                ' name TEXT PRIMARY KEY,'
+                ' monthly_budget REAL NOT NULL,'
+                ' daily_budget REAL NOT NULL,'
+                ' campaigns TEXT NOT NULL,'
+                ' daily_spend INTEGER NOT NULL DEFAULT 0,'
+                ' monthly_spend INTEGER NOT NULL DEFAULT 0,'
+                ' daily_period INTEGER,'
+                ' monthly_period INTEGER)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS spend_events (event_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS budget_nodes ('
+                ' key TEXT PRIMARY KEY,'
+                ' daily_spend INTEGER NOT NULL,'
+                ' monthly_spend INTEGER NOT NULL,'
+                ' daily_period INTEGER,'
+                ' monthly_period INTEGER)'
+            )
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(brands)')}
+            for column in ('daily_period', 'monthly_period'):
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE brands ADD COLUMN {column} INTEGER')
+            if self._conn.execute('PRAGMA user_version').fetchone()[0] < 1:
+                if existed:
+                    # Version 0 kept spend in currency units. Migrated tables keep REAL columns,
+                    # which hold the integer micros exactly up to 2**53.
+                    self._conn.execute('UPDATE brands SET daily_spend = CAST(ROUND(daily_spend * 1000000) AS INTEGER), '
+                                       'monthly_spend = CAST(ROUND(monthly_spend * 1000000) AS INTEGER)')
+                self._conn.execute('PRAGMA user_version = 1')
+            self._conn.execute('COMMIT')
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def save_brand(self, name, monthly_budget, daily_budget, campaign_data):
+        campaigns = json.dumps({campaign: dayparting_to_json(hours) for campaign, hours in campaign_data.items()})
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO brands (name, monthly_budget, daily_budget, campaigns) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET monthly_budget = excluded.monthly_budget, '
+                'daily_budget = excluded.daily_budget, campaigns = excluded.campaigns',
+                (name, monthly_budget, daily_budget, campaigns),
+            )
+
+    def load_brand(self, name, day=None, month=None):
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT monthly_budget, daily_budget, campaigns, {_CURRENT_SPEND}, '
+                'COALESCE(MAX(daily_period, :day), daily_period, :day), '
+                'COALESCE(MAX(monthly_period, :month), monthly_period, :month) '
+                'FROM brands WHERE name = :name', {'name': name, 'day': day, 'month': month}
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'monthly_budget': row[0],
+            'daily_budget': row[1],
+            'campaigns': json.loads(row[2]),
+            'daily_spend': int(row[3]),
+            'monthly_spend': int(row[4]),
+            'daily_period': row[5],
+            'monthly_period': row[6],
+        }
+
+    def brand_names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT name FROM brands')]
+
+    def add_spend(self, name, micros, day=None, month=None):
+        with self._lock:
+            row = self._conn.execute(
+                f'UPDATE brands SET {_ADD_SPEND} WHERE name = :name RETURNING daily_spend, monthly_spend',
+                {'name': name, 'micros': micros, 'day': day, 'month': month},
+            ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return int(row[0]), int(row[1])
+
+    def set_spend(self, name, daily, monthly, day=None, month=None):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE brands SET daily_spend = ?, monthly_spend = ?, daily_period = ?, monthly_period = ? '
+                'WHERE name = ?', (daily, monthly, day, month, name))
+
+    def get_spend(self, names, day=None, month=None):
+        return self._current_spend('brands', 'name', names, day, month)
+
+    def _current_spend(self, table, key_column, keys, day, month):
+        keys = list(keys)
+        if not keys:
+            return {}
+        params = {f'n{i}': key for i, key in enumerate(keys)}
+        placeholders = ', '.join(f':{param}' for param in params)
+        params.update(day=day, month=month)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {key_column}, {_CURRENT_SPEND} FROM {table} WHERE {key_column} IN ({placeholders})', params
+            ).fetchall()
+        return {key: (int(daily), int(monthly)) for key, daily, monthly in rows}
+
+    def reset_daily(self):
+        with self._lock:
+            self._conn.execute('UPDATE brands SET daily_spend = 0')
+
+    def reset_monthly(self):
+        with self._lock:
+            self._conn.execute('UPDATE brands SET monthly_spend = 0')
+
+    def add_node_spend(self, keys, micros, day=None, month=None):
+        """Add micros to the budget tree node counters at keys; return their (daily, monthly) totals."""
+        totals = []
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for key in keys:
+                    row = self._conn.execute(
+                        'INSERT INTO budget_nodes (key, daily_spend, monthly_spend, daily_period, monthly_period) '
+                        f'VALUES (:key, :micros, :micros, :day, :month) ON CONFLICT(key) DO UPDATE SET {_ADD_SPEND} '
+                        'RETURNING daily_spend, monthly_spend',
+                        {'key': key, 'micros': micros, 'day': day, 'month': month},
+                    ).fetchone()
+                    totals.append((int(row[0]), int(row[1])))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return totals
+
+    def get_node_spend(self, keys, day=None, month=None):
+        return self._current_spend('budget_nodes', 'key', keys, day, month)
+
+    def claim_event(self, event_id, ttl):
+        """Claim a spend event ID for ttl seconds; return False if it is already claimed."""
+        now = time.time()
+        with self._lock:
+            self._claims += 1
+            if self._claims % _PURGE_EVERY == 0:
+                self._conn.execute('DELETE FROM spend_events WHERE expires_at <= ?', (now,))
+            cursor = self._conn.execute(
+                'INSERT INTO spend_events (event_id, expires_at) VALUES (:event_id, :expires_at) '
+                'ON CONFLICT(event_id) DO UPDATE SET expires_at = excluded.expires_at '
+                'WHERE spend_events.expires_at <= :now',
+                {'event_id': event_id, 'expires_at': now + ttl, 'now': now},
+            )
+        return cursor.rowcount == 1
+
+    def release_event(self, event_id):
+        with self._lock:
+            self._conn.execute('DELETE FROM spend_events WHERE event_id = ?', (event_id,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM brands')
+            self._conn.execute('DELETE FROM spend_events')
+            self._conn.execute('DELETE FROM budget_nodes')
+
+    def close(self):
+        self._conn.close()
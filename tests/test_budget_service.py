@@ -2,6 +2,7 @@ import unittest
 from src.models.brand import Brand
 from src.models.campaign import Campaign
 from src.services.budget_service import BudgetService
+from src.services.events import BudgetEvent, EventBus
 
 class TestBudgetService(unittest.TestCase):
     def setUp(self):
@@ -15,7 +16,11 @@ class TestBudgetService(unittest.TestCase):
         self.campaign1.activate()
         self.campaign2.activate()
         
-        self.budget_service = BudgetService(self.brand)
+        self.events = EventBus()
+        self.received = []
+        self.events.subscribe(self.received.append)
+        
+        self.budget_service = BudgetService(self.brand, events=self.events)
 
     def test_initial_state(self):
         self.assertEqual(self.brand.current_daily_spend, 0)
@@ -96,6 +101,82 @@ class TestBudgetService(unittest.TestCase):
         
         # Campaigns should still be deactivated until checked again
         self.assertFalse(self.campaign1.is_active)
+    
+    def test_exhaustion_event_published_once(self):
+        self.budget_service.update_daily_spend(60)
+        self.assertEqual(self.received, [])
+        
+        self.budget_service.update_daily_spend(60)
+        self.assertTrue(self.brand.budget_exhausted)
+        self.assertEqual(self.received, [BudgetEvent("Test Brand", True, 'daily')])
+        
+        # Further spend on an exhausted brand neither re-publishes nor touches campaigns
+        self.campaign2.activate()
+        self.budget_service.update_daily_spend(10)
+        self.budget_service.update_monthly_spend(3000)
+        self.assertEqual(len(self.received), 1)
+        self.assertTrue(self.campaign2.is_active)
+    
+    def test_reset_publishes_restored_event(self):
+        self.budget_service.update_daily_spend(150)
+        self.budget_service.reset_daily()
+        
+        self.assertFalse(self.brand.budget_exhausted)
+        self.assertEqual(self.received[-1], BudgetEvent("Test Brand", False, 'reset'))
+        
+        # The next breach is detected again
+        self.budget_service.update_daily_spend(100)
+        self.assertEqual(self.received[-1], BudgetEvent("Test Brand", True, 'daily'))
+    
+    def test_reset_daily_keeps_monthly_exhaustion(self):
+        self.budget_service.update_monthly_spend(3000)
+        self.budget_service.update_daily_spend(100)
+        self.budget_service.reset_daily()
+        
+        self.assertTrue(self.brand.budget_exhausted)
+        self.assertEqual(self.received, [BudgetEvent("Test Brand", True, 'monthly')])
+    
+    def test_spend_in_a_new_day_resets_daily_spend(self):
+        self.budget_service.update_spend(150, periods=(100, 10))
+        self.budget_service.update_spend(10, periods=(100, 10))
+        self.assertTrue(self.brand.budget_exhausted)
+        
+        self.budget_service.update_spend(20, periods=(101, 10))
+        
+        self.assertEqual(self.brand.current_daily_spend, 20)
+        self.assertEqual(self.brand.current_monthly_spend, 180)
+        self.assertFalse(self.brand.budget_exhausted)
+        self.assertEqual(self.received[-1], BudgetEvent("Test Brand", False, 'reset'))
+    
+    def test_roll_over(self):
+        self.assertFalse(self.budget_service.roll_over(100, 10))
+        self.budget_service.update_spend(50)
+        
+        self.assertFalse(self.budget_service.roll_over(100, 10))
+        # A late call from an earlier period never resets the current one
+        self.assertFalse(self.budget_service.roll_over(99, 10))
+        self.assertEqual(self.brand.current_daily_spend, 50)
+        
+        self.assertTrue(self.budget_service.roll_over(131, 11))
+        self.assertEqual((self.brand.current_daily_spend, self.brand.current_monthly_spend), (0, 0))
+        self.assertEqual((self.brand.daily_period, self.brand.monthly_period), (131, 11))
+    
+    def test_refresh_after_external_change(self):
+        self.brand.current_daily_spend = 120
+        self.budget_service.refresh()
+        self.assertTrue(self.brand.budget_exhausted)
+        self.assertFalse(self.campaign1.is_active)
+        
+        self.brand.current_daily_spend = 0
+        self.budget_service.refresh()
+        self.assertFalse(self.brand.budget_exhausted)
+        self.assertEqual(self.received[-1], BudgetEvent("Test Brand", False, 'sync'))
+    
+    def test_headroom(self):
+        self.budget_service.update_daily_spend(30)
+        self.budget_service.update_monthly_spend(30)
+        self.assertEqual(self.brand.daily_headroom, 70)
+        self.assertEqual(self.brand.monthly_headroom, 2970)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from src.models.brand import Brand
+from src.models.budget_tree import BudgetTree
+from src.models.campaign import Campaign
+from src.money import to_micros
+from src.services.campaign_service import CampaignService
+from src.stores.memory_store import MemoryStore
+
+CONFIG = {
+    'daily_budget': 1000,
+    'children': {
+        'Acme': {
+            'children': {
+                'Search': {
+                    'daily_budget': 100,
+                    'children': {
+                        'Brand Terms': {'daily_budget': 40},
+                        'Generic': {},
+                    },
+                },
+                'Display': {'monthly_budget': 500},
+            },
+        },
+        'Globex': {},
+    },
+}
+
+
+def make_brand(name, *campaigns):
+    brand = Brand(name, monthly_budget=10000, daily_budget=1000)
+    for campaign in campaigns:
+        brand.add_campaign(Campaign(campaign, (0, 24)))
+    return brand
+
+
+class TestBudgetTree(unittest.TestCase):
+    def setUp(self):
+        self.tree = BudgetTree.from_config(CONFIG)
+        self.acme = make_brand('Acme', 'Brand Terms', 'Generic', 'Display', 'Untracked')
+        self.globex = make_brand('Globex', 'Campaign 1')
+        for brand in (self.acme, self.globex):
+            self.tree.attach(brand)
+            CampaignService(brand).update_for_time(datetime(2024, 1, 1, 10))
+        self.tree.roll_over(100, 10)
+
+    def campaign(self, brand, name):
+        return next(campaign for campaign in brand.campaigns if campaign.name == name)
+
+    def pause(self, crossed):
+        """Apply crossed nodes to their brands' campaigns, as the worker does under each brand's lock."""
+        for brand in self.tree.brands_under(crossed):
+            brand.daypart_index.invalidate()
+            CampaignService(brand).update_for_time(datetime(2024, 1, 1, 10))
+
+    def test_spend_rolls_up_to_every_ancestor(self):
+        leaf = self.tree.leaf_for('Acme', 'Brand Terms')
+        self.assertEqual(leaf.path, ('Acme', 'Search', 'Brand Terms'))
+        self.tree.post(leaf, to_micros(25))
+        self.tree.post(self.tree.leaf_for('Acme', 'Generic'), to_micros(10))
+        self.tree.post(self.tree.leaf_for('Globex'), to_micros(5))
+
+        self.assertEqual(self.tree.node(('Acme', 'Search')).daily_spend_micros, to_micros(35))
+        self.assertEqual(self.tree.node(('Acme', 'Search')).daily_headroom, to_micros(65))
+        self.assertEqual(self.tree.node(('Acme',)).daily_spend_micros, to_micros(35))
+        self.assertEqual(self.tree.root.daily_spend_micros, to_micros(40))
+        self.assertEqual(self.tree.root.daily_headroom, to_micros(960))
+        self.assertEqual(self.tree.headroom(leaf), to_micros(15))
+
+    def test_unknown_campaigns_post_at_the_brand(self):
+        self.assertIs(self.tree.leaf_for('Acme', 'Untracked'), self.tree.node(('Acme',)))
+        self.assertIs(self.tree.leaf_for('Acme', 'Search'), self.tree.node(('Acme',)))
+        self.assertIsNone(self.tree.leaf_for('Initech'))
+        self.assertIs(self.campaign(self.acme, 'Untracked').budget, self.tree.node(('Acme',)))
+
+    def test_exceeding_a_node_disables_only_its_subtree(self):
+        crossed = self.tree.post(self.tree.leaf_for('Acme', 'Brand Terms'), to_micros(40))
+        self.assertEqual([node.name for node in crossed], ['Brand Terms'])
+        # The tree only marks the subtree; statuses change when the brand is updated
+        self.assertTrue(self.campaign(self.acme, 'Brand Terms').is_active)
+        self.assertEqual(self.tree.brands_under(crossed), [self.acme])
+        self.pause(crossed)
+        self.assertFalse(self.campaign(self.acme, 'Brand Terms').is_active)
+        self.assertTrue(self.campaign(self.acme, 'Generic').is_active)
+
+        crossed = self.tree.post(self.tree.leaf_for('Acme', 'Generic'), to_micros(60))
+        self.assertEqual([node.name for node in crossed], ['Search'])
+        self.pause(crossed)
+        self.assertFalse(self.campaign(self.acme, 'Generic').is_active)
+        self.assertTrue(self.campaign(self.acme, 'Display').is_active)
+        self.assertTrue(self.campaign(self.globex, 'Campaign 1').is_active)
+
+        # A full check keeps them paused
+        CampaignService(self.acme).update_for_time(datetime(2024, 1, 1, 11))
+        self.assertEqual([campaign.name for campaign in self.acme.campaigns if campaign.is_active],
+                         ['Display', 'Untracked'])
+
+    def test_agency_budget_pauses_every_brand(self):
+        crossed = self.tree.post(self.tree.leaf_for('Globex'), to_micros(1000))
+        self.assertCountEqual(self.tree.brands_under(crossed), [self.acme, self.globex])
+        self.pause(crossed)
+        self.assertFalse(any(campaign.is_active for campaign in self.acme.campaigns + self.globex.campaigns))
+        self.assertFalse(self.globex.budget_exhausted)
+
+    def test_new_day_releases_exhausted_nodes(self):
+        self.pause(self.tree.post(self.tree.leaf_for('Acme', 'Display'), to_micros(500)))
+        self.pause(self.tree.post(self.tree.leaf_for('Acme', 'Brand Terms'), to_micros(50)))
+        self.assertFalse(self.campaign(self.acme, 'Brand Terms').is_active)
+        self.assertEqual(self.tree.roll_over(100, 10), [])
+
+        released = self.tree.roll_over(101, 10)
+        self.assertEqual(released, [self.acme])
+        self.assertEqual(self.tree.node(('Acme', 'Search', 'Brand Terms')).daily_spend_micros, 0)
+        self.assertEqual(self.tree.root.monthly_spend_micros, to_micros(550))
+        self.acme.daypart_index.invalidate()
+        CampaignService(self.acme).update_for_time(datetime(2024, 1, 2, 10))
+        self.assertTrue(self.campaign(self.acme, 'Brand Terms').is_active)
+        # Display is still over its monthly budget
+        self.assertFalse(self.campaign(self.acme, 'Display').is_active)
+
+        self.tree.roll_over(101, 11)
+        self.acme.daypart_index.invalidate()
+        CampaignService(self.acme).update_for_time(datetime(2024, 2, 1, 10))
+        self.assertTrue(self.campaign(self.acme, 'Display').is_active)
+
+    def test_attach_rebuilt_brand(self):
+        self.tree.post(self.tree.leaf_for('Acme', 'Brand Terms'), to_micros(40))
+        rebuilt = make_brand('Acme', 'Brand Terms', 'Generic')
+        self.tree.attach(rebuilt)
+        self.assertEqual(self.tree.node(('Acme', 'Search', 'Brand Terms')).campaigns, rebuilt.campaigns[:1])
+        CampaignService(rebuilt).update_for_time(datetime(2024, 1, 1, 10))
+        self.assertEqual([campaign.name for campaign in rebuilt.campaigns if campaign.is_active], ['Generic'])
+
+    def test_leaves_are_keyed_by_full_path(self):
+        tree = BudgetTree()
+        campaign = tree.add(('Acme', 'Display', 'Search'), 20)
+        group = tree.add(('Acme', 'Search'), 100)
+        tree.add(('Acme', 'Search', 'Brand Terms'), 40)
+        self.assertEqual(set(tree.leaves), {('Acme', 'Display', 'Search'), ('Acme', 'Search', 'Brand Terms')})
+        self.assertIs(tree.leaf_for('Acme', 'Search'), campaign)
+        self.assertIsNot(tree.leaf_for('Acme', 'Search'), group)
+
+        tree.add(('Acme', 'Video', 'Search'))
+        with self.assertRaises(ValueError):
+            tree.leaf_for('Acme', 'Search')
+
+    def test_counters_are_shared_through_the_store(self):
+        store = MemoryStore()
+        workers = [BudgetTree.from_config(CONFIG, store), BudgetTree.from_config(CONFIG, store)]
+        acme = make_brand('Acme', 'Brand Terms', 'Generic')
+        workers[1].attach(acme)
+        for tree in workers:
+            tree.roll_over(100, 10)
+
+        self.assertEqual(workers[0].post(workers[0].leaf_for('Acme', 'Brand Terms'), to_micros(30)), [])
+        crossed = workers[1].post(workers[1].leaf_for('Acme', 'Generic'), to_micros(70))
+        self.assertEqual([node.name for node in crossed], ['Search'])
+        self.assertEqual(workers[1].node(('Acme', 'Search')).daily_spend_micros, to_micros(100))
+        self.assertFalse(self.campaign(acme, 'Brand Terms').within_budget)
+
+        # The other worker catches up at its next sync
+        self.assertEqual([node.name for node in workers[0].sync()], ['Search'])
+        self.assertEqual(workers[0].root.daily_spend_micros, to_micros(100))
+
+        # A new day starts the shared counters afresh
+        workers[1].roll_over(101, 10)
+        self.assertEqual(workers[1].sync(), [])
+        self.assertEqual(workers[1].post(workers[1].leaf_for('Acme', 'Generic'), to_micros(5)), [])
+        self.assertEqual(workers[1].node(('Acme', 'Search')).daily_spend_micros, to_micros(5))
+        self.assertTrue(self.campaign(acme, 'Brand Terms').within_budget)
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'budgets.json')
+            with open(path, 'w') as f:
+                json.dump(CONFIG, f)
+            tree = BudgetTree.load(path)
+        self.assertEqual(tree.node(('Acme', 'Display')).monthly_budget_micros, to_micros(500))
+        self.assertEqual(tree.root.daily_headroom, to_micros(1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
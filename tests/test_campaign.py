@@ -1,6 +1,6 @@
 import unittest
 from datetime import datetime
-from src.models.campaign import Campaign
+from src.models.campaign import Campaign, hours_mask
 
 class TestCampaign(unittest.TestCase):
     def setUp(self):
@@ -52,6 +52,27 @@ class TestCampaign(unittest.TestCase):
         self.assertTrue(all_day_campaign.is_within_dayparting(midnight))
         self.assertTrue(all_day_campaign.is_within_dayparting(noon))
         self.assertTrue(all_day_campaign.is_within_dayparting(eleven_pm))
+    
+    def test_activation_mask(self):
+        self.assertEqual(self.campaign.activation_mask, hours_mask(9, 17))
+        self.assertEqual(bin(self.campaign.activation_mask).count("1"), 8)
+        self.assertEqual(hours_mask(0, 24), (1 << 24) - 1)
+        # Windows that wrap past midnight run overnight
+        self.assertEqual(hours_mask(22, 6), hours_mask(22, 24) | hours_mask(0, 6))
+        self.assertEqual(bin(hours_mask(22, 6)).count("1"), 8)
+    
+    def test_rejects_non_integer_hours(self):
+        for hours in ((9.5, 17), ("9", "17"), (9, None), (True, 17)):
+            with self.assertRaises(ValueError):
+                Campaign("Campaign 1", hours)
+    
+    def test_next_transition(self):
+        self.assertEqual(self.campaign.next_transition(datetime(2023, 1, 1, 8, 30)), datetime(2023, 1, 1, 9))
+        self.assertEqual(self.campaign.next_transition(datetime(2023, 1, 1, 9)), datetime(2023, 1, 1, 17))
+        self.assertEqual(self.campaign.next_transition(datetime(2023, 1, 1, 20)), datetime(2023, 1, 2, 9))
+        self.assertIsNone(Campaign("All Day", (0, 24)).next_transition(datetime(2023, 1, 1, 12)))
+        scheduled = Campaign("Lunch", "12:30-13:15")
+        self.assertEqual(scheduled.next_transition(datetime(2023, 1, 1, 12)), datetime(2023, 1, 1, 12, 30))
 
 if __name__ == "__main__":
     unittest.main()
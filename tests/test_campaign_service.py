@@ -102,6 +102,67 @@ class TestCampaignService(unittest.TestCase):
         # Check activation again
         self.campaign_service.activate_campaigns(daytime)
         self.assertTrue(self.campaign1.is_active)  # Should be active now
+    
+    def test_update_for_time_returns_changed_campaigns(self):
+        changed = self.campaign_service.update_for_time(datetime(2023, 1, 1, 10, 0))
+        self.assertEqual(changed, [self.campaign1, self.campaign3])
+        
+        # Same hour again: nothing to do
+        self.assertEqual(self.campaign_service.update_for_time(datetime(2023, 1, 1, 10, 30)), [])
+    
+    def test_update_for_time_only_touches_transitions(self):
+        self.campaign_service.update_for_time(datetime(2023, 1, 1, 16, 0))
+        
+        # Manually flipping All Day is not noticed: only the 17:00 transitions are checked
+        self.campaign3.deactivate()
+        changed = self.campaign_service.update_for_time(datetime(2023, 1, 1, 17, 0))
+        self.assertEqual(changed, [self.campaign1])
+        self.assertFalse(self.campaign1.is_active)
+        self.assertFalse(self.campaign3.is_active)
+        
+        # Skipping hours falls back to a full sweep
+        changed = self.campaign_service.update_for_time(datetime(2023, 1, 1, 20, 0))
+        self.assertEqual(changed, [self.campaign2, self.campaign3])
+    
+    def test_update_for_time_after_budget_change(self):
+        daytime = datetime(2023, 1, 1, 12, 0)
+        self.campaign_service.update_for_time(daytime)
+        
+        self.brand.current_daily_spend = 150
+        changed = self.campaign_service.update_for_time(daytime)
+        self.assertEqual(changed, [self.campaign1, self.campaign3])
+        
+        self.brand.reset_daily_budget()
+        changed = self.campaign_service.update_for_time(datetime(2023, 1, 1, 13, 0))
+        self.assertEqual(changed, [self.campaign1, self.campaign3])
+        self.assertTrue(self.campaign1.is_active)
+    
+    def test_update_for_time_after_deactivate_campaigns(self):
+        daytime = datetime(2023, 1, 1, 12, 0)
+        self.campaign_service.update_for_time(daytime)
+        self.campaign_service.deactivate_campaigns()
+        
+        changed = self.campaign_service.update_for_time(datetime(2023, 1, 1, 13, 0))
+        self.assertEqual(changed, [self.campaign1, self.campaign3])
+    
+    def test_update_for_time_evaluates_scheduled_campaigns_every_check(self):
+        late = Campaign(name="Late Shift", dayparting_hours='mon-fri 10:30-11:15')
+        self.brand.add_campaign(late)
+        
+        self.campaign_service.update_for_time(datetime(2024, 1, 1, 10, 0))
+        self.assertFalse(late.is_active)
+        # Same hour, so the hourly campaigns are skipped, but the schedule opened at 10:30
+        changed = self.campaign_service.update_for_time(datetime(2024, 1, 1, 10, 30))
+        self.assertEqual(changed, [late])
+        self.assertTrue(late.is_active)
+        
+        changed = self.campaign_service.update_for_time(datetime(2024, 1, 1, 11, 15))
+        self.assertEqual(changed, [late])
+        self.assertFalse(late.is_active)
+        
+        self.campaign_service.activate_campaigns(datetime(2024, 1, 6, 10, 45))
+        self.assertFalse(late.is_active)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
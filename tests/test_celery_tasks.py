@@ -2,7 +2,9 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
-from datetime import datetime
+import tempfile
+import threading
+from datetime import datetime, timezone
 
 # Add the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -10,16 +12,33 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from src.celery_tasks import (
     initialize_brand,
     update_brand_spend,
+    update_brand_spend_batch,
     reset_daily_budgets,
     reset_monthly_budgets,
     check_campaign_status,
-    brands
+    spend_dedup_stats,
+    evict_brands,
+    brands,
+    store,
+    spend_dedup
 )
+from src.logging_config import LogSampler
+from src.routing import HashRing
+from src.money import FxTable, to_micros
+from src.models.budget_tree import BudgetTree
+from src.services.dedup import StoreDedup
+from src.services.pacing import Pacer
+from src.services.scheduler import TransitionScheduler
+from src.stores.ledger import SpendLedger, recover
+from src.stores.memory_store import MemoryStore
+from src.stores.sqlite_store import SQLiteStore
 
 class TestCeleryTasks(unittest.TestCase):
     def setUp(self):
-        # Clear the brands dictionary before each test
+        # Clear the brands dictionary and the state store before each test
         brands.clear()
+        store.clear()
+        spend_dedup.clear()
     
     def test_initialize_brand(self):
         campaign_data = {
@@ -35,6 +54,18 @@ class TestCeleryTasks(unittest.TestCase):
         self.assertEqual(brands["Test Brand"].monthly_budget, 3000)
         self.assertEqual(brands["Test Brand"].daily_budget, 100)
     
+    def test_initialize_brand_with_schedule(self):
+        initialize_brand("Test Brand", 3000, 100, {"Weekdays": "mon-fri 09:00-17:30", "Day": (9, 17)})
+        
+        self.assertEqual(store.load_brand("Test Brand")['campaigns'],
+                         {"Weekdays": "mon-fri 09:00-17:30", "Day": [9, 17]})
+        # Another worker loads the campaigns back from the store
+        brands.clear()
+        update_brand_spend("Test Brand", 1)
+        brand = brands["Test Brand"]
+        self.assertTrue(brand.campaigns[0].is_within_dayparting(datetime(2024, 1, 1, 17, 15)))
+        self.assertFalse(brand.campaigns[1].is_within_dayparting(datetime(2024, 1, 1, 17, 15)))
+    
     def test_update_brand_spend_brand_exists(self):
         # First initialize a brand
         initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
@@ -46,6 +77,202 @@ class TestCeleryTasks(unittest.TestCase):
         self.assertEqual(brands["Test Brand"].current_daily_spend, 50)
         self.assertEqual(brands["Test Brand"].current_monthly_spend, 50)
     
+    def test_update_brand_spend_loads_brand_from_store(self):
+        # Brand initialized by another worker only exists in the shared store
+        store.save_brand("Shared Brand", 3000, 100, {"Campaign 1": [9, 17]})
+        store.add_spend("Shared Brand", to_micros(30))
+        
+        result = update_brand_spend("Shared Brand", 20)
+        
+        self.assertTrue(result)
+        self.assertEqual(brands["Shared Brand"].campaigns[0].dayparting_hours, (9, 17))
+        self.assertEqual(brands["Shared Brand"].current_daily_spend, 50)
+        self.assertEqual(store.get_spend(["Shared Brand"]), {"Shared Brand": (to_micros(50), to_micros(50))})
+    
+    def test_update_brand_spend_ignores_duplicate_event(self):
+        initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+        
+        self.assertTrue(update_brand_spend("Test Brand", 50, event_id="evt-1"))
+        self.assertTrue(update_brand_spend("Test Brand", 50, event_id="evt-1"))
+        update_brand_spend("Test Brand", 10)
+        update_brand_spend("Test Brand", 10)
+        
+        self.assertEqual(brands["Test Brand"].current_daily_spend, 70)
+        self.assertEqual(spend_dedup_stats()['duplicates'], 1)
+    
+    def test_update_brand_spend_batch_ignores_duplicate_events(self):
+        initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+        
+        result = update_brand_spend_batch([
+            ["Test Brand", 10, "2023-01-01T10:00:00", "evt-1"],
+            ["Test Brand", 10, "2023-01-01T10:00:00", "evt-1"],
+            ["Test Brand", 5, "2023-01-01T10:00:01"],
+        ])
+        self.assertEqual(result['duplicates'], 1)
+        
+        # Redelivery of the whole batch adds only the records without an ID
+        update_brand_spend_batch([["Test Brand", 10, "2023-01-01T10:00:00", "evt-1"]])
+        self.assertEqual(brands["Test Brand"].current_daily_spend, 15)
+    
+    def test_failed_spend_does_not_consume_event_ids(self):
+        initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+        
+        # An invalid record is skipped without failing the rest of the batch
+        with self.assertLogs('src.celery_tasks', 'ERROR'):
+            result = update_brand_spend_batch([["Test Brand", 10, "2023-01-01T10:00:00", "evt-1"],
+                                               ["Test Brand", float('nan'), "2023-01-01T10:00:00", "evt-2"],
+                                               ["Unknown Brand", 5, "2023-01-01T10:00:00", "evt-3"]])
+        self.assertEqual(result, {'crossed': [], 'unknown': ['Unknown Brand'], 'duplicates': 0})
+        self.assertEqual(brands["Test Brand"].current_daily_spend, 10)
+        
+        # A store failure releases the IDs it claimed, so the retry counts them
+        with patch.object(store, 'add_spend', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                update_brand_spend("Test Brand", 20, event_id="evt-4")
+            with self.assertRaises(ConnectionError):
+                update_brand_spend_batch([["Test Brand", 30, "2023-01-01T10:00:00", "evt-5"]])
+        initialize_brand("Unknown Brand", 3000, 100, {"Campaign 1": (9, 17)})
+        self.assertTrue(update_brand_spend("Test Brand", 20, event_id="evt-4"))
+        result = update_brand_spend_batch([["Test Brand", 10, "2023-01-01T10:00:00", "evt-1"],
+                                           ["Test Brand", 30, "2023-01-01T10:00:00", "evt-5"],
+                                           ["Unknown Brand", 5, "2023-01-01T10:00:00", "evt-3"]])
+        self.assertEqual(result['duplicates'], 1)
+        self.assertEqual(brands["Test Brand"].current_daily_spend, 60)
+        self.assertEqual(brands["Unknown Brand"].current_daily_spend, 5)
+    
+    def test_shared_store_dedups_across_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.db')
+            shared, other_process = SQLiteStore(path), SQLiteStore(path)
+            with patch('src.celery_tasks.store', shared), \
+                    patch('src.celery_tasks.spend_dedup', StoreDedup(shared)):
+                initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+                update_brand_spend("Test Brand", 10, event_id="evt-1")
+            # The redelivery lands on another worker process
+            brands.clear()
+            with patch('src.celery_tasks.store', other_process), \
+                    patch('src.celery_tasks.spend_dedup', StoreDedup(other_process)):
+                self.assertEqual(update_brand_spend_batch([["Test Brand", 10, "2023-01-01T10:00:00", "evt-1"]]),
+                                 {'crossed': [], 'unknown': [], 'duplicates': 1})
+            self.assertEqual(shared.get_spend(["Test Brand"]), {"Test Brand": (to_micros(10), to_micros(10))})
+            shared.close()
+            other_process.close()
+    
+    def test_spend_is_written_to_ledger(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ledger = SpendLedger(directory, group_interval=0)
+            with patch('src.celery_tasks.ledger', ledger):
+                initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+                update_brand_spend("Test Brand", 50)
+                update_brand_spend_batch([["Test Brand", 10, "2023-01-01T10:00:00"]])
+                reset_daily_budgets()
+                update_brand_spend("Test Brand", 5)
+            ledger.close()
+            
+            recovered = MemoryStore()
+            self.assertEqual(recover(directory, recovered), 5)
+            self.assertEqual(recovered.get_spend(["Test Brand"]), {"Test Brand": (to_micros(5), to_micros(65))})
+    
+    def test_ledger_opens_in_single_process_worker(self):
+        from celery.concurrency.prefork import TaskPool as PreforkPool
+        from src.celery_tasks import open_worker_ledger
+        with tempfile.TemporaryDirectory() as directory:
+            previous = SpendLedger(directory, group_interval=0)
+            previous.append_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+            previous.append_spend("Test Brand", to_micros(25))
+            previous.close()
+            
+            with patch('src.celery_tasks.LEDGER_DIR', directory), patch('src.celery_tasks.ledger', None), \
+                    patch('src.celery_tasks.atexit'):
+                with self.assertRaises(SystemExit):
+                    open_worker_ledger(sender=MagicMock(pool_cls=PreforkPool))
+                self.assertEqual(store.brand_names(), [])
+                
+                open_worker_ledger(sender=MagicMock(pool_cls='solo'))
+                from src import celery_tasks
+                opened = celery_tasks.ledger
+            opened.close()
+        self.assertEqual(store.get_spend(["Test Brand"]), {"Test Brand": (to_micros(25), to_micros(25))})
+    
+    def test_recovery_across_snapshots_keeps_all_spend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ledger = SpendLedger(directory, group_interval=0)
+            with patch('src.celery_tasks.ledger', ledger), patch('src.celery_tasks.SNAPSHOT_EVERY', 3):
+                initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17)})
+                update_brand_spend("Test Brand", 10)
+                update_brand_spend("Test Brand", 20)
+                self.assertEqual(ledger.records_since_snapshot, 0)
+                
+                def spend():
+                    for _ in range(50):
+                        update_brand_spend("Test Brand", 1)
+                
+                with patch('src.celery_tasks.logger'):
+                    threads = [threading.Thread(target=spend) for _ in range(4)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+            ledger.close()
+            
+            recovered = MemoryStore()
+            recover(directory, recovered)
+            self.assertEqual(store.get_spend(["Test Brand"]), {"Test Brand": (to_micros(230), to_micros(230))})
+            self.assertEqual(recovered.get_spend(["Test Brand"]), store.get_spend(["Test Brand"]))
+    
+    def test_concurrent_spend_updates_are_not_lost(self):
+        for i in range(4):
+            initialize_brand(f"Brand{i}", 10 ** 6, 10 ** 6, {"Campaign": (0, 24)})
+        
+        def spend(brand_name):
+            for _ in range(100):
+                update_brand_spend(brand_name, 1)
+        
+        with patch('src.celery_tasks.logger'):
+            threads = [threading.Thread(target=spend, args=(f"Brand{i % 4}",)) for i in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        for i in range(4):
+            self.assertEqual(brands[f"Brand{i}"].current_daily_spend, 400)
+            self.assertEqual(store.get_spend([f"Brand{i}"]), {f"Brand{i}": (to_micros(400), to_micros(400))})
+    
+    def test_evict_brands(self):
+        initialize_brand("Brand1", 3000, 100, {"Campaign 1": (9, 17)})
+        initialize_brand("Brand2", 3000, 100, {"Campaign 1": (9, 17)})
+        
+        self.assertEqual(evict_brands(["Brand1", "Missing"]), 1)
+        self.assertNotIn("Brand1", brands)
+        self.assertIn("Brand2", brands)
+    
+    def test_sync_loads_only_brands_of_owned_shards(self):
+        from src.celery_tasks import record_owned_queues
+        ring = HashRing(2)
+        names = [f"Brand{i}" for i in range(20)]
+        for name in names:
+            store.save_brand(name, 3000, 100, {"Campaign 1": [9, 17]})
+        worker = MagicMock()
+        worker.app.amqp.queues.consume_from = {'celery': None, 'brand-shard-1': None}
+        with patch('src.celery_tasks.brand_ring', ring), patch('src.celery_tasks.owned_queues', None):
+            record_owned_queues('worker@host', worker)
+            check_campaign_status()
+            owned = {name for name in names if ring.queue_for(name) == 'brand-shard-1'}
+            self.assertTrue(0 < len(owned) < len(names))
+            self.assertEqual(set(brands), owned)
+    
+    def test_scheduler_starts_in_worker_ready_only_without_prefork(self):
+        from celery.concurrency.prefork import TaskPool as PreforkPool
+        from celery.concurrency.solo import TaskPool as SoloPool
+        from src.celery_tasks import start_pool_campaign_scheduler
+        with patch('src.celery_tasks.start_campaign_scheduler') as start:
+            # Prefork children start theirs from worker_process_init
+            start_pool_campaign_scheduler(sender=MagicMock(pool=MagicMock(spec=PreforkPool)))
+            start.assert_not_called()
+            start_pool_campaign_scheduler(sender=MagicMock(pool=MagicMock(spec=SoloPool)))
+            start.assert_called_once_with()
+    
     def test_update_brand_spend_brand_not_found(self):
         # Try to update non-existent brand
         result = update_brand_spend("Nonexistent Brand", 50)
@@ -67,6 +294,43 @@ class TestCeleryTasks(unittest.TestCase):
         for campaign in brands["Test Brand"].campaigns:
             self.assertFalse(campaign.is_active)
     
+    def test_update_brand_spend_batch_aggregates_per_brand(self):
+        initialize_brand("Brand1", 3000, 100, {"Campaign 1": (9, 17)})
+        initialize_brand("Brand2", 2000, 200, {"Campaign 2": (0, 24)})
+        
+        records = [
+            ("Brand1", 20, "2023-01-01T10:00:00"),
+            ("Brand2", 30, "2023-01-01T10:00:01"),
+            ("Brand1", 25, "2023-01-01T10:00:02"),
+        ]
+        result = update_brand_spend_batch(records)
+        
+        self.assertEqual(result, {'crossed': [], 'unknown': [], 'duplicates': 0})
+        self.assertEqual(brands["Brand1"].current_daily_spend, 45)
+        self.assertEqual(brands["Brand1"].current_monthly_spend, 45)
+        self.assertEqual(brands["Brand2"].current_daily_spend, 30)
+    
+    def test_update_brand_spend_batch_reports_crossed_brands(self):
+        initialize_brand("Brand1", 3000, 100, {"Campaign 1": (9, 17)})
+        initialize_brand("Brand2", 2000, 200, {"Campaign 2": (0, 24)})
+        for campaign in brands["Brand1"].campaigns:
+            campaign.activate()
+        
+        records = [
+            ["Brand1", 60, "2023-01-01T10:00:00"],
+            ["Brand1", 60, "2023-01-01T10:00:01"],
+            ["Brand2", 10, "2023-01-01T10:00:02"],
+            ["Missing", 5, "2023-01-01T10:00:03"],
+        ]
+        result = update_brand_spend_batch(records)
+        
+        self.assertEqual(result, {'crossed': ["Brand1"], 'unknown': ["Missing"], 'duplicates': 0})
+        self.assertFalse(brands["Brand1"].campaigns[0].is_active)
+        
+        # A brand that was already over budget is not reported again
+        result = update_brand_spend_batch([["Brand1", 10, "2023-01-01T10:00:04"]])
+        self.assertEqual(result['crossed'], [])
+    
     def test_reset_daily_budgets(self):
         # Initialize brand and add some spend
         initialize_brand("Brand1", 3000, 100, {"Campaign 1": (9, 17)})
@@ -104,6 +368,191 @@ class TestCeleryTasks(unittest.TestCase):
         self.assertEqual(brands["Brand1"].current_monthly_spend, 0)
         self.assertEqual(brands["Brand2"].current_monthly_spend, 0)
     
+    @patch('src.celery_tasks.datetime')
+    def test_new_day_resets_brand_on_first_use(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 1, 2, 10, 0)
+        with patch('src.celery_tasks.current_periods', return_value=(100, 10)):
+            initialize_brand("Brand1", 3000, 100, {"Campaign 1": (0, 24)})
+            update_brand_spend("Brand1", 120)
+        self.assertTrue(brands["Brand1"].budget_exhausted)
+        self.assertFalse(brands["Brand1"].campaigns[0].is_active)
+        
+        # No reset task runs: the first spend of the next day starts it, and campaigns resume at once
+        with patch('src.celery_tasks.current_periods', return_value=(101, 10)):
+            update_brand_spend("Brand1", 10)
+        
+        self.assertEqual(brands["Brand1"].current_daily_spend, 10)
+        self.assertEqual(brands["Brand1"].current_monthly_spend, 130)
+        self.assertFalse(brands["Brand1"].budget_exhausted)
+        self.assertTrue(brands["Brand1"].campaigns[0].is_active)
+        self.assertEqual(store.get_spend(["Brand1"], 101, 10), {"Brand1": (to_micros(10), to_micros(130))})
+    
+    def test_new_period_applies_to_brands_loaded_from_store(self):
+        store.save_brand("Shared Brand", 3000, 100, {"Campaign 1": [0, 24]})
+        store.add_spend("Shared Brand", to_micros(150), 100, 10)
+        
+        with patch('src.celery_tasks.current_periods', return_value=(101, 10)):
+            update_brand_spend_batch([["Shared Brand", 5, "2023-01-02T10:00:00"]])
+        
+        self.assertEqual(brands["Shared Brand"].current_daily_spend, 5)
+        self.assertFalse(brands["Shared Brand"].budget_exhausted)
+    
+    @patch('src.celery_tasks.datetime')
+    def test_check_campaign_status_paces_brands(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 1, 1, 10, 0)
+        initialize_brand("Fast Brand", 3000, 100, {"Campaign 1": (0, 24)})
+        initialize_brand("Slow Brand", 3000, 100, {"Campaign 1": (0, 24)})
+        
+        pacer = Pacer(window=600, horizon=3600, clock=lambda: 1000.0)
+        with patch('src.celery_tasks.pacer', pacer):
+            update_brand_spend("Fast Brand", 60)  # $0.10/s: the last $40 lasts 400 s
+            update_brand_spend("Slow Brand", 1)
+            check_campaign_status()
+        
+        self.assertFalse(brands["Fast Brand"].budget_exhausted)
+        self.assertFalse(brands["Fast Brand"].campaigns[0].is_active)
+        self.assertTrue(brands["Slow Brand"].campaigns[0].is_active)
+        
+        # Without pacing the next check re-evaluates and resumes the brand
+        check_campaign_status()
+        self.assertTrue(brands["Fast Brand"].campaigns[0].is_active)
+    
+    @patch('src.celery_tasks.datetime')
+    def test_pacing_reports_net_changes(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 1, 1, 10, 0)
+        initialize_brand("Fast Brand", 3000, 100, {"Campaign 1": (0, 24), "Campaign 2": (11, 24)})
+        check_campaign_status()
+        
+        mock_datetime.now.return_value = datetime(2023, 1, 1, 11, 0)
+        pacer = Pacer(window=600, horizon=3600, clock=lambda: 1000.0)
+        with patch('src.celery_tasks.pacer', pacer):
+            update_brand_spend("Fast Brand", 60)
+            with self.assertLogs('src.celery_tasks', 'INFO') as logs:
+                check_campaign_status(log_mode='changes')
+        
+        self.assertFalse(any(campaign.is_active for campaign in brands["Fast Brand"].campaigns))
+        # Campaign 2 entered its hours and was paced in the same check: no change
+        self.assertTrue(any("Campaign 1: ❌ INACTIVE (DEACTIVATED)" in line for line in logs.output))
+        self.assertFalse(any("Campaign 2" in line for line in logs.output))
+        self.assertTrue(any("1 campaigns changed (0 activated, 1 deactivated)" in line for line in logs.output))
+    
+    def test_pacing_refuses_prefork_pool(self):
+        from celery.concurrency.prefork import TaskPool as PreforkPool
+        from src.celery_tasks import check_pacing_pool
+        with patch('src.celery_tasks.PACING_HORIZON', 3600.0):
+            with self.assertRaises(SystemExit):
+                check_pacing_pool(sender=MagicMock(pool_cls=PreforkPool))
+            check_pacing_pool(sender=MagicMock(pool_cls='threads'))
+        check_pacing_pool(sender=MagicMock(pool_cls=PreforkPool))
+    
+    @patch('src.celery_tasks.datetime')
+    def test_update_brand_spend_posts_to_budget_tree(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 1, 1, 10, 0)
+        tree = BudgetTree.from_config({'daily_budget': 500, 'children': {'Test Brand': {'children': {
+            'Search': {'daily_budget': 50, 'children': {'Campaign 1': {}, 'Campaign 2': {}}}}}}})
+        with patch('src.celery_tasks.budget_tree', tree), \
+                patch('src.celery_tasks.current_periods', return_value=(100, 10)):
+            initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (0, 24), "Campaign 2": (0, 24),
+                                                       "Campaign 3": (0, 24)})
+            check_campaign_status()
+            with self.assertLogs('src.celery_tasks', 'WARNING') as logs:
+                update_brand_spend("Test Brand", 30, campaign_name="Campaign 1")
+                update_brand_spend("Test Brand", 20, campaign_name="Campaign 2")
+            update_brand_spend_batch([["Test Brand", 5, "2023-01-01T10:00:00"]])
+        
+        self.assertIn("Test Brand/Search budget exhausted", "\n".join(logs.output))
+        brand = brands["Test Brand"]
+        self.assertEqual([campaign.is_active for campaign in brand.campaigns], [False, False, True])
+        self.assertFalse(brand.budget_exhausted)
+        self.assertEqual(tree.root.daily_spend_micros, to_micros(55))
+        self.assertEqual(tree.node(('Test Brand',)).daily_spend_micros, to_micros(55))
+        
+        # The next day the group's campaigns resume
+        with patch('src.celery_tasks.budget_tree', tree), \
+                patch('src.celery_tasks.current_periods', return_value=(101, 10)):
+            update_brand_spend("Test Brand", 1, campaign_name="Campaign 3")
+        self.assertTrue(all(campaign.is_active for campaign in brand.campaigns))
+    
+    def test_budget_tree_rolls_over_in_checks_and_scheduler(self):
+        from src.celery_tasks import brand_locks, refresh_exhausted_brand
+        tree = BudgetTree.from_config({'children': {'Test Brand': {'children': {
+            'Search': {'daily_budget': 50, 'children': {'Campaign 1': {}}}}}}})
+        scheduler = TransitionScheduler(refresh_exhausted_brand, is_current=lambda brand: brands.get(brand.name) is brand,
+                                        lock_for=brand_locks.for_brand)
+        with patch('src.celery_tasks.budget_tree', tree), \
+                patch('src.celery_tasks.current_periods', return_value=(100, 10)):
+            initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (0, 24), "Campaign 2": (0, 24)})
+            check_campaign_status()
+            with self.assertLogs('src.celery_tasks', 'WARNING'):
+                update_brand_spend("Test Brand", 50, campaign_name="Campaign 1")
+        
+        brand = brands["Test Brand"]
+        self.assertEqual([campaign.is_active for campaign in brand.campaigns], [False, True])
+        
+        # The hourly check starts the tree's new day without any spend arriving
+        with patch('src.celery_tasks.budget_tree', tree), \
+                patch('src.celery_tasks.current_periods', return_value=(101, 10)):
+            check_campaign_status()
+        self.assertEqual([campaign.is_active for campaign in brand.campaigns], [True, True])
+        
+        with patch('src.celery_tasks.budget_tree', tree), \
+                patch('src.celery_tasks.campaign_scheduler', scheduler), \
+                patch('src.celery_tasks.current_periods', return_value=(101, 10)):
+            with self.assertLogs('src.celery_tasks', 'WARNING'):
+                update_brand_spend("Test Brand", 60, campaign_name="Campaign 1")
+            # Pausing the group queues a refresh of its brand for the next budget day
+            self.assertEqual([entry[3] for entry in scheduler.heap].count(None), 1)
+        self.assertFalse(brand.campaigns[0].is_active)
+        
+        with patch('src.celery_tasks.budget_tree', tree), \
+                patch('src.celery_tasks.campaign_scheduler', scheduler), \
+                patch('src.celery_tasks.current_periods', return_value=(102, 10)):
+            scheduler.run_due(datetime(9999, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual([campaign.is_active for campaign in brand.campaigns], [True, True])
+        self.assertEqual(len(scheduler), 0)
+    
+    def test_update_brand_spend_converts_currency(self):
+        fx_rates = FxTable({'2023-01-01': {'EUR': '1.1'}})
+        initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (0, 24)})
+        with patch('src.celery_tasks.fx_rates', fx_rates), \
+                patch('src.celery_tasks.current_periods', return_value=(19358, 2023 * 12)):
+            self.assertTrue(update_brand_spend("Test Brand", 10, currency="EUR"))
+            update_brand_spend_batch([["Test Brand", 0.1, "2023-01-01T10:00:00", None, "EUR"],
+                                      ["Test Brand", 5, "2023-01-01T10:00:00", "evt-1", "USD"]])
+            # Spend in a currency without a rate is refused, not counted at par
+            with self.assertLogs('src.celery_tasks', 'ERROR'):
+                self.assertFalse(update_brand_spend("Test Brand", 10, currency="GBP"))
+        
+        brand = brands["Test Brand"]
+        self.assertEqual(brand.daily_spend_micros, to_micros('16.11'))
+        self.assertEqual(brand.current_daily_spend, 16.11)
+
+    def test_campaign_scheduler_tracks_brands_and_budget_resets(self):
+        from src.celery_tasks import brand_locks, refresh_exhausted_brand
+        scheduler = TransitionScheduler(refresh_exhausted_brand, is_current=lambda brand: brands.get(brand.name) is brand,
+                                        lock_for=brand_locks.for_brand)
+        with patch('src.celery_tasks.campaign_scheduler', scheduler), \
+                patch('src.celery_tasks.current_periods', return_value=(100, 10)):
+            # Only the 9-17 campaign ever changes with the time of day
+            initialize_brand("Test Brand", 3000, 100, {"Campaign 1": (9, 17), "Campaign 2": (0, 24)})
+            self.assertEqual(len(scheduler), 1)
+            
+            update_brand_spend("Test Brand", 100)
+            # Exhausting the budget queues a refresh for the next budget day
+            self.assertEqual([entry[3] for entry in scheduler.heap].count(None), 1)
+        
+        brand = brands["Test Brand"]
+        self.assertTrue(brand.budget_exhausted)
+        with patch('src.celery_tasks.current_periods', return_value=(101, 10)), \
+                patch('src.celery_tasks.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2023, 1, 2, 10, 0)
+            scheduler.run_due(datetime(9999, 1, 1, tzinfo=timezone.utc))
+        
+        self.assertFalse(brand.budget_exhausted)
+        self.assertEqual(brand.current_daily_spend, 0)
+        self.assertTrue(brand.campaigns[0].is_active)
+        self.assertEqual(len(scheduler), 1)
+    
     @patch('src.celery_tasks.datetime')
     def test_check_campaign_status(self, mock_datetime):
         # Set a fixed time for testing
@@ -128,6 +577,84 @@ class TestCeleryTasks(unittest.TestCase):
         self.assertTrue(day_campaign.is_active)
         self.assertFalse(night_campaign.is_active)
     
+    @patch('src.celery_tasks.datetime')
+    def test_check_campaign_status_log_modes(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 1, 1, 10, 0)
+        initialize_brand("Test Brand", 3000, 100, {
+            "Day Campaign": (9, 17),
+            "Night Campaign": (18, 23)
+        })
+        initialize_brand("Idle Brand", 3000, 100, {"Night Campaign": (18, 23)})
+        
+        with self.assertLogs('src.celery_tasks', 'INFO') as logs:
+            check_campaign_status(log_mode='changes')
+        lines = '\n'.join(logs.output)
+        self.assertIn("Day Campaign: ✅ ACTIVE (ACTIVATED)", lines)
+        self.assertNotIn("Idle Brand", lines)
+        
+        with self.assertLogs('src.celery_tasks', 'INFO') as logs:
+            check_campaign_status(log_mode='full')
+        lines = '\n'.join(logs.output)
+        self.assertIn("Day Campaign: ✅ ACTIVE", lines)
+        self.assertIn("Brand: Idle Brand", lines)
+        self.assertIn("Night Campaign: ❌ INACTIVE (outside dayparting hours 18:00-23:00)", lines)
+        
+        brands["Test Brand"].campaigns[0].deactivate()
+        brands["Test Brand"].daypart_index.invalidate()
+        with self.assertLogs('src.celery_tasks', 'INFO') as logs:
+            check_campaign_status(log_mode='summary')
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("1 campaigns changed (1 activated, 0 deactivated) across 2 brands", logs.output[-1])
+    
+    def test_update_brand_spend_status_lines_are_sampled_per_brand(self):
+        initialize_brand("Brand1", 3000, 1000, {})
+        initialize_brand("Brand2", 3000, 1000, {})
+        
+        with patch('src.celery_tasks.status_log_sampler', LogSampler(every=10)), \
+                self.assertLogs('src.celery_tasks', 'INFO') as logs:
+            for _ in range(20):
+                update_brand_spend("Brand1", 1)
+                update_brand_spend("Brand2", 1)
+        
+        updates = [line for line in logs.output if "Updating spend" in line]
+        self.assertEqual(len(updates), 4)
+        self.assertEqual(brands["Brand1"].current_daily_spend, 20)
+    
+    def test_spend_metrics(self):
+        from src import celery_tasks
+        initialize_brand("Brand1", 3000, 70, {})
+        events_before = celery_tasks.SPEND_EVENTS.value
+        duplicates_before = celery_tasks.DUPLICATE_SPEND_EVENTS.value
+        calls_before = celery_tasks.TASK_SECONDS.labels('update_brand_spend_batch').counts[:]
+        
+        update_brand_spend("Brand1", 60, event_id="e1")
+        update_brand_spend_batch([("Brand1", 30, "t", "e1"), ("Brand1", 20, "t"), ("Missing", 5, "t")])
+        
+        self.assertEqual(celery_tasks.SPEND_EVENTS.value - events_before, 2)
+        self.assertEqual(celery_tasks.DUPLICATE_SPEND_EVENTS.value - duplicates_before, 1)
+        self.assertEqual(sum(celery_tasks.TASK_SECONDS.labels('update_brand_spend_batch').counts) - sum(calls_before), 1)
+        self.assertIn('budget_brands_over_budget 1', celery_tasks.metrics.registry.render())
+    
+    def test_profiling_records_spend_stages_and_task_profiles(self):
+        from src import celery_tasks
+        from src.profiling import TaskProfiler
+        initialize_brand("Brand1", 3000, 100, {})
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profiler = TaskProfiler(1, tmpdir, mode='cprofile')
+            with patch('src.celery_tasks.profiler', profiler):
+                celery_tasks.start_task_profile(task_id='t1', task=update_brand_spend)
+                update_brand_spend("Brand1", 10)
+                celery_tasks.stop_task_profile(task_id='t1')
+                profiler.close()
+            
+            self.assertEqual(profiler.profiled, 1)
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, f'update_brand_spend.{os.getpid()}.prof')))
+        
+        for stage in ('lookup', 'budget_update', 'threshold_check', 'logging'):
+            counts = celery_tasks.TASK_STAGE_SECONDS.labels('update_brand_spend', stage).counts
+            self.assertGreaterEqual(sum(counts), 1, stage)
+    
     def test_check_campaign_status_no_brands(self):
         # Make sure no brands are initialized
         brands.clear()
@@ -2,12 +2,13 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import io
 
 # Add the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 class TestCLI(unittest.TestCase):
-    @patch('src.cli.initialize_brand')
+    @patch('src.celery_tasks.initialize_brand')
     def test_init_brand_command(self, mock_initialize_brand):
         # Set up mock for delay
         mock_initialize_brand.delay = MagicMock(return_value=None)
@@ -29,7 +30,7 @@ class TestCLI(unittest.TestCase):
             {'Campaign 1': (9, 17)}
         )
     
-    @patch('src.cli.update_brand_spend')
+    @patch('src.celery_tasks.update_brand_spend')
     def test_update_spend_command(self, mock_update_brand_spend):
         # Set up mock for delay
         mock_update_brand_spend.delay = MagicMock(return_value=None)
@@ -45,7 +46,119 @@ class TestCLI(unittest.TestCase):
         # Verify update_brand_spend.delay was called with correct arguments
         mock_update_brand_spend.delay.assert_called_once_with('Test Brand', 50.0)
     
-    @patch('src.cli.reset_daily_budgets')
+    @patch('src.celery_tasks.update_brand_spend')
+    def test_update_spend_command_with_event_id(self, mock_update_brand_spend):
+        mock_update_brand_spend.delay = MagicMock(return_value=None)
+        
+        from src.cli import main
+        
+        testargs = ['cli.py', 'update-spend', 'Test Brand', '50', '--event-id', 'evt-1']
+        with patch('sys.argv', testargs):
+            main()
+        
+        mock_update_brand_spend.delay.assert_called_once_with('Test Brand', 50.0, event_id='evt-1')
+    
+    @patch('src.celery_tasks.update_brand_spend')
+    def test_update_spend_command_with_campaign_and_currency(self, mock_update_brand_spend):
+        mock_update_brand_spend.delay = MagicMock(return_value=None)
+        
+        from src.cli import main
+        
+        testargs = ['cli.py', 'update-spend', 'Test Brand', '50', '--campaign', 'Campaign 1', '--currency', 'EUR']
+        with patch('sys.argv', testargs):
+            main()
+        
+        mock_update_brand_spend.delay.assert_called_once_with('Test Brand', 50.0, campaign_name='Campaign 1',
+                                                              currency='EUR')
+    
+    @patch('src.celery_tasks.update_brand_spend_batch')
+    def test_update_spend_batch_command(self, mock_update_brand_spend_batch):
+        # Set up mock for delay
+        mock_update_brand_spend_batch.delay = MagicMock(return_value=None)
+        
+        # Import after patching
+        from src.cli import main
+        
+        # Feed records through stdin
+        stdin = io.StringIO("Brand A,10,2023-01-01T10:00:00\n"
+                            "# comment\n"
+                            "Brand B,2.5,2023-01-01T10:00:01,evt-7\n"
+                            "Brand A,5,2023-01-01T10:00:02,,EUR\n")
+        testargs = ['cli.py', 'update-spend-batch', '--batch-size', '2']
+        with patch('sys.argv', testargs), patch('sys.stdin', stdin):
+            main()
+        
+        # Verify the records were split into batches
+        self.assertEqual(mock_update_brand_spend_batch.delay.call_count, 2)
+        mock_update_brand_spend_batch.delay.assert_any_call([
+            ('Brand A', 10.0, '2023-01-01T10:00:00'),
+            ('Brand B', 2.5, '2023-01-01T10:00:01', 'evt-7'),
+        ])
+        mock_update_brand_spend_batch.delay.assert_any_call([
+            ('Brand A', 5.0, '2023-01-01T10:00:02', None, 'EUR'),
+        ])
+    
+    @patch('src.celery_tasks.update_brand_spend_batch')
+    def test_update_spend_batch_rejects_bad_amounts(self, mock_update_brand_spend_batch):
+        mock_update_brand_spend_batch.delay = MagicMock(return_value=None)
+        
+        from src.cli import main
+        
+        for line in ("Brand B,nan\n", "Brand B,inf\n", "Brand B,-3\n", "Brand B\n"):
+            stdin = io.StringIO("Brand A,10\n" + line)
+            with patch('sys.argv', ['cli.py', 'update-spend-batch']), patch('sys.stdin', stdin):
+                with self.assertRaisesRegex(ValueError, 'line 2'):
+                    main()
+        
+        # Nothing is sent when any record in the file is invalid
+        mock_update_brand_spend_batch.delay.assert_not_called()
+    
+    @patch('src.celery_tasks.update_brand_spend_batch')
+    def test_update_spend_batch_command_sharded(self, mock_update_brand_spend_batch):
+        from src.cli import main
+        from src.routing import HashRing
+        
+        ring = HashRing(2)
+        stdin = io.StringIO("Brand A,10\nBrand B,2\nBrand A,5\n")
+        testargs = ['cli.py', 'update-spend-batch']
+        with patch('sys.argv', testargs), patch('sys.stdin', stdin), patch('src.celery_tasks.brand_ring', ring):
+            main()
+        
+        # Each shard queue receives only the records of the brands it owns
+        for call in mock_update_brand_spend_batch.apply_async.call_args_list:
+            (records,), = call.args
+            self.assertTrue(all(ring.queue_for(r[0]) == call.kwargs['queue'] for r in records))
+        sent = sum(len(call.args[0][0]) for call in mock_update_brand_spend_batch.apply_async.call_args_list)
+        self.assertEqual(sent, 3)
+    
+    @patch('src.celery_tasks.check_campaign_status')
+    def test_check_status_command_sharded(self, mock_check_campaign_status):
+        from src.cli import main
+        from src.routing import HashRing
+        
+        testargs = ['cli.py', 'check-status']
+        with patch('sys.argv', testargs), patch('src.celery_tasks.brand_ring', HashRing(3)):
+            main()
+        
+        self.assertEqual(mock_check_campaign_status.apply_async.call_count, 3)
+        mock_check_campaign_status.apply_async.assert_any_call(queue='brand-shard-2')
+    
+    @patch('src.celery_tasks.evict_brands')
+    def test_shard_plan_command(self, mock_evict_brands):
+        from src.cli import main
+        from src.routing import rebalance_plan
+        
+        brands = [f"Brand {i}" for i in range(100)]
+        stdin = io.StringIO("\n".join(brands) + "\n")
+        testargs = ['cli.py', 'shard-plan', '4', '5', '--evict']
+        with patch('sys.argv', testargs), patch('sys.stdin', stdin):
+            main()
+        
+        moves = rebalance_plan(brands, 4, 5)
+        evicted = [name for call in mock_evict_brands.apply_async.call_args_list for name in call.args[0][0]]
+        self.assertEqual(sorted(evicted), sorted(moves))
+    
+    @patch('src.celery_tasks.reset_daily_budgets')
     def test_reset_daily_command(self, mock_reset_daily_budgets):
         # Set up mock for delay
         mock_reset_daily_budgets.delay = MagicMock(return_value=None)
@@ -61,7 +174,7 @@ class TestCLI(unittest.TestCase):
         # Verify reset_daily_budgets.delay was called
         mock_reset_daily_budgets.delay.assert_called_once()
     
-    @patch('src.cli.reset_monthly_budgets')
+    @patch('src.celery_tasks.reset_monthly_budgets')
     def test_reset_monthly_command(self, mock_reset_monthly_budgets):
         # Set up mock for delay
         mock_reset_monthly_budgets.delay = MagicMock(return_value=None)
@@ -77,7 +190,7 @@ class TestCLI(unittest.TestCase):
         # Verify reset_monthly_budgets.delay was called
         mock_reset_monthly_budgets.delay.assert_called_once()
     
-    @patch('src.cli.check_campaign_status')
+    @patch('src.celery_tasks.check_campaign_status')
     def test_check_status_command(self, mock_check_campaign_status):
         # Set up mock for delay
         mock_check_campaign_status.delay = MagicMock(return_value=None)
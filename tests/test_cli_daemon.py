@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src import cli_client
+from src.cli_daemon import CLIDaemon
+
+
+class TestCLIDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, 'cli.sock')
+        self.server = CLIDaemon(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+    
+    def test_ping(self):
+        self.assertEqual(cli_client.send(['ping'], self.socket_path), {'ok': True})
+    
+    @patch('src.celery_tasks.update_brand_spend')
+    def test_update_spend_through_daemon(self, mock_update_brand_spend):
+        mock_update_brand_spend.delay = MagicMock(return_value=None)
+        
+        exit_code = cli_client.main(['--socket', self.socket_path, 'update-spend', 'Test Brand', '50'])
+        
+        self.assertEqual(exit_code, 0)
+        mock_update_brand_spend.delay.assert_called_once_with('Test Brand', 50.0)
+    
+    @patch('src.celery_tasks.update_brand_spend_batch')
+    def test_batch_reads_client_stdin(self, mock_update_brand_spend_batch):
+        mock_update_brand_spend_batch.delay = MagicMock(return_value=None)
+        
+        reply = cli_client.send(['update-spend-batch'], self.socket_path, stdin="Brand A,10,t1\nBrand B,5,t2\n")
+        
+        self.assertEqual(reply, {'ok': True})
+        mock_update_brand_spend_batch.delay.assert_called_once_with([('Brand A', 10.0, 't1'), ('Brand B', 5.0, 't2')])
+    
+    @patch('src.celery_tasks.update_brand_spend_batch')
+    def test_batch_file_relative_to_client_cwd(self, mock_update_brand_spend_batch):
+        mock_update_brand_spend_batch.delay = MagicMock(return_value=None)
+        with open(os.path.join(self.tmpdir.name, 'spend.csv'), 'w') as f:
+            f.write("Brand A,1,t1\n")
+        
+        with patch('os.getcwd', return_value=self.tmpdir.name):
+            reply = cli_client.send(['update-spend-batch', 'spend.csv'], self.socket_path)
+        
+        self.assertEqual(reply, {'ok': True})
+        mock_update_brand_spend_batch.delay.assert_called_once_with([('Brand A', 1.0, 't1')])
+    
+    def test_invalid_arguments(self):
+        with patch('sys.stderr', new=io.StringIO()):
+            reply = cli_client.send(['update-spend', 'Test Brand'], self.socket_path)
+            self.assertFalse(reply['ok'])
+            self.assertEqual(cli_client.main(['--socket', self.socket_path, 'serve']), 1)
+    
+    def test_daemon_not_running(self):
+        with patch('sys.stderr', new=io.StringIO()):
+            exit_code = cli_client.main(['--socket', os.path.join(self.tmpdir.name, 'missing.sock'), 'ping'])
+        self.assertEqual(exit_code, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from src.models.campaign import Campaign
+from src.models.daypart_index import DaypartIndex
+
+
+class TestDaypartIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = DaypartIndex()
+        self.day = Campaign(name="Day", dayparting_hours=(9, 17))
+        self.all_day = Campaign(name="All Day", dayparting_hours=(0, 24))
+        self.morning = Campaign(name="Morning", dayparting_hours=(0, 9))
+        self.index.add(self.day)
+        self.index.add(self.all_day)
+        self.index.add(self.morning)
+    
+    def test_opening_and_closing_hours(self):
+        self.assertEqual(self.index.changes_at(9), ([self.day], [self.morning]))
+        self.assertEqual(self.index.changes_at(17), ([], [self.day]))
+        self.assertEqual(self.index.changes_at(0), ([self.morning], []))
+    
+    def test_always_on_campaign_never_transitions(self):
+        for hour in range(24):
+            opening, closing = self.index.changes_at(hour)
+            self.assertNotIn(self.all_day, opening)
+            self.assertNotIn(self.all_day, closing)
+    
+    def test_add_and_invalidate_reset_applied_state(self):
+        self.index.applied = (10, True)
+        self.index.invalidate()
+        self.assertIsNone(self.index.applied)
+        
+        self.index.applied = (10, True)
+        self.index.add(Campaign(name="Late", dayparting_hours=(20, 23)))
+        self.assertIsNone(self.index.applied)
+
+if __name__ == "__main__":
+    unittest.main()
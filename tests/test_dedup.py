@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from src.services.dedup import DedupWindow, StoreDedup
+from src.stores.sqlite_store import SQLiteStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestDedupWindow(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.dedup = DedupWindow(window=60, max_entries=100, clock=self.clock)
+    
+    def test_duplicate_detected(self):
+        self.assertFalse(self.dedup.seen("evt-1"))
+        self.assertTrue(self.dedup.seen("evt-1"))
+        self.assertFalse(self.dedup.seen("evt-2"))
+    
+    def test_id_remembered_for_at_least_window(self):
+        self.dedup.seen("evt-1")
+        self.clock.now = 59
+        self.dedup.seen("evt-2")
+        self.clock.now = 100
+        # evt-1 moved to the previous generation but is still remembered
+        self.dedup.seen("evt-3")
+        self.assertTrue(self.dedup.seen("evt-1"))
+        
+        self.clock.now = 200
+        self.dedup.seen("evt-4")
+        self.assertFalse(self.dedup.seen("evt-1"))
+    
+    def test_memory_bound(self):
+        for i in range(1000):
+            self.dedup.seen(f"evt-{i}")
+        self.assertLessEqual(len(self.dedup), 100)
+        self.assertTrue(self.dedup.seen("evt-999"))
+    
+    def test_stats(self):
+        self.dedup.seen("evt-1")
+        self.dedup.seen("evt-1")
+        self.dedup.seen("evt-2")
+        self.dedup.seen("evt-1")
+        stats = self.dedup.stats()
+        self.assertEqual(stats['checked'], 4)
+        self.assertEqual(stats['duplicates'], 2)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['memory_bytes'], 0)
+    
+    def test_forget(self):
+        self.dedup.seen("evt-1")
+        self.dedup.forget("evt-1")
+        self.assertFalse(self.dedup.seen("evt-1"))
+    
+    def test_clear(self):
+        self.dedup.seen("evt-1")
+        self.dedup.seen("evt-1")
+        self.dedup.clear()
+        self.assertEqual(len(self.dedup), 0)
+        self.assertEqual(self.dedup.stats()['checked'], 0)
+        self.assertFalse(self.dedup.seen("evt-1"))
+
+
+class TestStoreDedup(unittest.TestCase):
+    def test_claims_are_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.db')
+            first, second = SQLiteStore(path), SQLiteStore(path)
+            dedup, other = StoreDedup(first, window=60), StoreDedup(second, window=60)
+            self.assertFalse(dedup.seen("evt-1"))
+            self.assertTrue(other.seen("evt-1"))
+            other.forget("evt-1")
+            self.assertFalse(other.seen("evt-1"))
+            self.assertEqual(other.stats()['hit_rate'], 0.5)
+            first.close()
+            second.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import random
+import unittest
+from datetime import datetime
+from src.models.campaign import Campaign
+from src.models.tables import BrandTable
+from src.services.campaign_service import CampaignService
+from src.services.fleet_evaluator import FleetEvaluator
+
+
+def random_fleet(rng, brand_count, max_campaigns):
+    table = BrandTable()
+    for i in range(brand_count):
+        brand = table.add_brand(f"Brand {i}", rng.choice([100, 1000, 3000]), rng.choice([10, 50, 100]))
+        brand.current_daily_spend = rng.choice([0, 5, 10, 50, 100, 150])
+        brand.current_monthly_spend = rng.choice([0, 500, 1000, 3000])
+        for j in range(rng.randint(0, max_campaigns)):
+            start = rng.randint(0, 24)
+            campaign = brand.add_campaign(Campaign(f"Campaign {i}-{j}", (start, rng.randint(start, 24))))
+            if rng.random() < 0.5:
+                campaign.activate()
+    return table
+
+
+class TestFleetEvaluator(unittest.TestCase):
+    def test_matches_campaign_service(self):
+        # Property check over many random fleets and times
+        rng = random.Random(1234)
+        for _ in range(50):
+            current_time = datetime(2023, 1, 1, rng.randint(0, 23), 30)
+            seed = rng.random()
+            vectorized = random_fleet(random.Random(seed), 20, 8)
+            expected = random_fleet(random.Random(seed), 20, 8)
+            before = list(expected.campaigns.is_active)
+            
+            changed = FleetEvaluator(vectorized).evaluate(current_time)
+            for brand in expected:
+                CampaignService(brand).activate_campaigns(current_time)
+            
+            self.assertEqual(list(vectorized.campaigns.is_active), list(expected.campaigns.is_active))
+            expected_changed = [row for row, (old, new) in enumerate(zip(before, expected.campaigns.is_active))
+                                if old != new]
+            self.assertEqual(changed.tolist(), expected_changed)
+    
+    def test_returns_only_changed_rows(self):
+        table = BrandTable()
+        brand = table.add_brand("Test Brand", 3000, 100)
+        day = brand.add_campaign(Campaign("Day Campaign", (9, 17)))
+        night = brand.add_campaign(Campaign("Night Campaign", (18, 23)))
+        evaluator = FleetEvaluator(table)
+        
+        self.assertEqual(evaluator.evaluate(datetime(2023, 1, 1, 10, 0)).tolist(), [day.row])
+        self.assertEqual(evaluator.evaluate(datetime(2023, 1, 1, 11, 0)).tolist(), [])
+        
+        brand.current_daily_spend = 100
+        self.assertEqual(evaluator.evaluate(datetime(2023, 1, 1, 11, 0)).tolist(), [day.row])
+        self.assertFalse(day.is_active)
+        self.assertFalse(night.is_active)
+    
+    def test_table_can_grow_after_evaluation(self):
+        table = BrandTable()
+        brand = table.add_brand("Test Brand", 3000, 100)
+        brand.add_campaign(Campaign("Day Campaign", (9, 17)))
+        FleetEvaluator(table).evaluate(datetime(2023, 1, 1, 10, 0))
+        
+        brand.add_campaign(Campaign("Night Campaign", (18, 23)))
+        table.add_brand("Other Brand", 500, 50)
+        self.assertEqual(len(table.campaigns), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import threading
+import unittest
+from src.gateway import IngestionGateway, SpendBuffer, LatencyTracker, parse_event
+
+
+async def request(port, method, path, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode()
+                 + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(payload)
+
+
+class TestGateway(unittest.TestCase):
+    def run_with_gateway(self, scenario, max_batch=1000, flush_interval=0.01, sink=None, **options):
+        batches = []
+        
+        async def run():
+            gateway = IngestionGateway(SpendBuffer(sink or batches.append, max_batch, flush_interval, **options))
+            port = await gateway.start('127.0.0.1', 0)
+            try:
+                return await scenario(gateway, port)
+            finally:
+                await gateway.stop()
+        
+        return asyncio.run(run()), batches
+    
+    def test_single_event(self):
+        async def scenario(gateway, port):
+            body = json.dumps({"brand": "Brand A", "amount": 2.5, "timestamp": "2023-01-01T10:00:00",
+                               "event_id": "evt-1"}).encode()
+            return await request(port, 'POST', '/spend', body)
+        
+        (status, payload), batches = self.run_with_gateway(scenario)
+        self.assertEqual(status, 202)
+        self.assertEqual(payload, {'accepted': 1})
+        self.assertEqual(batches, [[("Brand A", 2.5, "2023-01-01T10:00:00", "evt-1")]])
+    
+    def test_bulk_ndjson_flushes_by_size(self):
+        async def scenario(gateway, port):
+            lines = [json.dumps({"brand": f"Brand {i % 2}", "amount": 1, "timestamp": "t"}) for i in range(5)]
+            return await request(port, 'POST', '/spend/bulk', "\n".join(lines).encode())
+        
+        (status, payload), batches = self.run_with_gateway(scenario, max_batch=2)
+        self.assertEqual(status, 202)
+        self.assertEqual(payload, {'accepted': 5})
+        self.assertEqual(sum(len(batch) for batch in batches), 5)
+    
+    def test_flushes_by_time(self):
+        async def scenario(gateway, port):
+            await request(port, 'POST', '/spend', b'{"brand": "Brand A", "amount": 1}')
+            await asyncio.sleep(0.05)
+            return gateway.stats()
+        
+        stats, batches = self.run_with_gateway(scenario, max_batch=1000, flush_interval=0.01)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(stats['flushed'], 1)
+        self.assertEqual(stats['buffered'], 0)
+    
+    def test_stats_and_errors(self):
+        async def scenario(gateway, port):
+            bad = await request(port, 'POST', '/spend', b'{"amount": 1}')
+            missing = await request(port, 'GET', '/nope')
+            wrong_method = await request(port, 'GET', '/spend')
+            stats = await request(port, 'GET', '/stats')
+            return bad, missing, wrong_method, stats
+        
+        (bad, missing, wrong_method, stats), _batches = self.run_with_gateway(scenario)
+        self.assertEqual(bad[0], 400)
+        self.assertEqual(missing[0], 404)
+        self.assertEqual(wrong_method[0], 405)
+        self.assertEqual(stats[0], 200)
+        self.assertEqual(stats[1]['requests'], 3)
+        self.assertIn('latency_p99_ms', stats[1])
+    
+    def test_rejects_non_finite_and_negative_amounts(self):
+        async def scenario(gateway, port):
+            responses = []
+            for amount in (b'NaN', b'Infinity', b'-Infinity', b'"nan"', b'-2.5'):
+                body = b'{"brand": "Brand A", "amount": ' + amount + b'}'
+                responses.append(await request(port, 'POST', '/spend', body))
+            bulk = b'{"brand": "Brand A", "amount": 1}\n{"brand": "Brand B", "amount": NaN}'
+            responses.append(await request(port, 'POST', '/spend/bulk', bulk))
+            await asyncio.sleep(0.05)
+            return responses
+        
+        responses, batches = self.run_with_gateway(scenario)
+        self.assertEqual([status for status, _payload in responses], [400] * 6)
+        self.assertIn('non-negative', responses[0][1]['error'])
+        self.assertEqual(batches, [])
+    
+    def test_rejects_missing_or_non_string_brands(self):
+        async def scenario(gateway, port):
+            responses = []
+            for brand in (b'null', b'42', b'""', b'["Brand A"]'):
+                responses.append(await request(port, 'POST', '/spend', b'{"brand": ' + brand + b', "amount": 1}'))
+            bulk = b'{"brand": "Brand A", "amount": 1}\n{"brand": null, "amount": 1}'
+            responses.append(await request(port, 'POST', '/spend/bulk', bulk))
+            await asyncio.sleep(0.05)
+            return responses
+        
+        responses, batches = self.run_with_gateway(scenario)
+        self.assertEqual([status for status, _payload in responses], [400] * 5)
+        self.assertIn('non-empty string', responses[0][1]['error'])
+        self.assertEqual(batches, [])
+    
+    def test_failed_batches_are_retried(self):
+        batches = []
+        failures = [ConnectionError("broker down")] * 2
+        
+        def sink(records):
+            if failures:
+                raise failures.pop()
+            batches.append(records)
+        
+        async def scenario(gateway, port):
+            await request(port, 'POST', '/spend', b'{"brand": "Brand A", "amount": 1, "timestamp": "t"}')
+            await asyncio.sleep(0.1)
+            return gateway.stats()
+        
+        stats, _batches = self.run_with_gateway(scenario, sink=sink, retry_delay=0.01)
+        self.assertEqual(batches, [[("Brand A", 1.0, "t")]])
+        self.assertEqual((stats['flushed'], stats['retried'], stats['dropped']), (1, 2, 0))
+    
+    def test_batches_are_dropped_after_max_retries(self):
+        def sink(records):
+            raise ConnectionError("broker down")
+        
+        async def scenario(gateway, port):
+            await request(port, 'POST', '/spend', b'{"brand": "Brand A", "amount": 1}')
+            await gateway.buffer.drain()
+            return gateway.stats()
+        
+        with self.assertLogs('src.gateway', 'ERROR'):
+            stats, _batches = self.run_with_gateway(scenario, sink=sink, max_retries=2, retry_delay=10)
+        self.assertEqual((stats['flushed'], stats['retried'], stats['dropped'], stats['buffered']), (0, 2, 1, 0))
+    
+    def test_full_buffer_returns_503(self):
+        release = threading.Event()
+        batches = []
+        
+        def sink(records):
+            release.wait(5)
+            batches.append(records)
+        
+        async def scenario(gateway, port):
+            event = b'{"brand": "Brand A", "amount": 1}'
+            # The first batch occupies the only executor slot; the next two wait in the buffer
+            statuses = [(await request(port, 'POST', '/spend', event))[0] for _ in range(3)]
+            await asyncio.sleep(0.05)
+            rejected = await request(port, 'POST', '/spend', event)
+            release.set()
+            await gateway.buffer.drain()
+            accepted = await request(port, 'POST', '/spend', event)
+            return statuses, rejected, accepted
+        
+        (statuses, rejected, accepted), _batches = self.run_with_gateway(
+            scenario, max_batch=1, sink=sink, max_inflight=1, max_buffered=2)
+        self.assertEqual(statuses, [202] * 3)
+        self.assertEqual(rejected[0], 503)
+        self.assertEqual(accepted[0], 202)
+        self.assertEqual(sum(len(batch) for batch in batches), 4)
+
+
+class TestHelpers(unittest.TestCase):
+    def test_parse_event(self):
+        self.assertEqual(parse_event({"brand": "B", "amount": "3", "timestamp": "t"}), ("B", 3.0, "t"))
+        self.assertEqual(parse_event({"brand": "B", "amount": 3, "timestamp": "t", "currency": "EUR"}),
+                         ("B", 3.0, "t", None, "EUR"))
+        with self.assertRaises(KeyError):
+            parse_event({"amount": 1})
+        for brand in (None, 42, ""):
+            with self.assertRaises(ValueError):
+                parse_event({"brand": brand, "amount": 1})
+        for amount in (float('nan'), float('inf'), '-inf', -1):
+            with self.assertRaises(ValueError):
+                parse_event({"brand": "B", "amount": amount})
+        self.assertEqual(parse_event({"brand": "B", "amount": 0, "timestamp": "t"}), ("B", 0.0, "t"))
+    
+    def test_latency_percentiles(self):
+        tracker = LatencyTracker(size=100)
+        self.assertEqual(tracker.percentile(0.5), 0.0)
+        for i in range(1, 101):
+            tracker.observe(i)
+        self.assertEqual(tracker.percentile(0.5), 51)
+        self.assertEqual(tracker.percentile(0.99), 100)
+
+if __name__ == "__main__":
+    unittest.main()
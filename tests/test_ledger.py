@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from src.stores.ledger import (
+    SpendLedger, RESET_DAILY, SPEND, SPEND_MICROS, read_records, recover, load_snapshot, write_snapshot
+)
+from src.stores.memory_store import MemoryStore
+
+
+class TestSpendLedger(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+        self.ledger = SpendLedger(self.directory, group_size=4, group_interval=0)
+    
+    def tearDown(self):
+        self.ledger.close()
+        self.tmpdir.cleanup()
+    
+    def segment_path(self):
+        return os.path.join(self.directory, f'ledger-{self.ledger.segment:08d}.bin')
+    
+    def test_records_round_trip(self):
+        self.ledger.append_brand("Brand A", 3000, 100, {"Campaign 1": (9, 17)})
+        self.ledger.append_spend("Brand A", 12500000, timestamp=1000.0)
+        self.ledger.append(RESET_DAILY)
+        self.ledger.sync()
+        
+        records = list(read_records(self.segment_path()))
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[1], (SPEND_MICROS, "Brand A", 12500000, 1000.0, b''))
+        self.assertEqual(records[2][0], RESET_DAILY)
+    
+    def test_group_commit(self):
+        for _ in range(10):
+            self.ledger.append_spend("Brand A", 1)
+        # Two full groups of four were synced, two records are still pending
+        self.assertEqual(self.ledger.syncs, 2)
+        self.ledger.sync()
+        self.assertEqual(self.ledger.syncs, 3)
+    
+    def test_recover_replays_ledger(self):
+        self.ledger.append_brand("Brand A", 3000, 100, {"Campaign 1": (9, 17)})
+        self.ledger.append_spend("Brand A", 30)
+        self.ledger.append_spend("Brand A", 20)
+        self.ledger.append(RESET_DAILY)
+        self.ledger.append_spend("Brand A", 5)
+        self.ledger.append_spend("Unknown", 5)
+        self.ledger.sync()
+        
+        store = MemoryStore()
+        self.assertEqual(recover(self.directory, store), 6)
+        self.assertEqual(store.get_spend(["Brand A"]), {"Brand A": (5, 55)})
+        self.assertEqual(store.load_brand("Brand A")['campaigns'], {"Campaign 1": [9, 17]})
+    
+    def test_snapshot_and_tail(self):
+        store = MemoryStore()
+        store.save_brand("Brand A", 3000, 100, {})
+        self.ledger.append_brand("Brand A", 3000, 100, {})
+        self.ledger.append_spend("Brand A", 40)
+        store.add_spend("Brand A", 40)
+        
+        self.ledger.snapshot(store)
+        self.assertEqual(load_snapshot(self.directory)['segment'], self.ledger.segment)
+        self.assertEqual(os.listdir(self.directory).count('ledger-00000001.bin'), 0)
+        
+        self.ledger.append_spend("Brand A", 2)
+        self.ledger.sync()
+        
+        recovered = MemoryStore()
+        self.assertEqual(recover(self.directory, recovered), 1)
+        self.assertEqual(recovered.get_spend(["Brand A"]), {"Brand A": (42, 42)})
+    
+    def test_torn_tail_is_ignored_and_truncated(self):
+        self.ledger.append_brand("Brand A", 3000, 100, {})
+        self.ledger.append_spend("Brand A", 10)
+        self.ledger.close()
+        with open(self.segment_path(), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        
+        store = MemoryStore()
+        self.assertEqual(recover(self.directory, store), 2)
+        
+        # Reopening truncates the garbage so new records stay readable
+        self.ledger = SpendLedger(self.directory, group_interval=0)
+        self.ledger.append_spend("Brand A", 5)
+        self.ledger.sync()
+        store = MemoryStore()
+        recover(self.directory, store)
+        self.assertEqual(store.get_spend(["Brand A"]), {"Brand A": (15, 15)})
+    
+    def test_one_writer_per_directory(self):
+        with self.assertRaises(RuntimeError):
+            SpendLedger(self.directory, group_interval=0)
+        self.ledger.close()
+        self.ledger = SpendLedger(self.directory, group_interval=0)
+    
+    def test_recover_converts_currency_unit_records(self):
+        # Snapshots and spend records from before integer micros held currency units
+        write_snapshot(self.directory, {'segment': 1, 'brands': {"Brand A": {
+            'monthly_budget': 3000, 'daily_budget': 100, 'campaigns': {}, 'daily_spend': 1.5, 'monthly_spend': 40.1}}})
+        self.ledger.append(SPEND, "Brand A", 0.1)
+        self.ledger.append_spend("Brand A", 200000)
+        self.ledger.sync()
+        
+        store = MemoryStore()
+        recover(self.directory, store)
+        self.assertEqual(store.get_spend(["Brand A"]), {"Brand A": (1800000, 40400000)})
+    
+    def test_recover_missing_directory(self):
+        self.assertEqual(recover(os.path.join(self.directory, 'missing'), MemoryStore()), 0)
+
+if __name__ == "__main__":
+    unittest.main()
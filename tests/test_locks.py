@@ -0,0 +1,60 @@
+import sys
+import threading
+import unittest
+from src.models.brand import Brand
+from src.services.budget_service import BudgetService
+from src.services.events import EventBus
+from src.services.locks import LockStripes
+
+
+class TestLockStripes(unittest.TestCase):
+    def test_same_brand_same_lock(self):
+        locks = LockStripes(8)
+        self.assertEqual(len(locks), 8)
+        self.assertIs(locks.for_brand("Brand A"), locks.for_brand("Brand A"))
+    
+    def test_locks_are_reentrant(self):
+        locks = LockStripes(4)
+        with locks.for_brand("Brand A"):
+            with locks.for_brand("Brand A"):
+                pass
+        with locks.all():
+            with locks.for_brand("Brand A"):
+                pass
+    
+    def test_no_lost_updates_under_contention(self):
+        locks = LockStripes(16)
+        events = EventBus()
+        received = []
+        events.subscribe(received.append)
+        brands = [Brand(f"Brand {i}", 10 ** 9, 4000) for i in range(4)]
+        threads_per_brand = 4
+        updates_per_thread = 1000
+        
+        def spend(brand):
+            service = BudgetService(brand, events=events)
+            for _ in range(updates_per_thread):
+                with locks.for_brand(brand.name):
+                    service.update_daily_spend(1)
+                    service.update_monthly_spend(1)
+        
+        previous_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=spend, args=(brand,))
+                       for brand in brands for _ in range(threads_per_brand)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(previous_interval)
+        
+        for brand in brands:
+            self.assertEqual(brand.current_daily_spend, threads_per_brand * updates_per_thread)
+            self.assertEqual(brand.current_monthly_spend, threads_per_brand * updates_per_thread)
+        # Each brand crossed its daily budget exactly once
+        self.assertEqual(len(received), len(brands))
+
+if __name__ == "__main__":
+    unittest.main()
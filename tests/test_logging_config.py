@@ -0,0 +1,92 @@
+import unittest
+import io
+import logging
+import sys
+import os
+import tempfile
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logging_config import LogSampler
+from src.log_queue import DeferredQueueHandler, enqueue_handlers, stop_listeners
+
+
+class TestLogSampler(unittest.TestCase):
+    def test_lets_through_one_in_every_per_key(self):
+        sampler = LogSampler(every=3)
+        
+        passed = [sampler('Brand A') for _ in range(7)]
+        
+        self.assertEqual(passed, [True, False, False, True, False, False, True])
+        self.assertTrue(sampler('Brand B'))
+        self.assertEqual(sampler.suppressed, 4)
+    
+    def test_every_one_logs_everything(self):
+        sampler = LogSampler()
+        
+        self.assertTrue(all(sampler('Brand A') for _ in range(5)))
+        self.assertEqual(sampler.counts, {})
+
+
+class TestLogQueue(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.logger = logging.getLogger('test_log_queue')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(handler)
+    
+    def tearDown(self):
+        for handler in self.logger.handlers[:]:
+            self.logger.removeHandler(handler)
+    
+    def test_records_are_written_by_the_listener(self):
+        listener = enqueue_handlers(self.logger)
+        
+        self.assertIsInstance(self.logger.handlers[0], DeferredQueueHandler)
+        self.logger.info("Spend for %s: $%s", "Brand A", 50)
+        listener.stop()
+        
+        self.assertEqual(self.stream.getvalue(), "INFO Spend for Brand A: $50\n")
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_forked_child_starts_its_own_listener(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'worker.log')
+            for handler in self.logger.handlers[:]:
+                self.logger.removeHandler(handler)
+            self.logger.addHandler(logging.FileHandler(path))
+            listener = enqueue_handlers(self.logger)
+            self.logger.info("from the parent")
+            
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self.logger.info("from the child")
+                    stop_listeners(self.logger)
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+            listener.stop()
+            self.logger.handlers[0].targets[0].close()
+            
+            with open(path) as f:
+                lines = f.read().splitlines()
+        self.assertEqual(sorted(lines), ["from the child", "from the parent"])
+    
+    def test_records_are_enqueued_unformatted(self):
+        handler = DeferredQueueHandler(None)
+        record = self.logger.makeRecord('test', logging.INFO, __file__, 1, "Spend %s", ("Brand A",), None)
+        
+        prepared = handler.prepare(record)
+        
+        self.assertIs(prepared, record)
+        self.assertEqual(prepared.msg, "Spend %s")
+        self.assertEqual(prepared.args, ("Brand A",))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,7 @@ class TestMain(unittest.TestCase):
         # Configure the mock for parse_args
         args = MagicMock()
         args.simulate = True
+        args.fleet = False
         args.spend = 75.0
         mock_parse_args.return_value = args
         
@@ -33,6 +34,7 @@ class TestMain(unittest.TestCase):
         # Configure the mock for parse_args
         args = MagicMock()
         args.simulate = False
+        args.fleet = False
         mock_parse_args.return_value = args
         
         # Import the module after patching
@@ -47,7 +49,11 @@ class TestMain(unittest.TestCase):
     @patch('src.main.datetime')
     def test_simulate_day(self, mock_datetime):
         # Import the module after patching
-        from src.main import Brand, Campaign, BudgetService, CampaignService, simulate_day
+        from src.main import simulate_day
+        from src.models.brand import Brand
+        from src.models.campaign import Campaign
+        from src.services.budget_service import BudgetService
+        from src.services.campaign_service import CampaignService
         
         # Fix the time for testing
         morning = datetime(2023, 1, 1, 9, 0)
@@ -65,7 +71,7 @@ class TestMain(unittest.TestCase):
         campaign_service = CampaignService(brand)
         
         # Capture stdout to verify log messages
-        with patch('sys.stdout', new=io.StringIO()) as fake_out:
+        with patch('sys.stdout', new=io.StringIO()):
             simulate_day(brand, budget_service, campaign_service, 50.0)
             
             # Verify the spend was updated
@@ -74,7 +80,7 @@ class TestMain(unittest.TestCase):
     
     def test_brand_check_budget(self):
         # Import the module
-        from src.main import Brand
+        from src.models.brand import Brand
         
         # Create a brand
         brand = Brand("Test", 1000, 100)
@@ -92,6 +98,18 @@ class TestMain(unittest.TestCase):
         
         brand.current_monthly_spend = 1000
         self.assertTrue(brand.check_monthly_budget())
+    
+    @patch('sys.stderr', new_callable=io.StringIO)
+    @patch('src.main.simulate_fleet')
+    def test_fleet_rejects_zero_workers_or_brands(self, mock_simulate_fleet, mock_stderr):
+        from src.main import main
+        
+        for argv in (['--fleet', '--workers', '0'], ['--fleet', '--brands', '0'], ['--fleet', '--days', '-1']):
+            with patch('sys.argv', ['main.py'] + argv):
+                with self.assertRaises(SystemExit):
+                    main()
+        self.assertIn('must be at least 1', mock_stderr.getvalue())
+        mock_simulate_fleet.assert_not_called()
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import threading
+import urllib.request
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import Counter, Gauge, Histogram, Registry, start_http_server, timed
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+    
+    def test_counter_with_labels(self):
+        changes = Counter('campaign_changes_total', 'Campaign changes', ['direction'], registry=self.registry)
+        changes.labels('activated').inc()
+        changes.labels('activated').inc(2)
+        changes.labels('deactivated').inc()
+        
+        text = self.registry.render()
+        
+        self.assertIn('# TYPE campaign_changes_total counter', text)
+        self.assertIn('campaign_changes_total{direction="activated"} 3', text)
+        self.assertIn('campaign_changes_total{direction="deactivated"} 1', text)
+    
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram('task_seconds', 'Task latency', registry=self.registry, buckets=(0.001, 0.01))
+        for value in (0.0005, 0.001, 0.005, 0.5):
+            latency.observe(value)
+        
+        text = self.registry.render()
+        
+        self.assertIn('task_seconds_bucket{le="0.001"} 2', text)
+        self.assertIn('task_seconds_bucket{le="0.01"} 3', text)
+        self.assertIn('task_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('task_seconds_count 4', text)
+        self.assertIn('task_seconds_sum 0.5065', text)
+    
+    def test_gauge_function_is_evaluated_on_render(self):
+        brands = {'Brand A': 40.0}
+        Gauge('headroom', 'Budget left', ['brand'], registry=self.registry,
+              function=lambda: {(name,): value for name, value in brands.items()})
+        over_budget = Gauge('over_budget', 'Brands over budget', registry=self.registry)
+        over_budget.set(2)
+        
+        brands['Brand "B"'] = 0.0
+        text = self.registry.render()
+        
+        self.assertIn('headroom{brand="Brand A"} 40.0', text)
+        self.assertIn('headroom{brand="Brand \\"B\\""} 0.0', text)
+        self.assertIn('over_budget 2', text)
+    
+    def test_concurrent_increments_are_not_lost(self):
+        events = Counter('events_total', 'Events', registry=self.registry)
+        latency = Histogram('task_seconds', 'Task latency', registry=self.registry, buckets=(1,))
+        
+        def record():
+            for _ in range(10000):
+                events.inc()
+                latency.observe(0.5)
+        
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(events.value, 80000)
+        self.assertEqual(latency.counts, [80000, 0])
+    
+    def test_duplicate_names_are_rejected(self):
+        Counter('events_total', 'Events', registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter('events_total', 'Events', registry=self.registry)
+    
+    def test_timed_records_calls(self):
+        latency = Histogram('call_seconds', 'Call latency', ['call'], registry=self.registry)
+        
+        @timed(latency.labels('double'))
+        def double(value):
+            return value * 2
+        
+        self.assertEqual(double(21), 42)
+        self.assertEqual(double.__name__, 'double')
+        self.assertIn('call_seconds_count{call="double"} 1', self.registry.render())
+    
+    def test_http_endpoint(self):
+        Counter('events_total', 'Events', registry=self.registry).inc(5)
+        server = start_http_server(0, registry=self.registry)
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+                content_type = response.headers['Content-Type']
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        self.assertTrue(content_type.startswith('text/plain'))
+        self.assertIn('events_total 5', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from src.money import FxTable, from_micros, parse_amount, to_micros
+
+JAN_1 = (date(2024, 1, 1) - date(1970, 1, 1)).days
+
+RATES = {
+    '2024-01-01': {'EUR': '1.10', 'JPY': '0.0068'},
+    '2024-01-15': {'EUR': 1.05},
+}
+
+
+class TestMicros(unittest.TestCase):
+    def test_to_micros(self):
+        self.assertEqual(to_micros(12), 12000000)
+        self.assertEqual(to_micros(0.1), 100000)
+        self.assertEqual(to_micros('19.999999'), 19999999)
+        self.assertEqual(to_micros(Decimal('0.0000005')), 0)
+        self.assertEqual(to_micros(Decimal('0.0000015')), 2)
+        self.assertEqual(from_micros(2500000), 2.5)
+
+    def test_repeated_increments_do_not_drift(self):
+        micros = 0
+        total = 0.0
+        for _ in range(1000):
+            micros += to_micros(0.1)
+            total += 0.1
+        self.assertEqual(micros, to_micros(100))
+        self.assertNotEqual(total, 100.0)
+
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount('2.5'), 2.5)
+        self.assertEqual(parse_amount(0), 0.0)
+        for amount in ('nan', 'inf', float('-inf'), -0.01, 'abc'):
+            with self.assertRaises(ValueError):
+                parse_amount(amount)
+
+
+class TestFxTable(unittest.TestCase):
+    def setUp(self):
+        self.table = FxTable(RATES)
+
+    def test_rates_in_force_on_a_day(self):
+        self.assertEqual(self.table.to_base(to_micros(10), 'EUR', JAN_1), to_micros(11))
+        self.assertEqual(self.table.to_base(to_micros(10), 'EUR', JAN_1 + 13), to_micros(11))
+        self.assertEqual(self.table.to_base(to_micros(10), 'EUR', JAN_1 + 20), to_micros(10.5))
+        self.assertEqual(self.table.to_base(to_micros(1000), 'JPY', JAN_1 + 20), to_micros(6.8))
+
+    def test_base_currency_is_unchanged(self):
+        self.assertEqual(self.table.to_base(123, 'USD', JAN_1 - 1), 123)
+        self.assertEqual(self.table.to_base(123, None, JAN_1), 123)
+
+    def test_rounds_to_the_nearest_micro(self):
+        self.assertEqual(self.table.to_base(1, 'JPY', JAN_1), 0)
+        self.assertEqual(self.table.to_base(74, 'JPY', JAN_1), 1)
+
+    def test_missing_rate_raises(self):
+        with self.assertRaises(ValueError):
+            self.table.to_base(to_micros(10), 'EUR', JAN_1 - 1)
+        with self.assertRaises(ValueError):
+            self.table.to_base(to_micros(10), 'GBP', JAN_1)
+
+    def test_rates_are_resolved_once_per_day(self):
+        rates = self.table.rates_for(JAN_1 + 3)
+        self.assertIs(self.table.rates_for(JAN_1 + 3), rates)
+        self.assertIsNot(self.table.rates_for(JAN_1 + 4), rates)
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rates.json')
+            with open(path, 'w') as f:
+                json.dump({'base': 'EUR', 'rates': {'2024-01-01': {'USD': '0.9'}}}, f)
+            table = FxTable.load(path)
+        self.assertEqual(table.base, 'EUR')
+        self.assertEqual(table.to_base(to_micros(10), 'USD', JAN_1), to_micros(9))
+        self.assertEqual(table.to_base(to_micros(10), 'EUR', JAN_1), to_micros(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import math
+
+from src.models.brand import Brand
+from src.services.pacing import Pacer, SpendRate
+
+
+class TestSpendRate(unittest.TestCase):
+    def test_converges_to_steady_rate(self):
+        rate = SpendRate(window=600)
+        for second in range(0, 6000, 10):
+            rate.observe(5.0, second)
+        
+        # $5 every 10 seconds
+        self.assertAlmostEqual(rate.rate_at(5990), 0.5, delta=0.01)
+    
+    def test_decays_without_spend(self):
+        rate = SpendRate(window=600)
+        rate.observe(60.0, 0)
+        
+        self.assertAlmostEqual(rate.rate_at(0), 0.1)
+        self.assertAlmostEqual(rate.rate_at(600), 0.1 / math.e)
+        # Out-of-order observations are added without decaying the estimate
+        rate.observe(60.0, -10)
+        self.assertAlmostEqual(rate.rate_at(0), 0.2)
+
+
+class TestPacer(unittest.TestCase):
+    def setUp(self):
+        self.brand = Brand("Test Brand", 3000, 100)
+        self.pacer = Pacer(window=600, horizon=3600, clock=lambda: 0)
+    
+    def test_unknown_brand_is_never_paced(self):
+        self.assertEqual(self.pacer.time_to_exhaustion(self.brand), math.inf)
+        self.assertFalse(self.pacer.should_pause(self.brand))
+        self.assertEqual(self.pacer.throttle(self.brand), 1.0)
+    
+    def test_projects_time_to_exhaustion(self):
+        self.brand.current_daily_spend = 40
+        self.pacer.observe("Test Brand", 6.0, now=0)  # 0.01/s, $60 of headroom
+        
+        self.assertAlmostEqual(self.pacer.time_to_exhaustion(self.brand, now=0), 6000)
+        self.assertFalse(self.pacer.should_pause(self.brand, now=0))
+        self.assertTrue(self.pacer.should_pause(self.brand, now=0, horizon=7200))
+        self.assertAlmostEqual(self.pacer.throttle(self.brand, now=0, horizon=12000), 0.5)
+    
+    def test_monthly_headroom_counts(self):
+        self.brand.current_monthly_spend = 2990
+        self.pacer.observe("Test Brand", 6.0, now=0)
+        
+        self.assertTrue(self.pacer.should_pause(self.brand, now=0))
+        self.brand.current_monthly_spend = 3000
+        self.assertEqual(self.pacer.time_to_exhaustion(self.brand, now=0), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from datetime import datetime, timezone
+
+from src.services.periods import current_periods, next_day_start
+
+
+def timestamp(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+class TestCurrentPeriods(unittest.TestCase):
+    def test_day_and_month_change_at_utc_midnight(self):
+        day, month = current_periods(timestamp(2024, 1, 31, 23, 59, 59))
+        self.assertEqual(month, 2024 * 12)
+        self.assertEqual(current_periods(timestamp(2024, 2, 1)), (day + 1, month + 1))
+        self.assertEqual(current_periods(timestamp(2024, 2, 1, 12)), (day + 1, month + 1))
+
+    def test_later_periods_compare_greater(self):
+        self.assertLess(current_periods(timestamp(2023, 12, 31)), current_periods(timestamp(2024, 1, 1)))
+        self.assertLess(current_periods(timestamp(2024, 1, 1)), current_periods())
+
+    def test_next_day_start(self):
+        self.assertEqual(next_day_start(timestamp(2024, 1, 31, 23, 59, 59)), timestamp(2024, 2, 1))
+        self.assertEqual(next_day_start(timestamp(2024, 2, 1)), timestamp(2024, 2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import pstats
+import tempfile
+import time
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import Histogram, Registry
+from src.profiling import StageTimer, TaskProfiler, collapse_stack
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestTaskProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def test_collapse_stack_lists_callers_root_first(self):
+        def inner():
+            return collapse_stack(sys._getframe())
+        
+        def outer():
+            return inner()
+        
+        stack = outer()
+        
+        self.assertTrue(stack.endswith('test_profiling.py:outer;test_profiling.py:inner'))
+    
+    def test_unsampled_executions_are_not_profiled(self):
+        profiler = TaskProfiler(0, self.tmpdir.name)
+        
+        self.assertIsNone(profiler.start('update_brand_spend'))
+        profiler.stop(None)
+        self.assertEqual(profiler.profiled, 0)
+    
+    def test_stack_mode_writes_collapsed_stacks(self):
+        profiler = TaskProfiler(1, self.tmpdir.name, mode='stack', interval=0.001)
+        
+        token = profiler.start('check_campaign_status')
+        busy_wait(0.05)
+        profiler.stop(token)
+        profiler.close()
+        
+        path = os.path.join(self.tmpdir.name, f'check_campaign_status.{os.getpid()}.collapsed')
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any('test_profiling.py:busy_wait' in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+    
+    def test_cprofile_mode_merges_executions(self):
+        profiler = TaskProfiler(1, self.tmpdir.name, mode='cprofile')
+        
+        for _ in range(3):
+            token = profiler.start('update_brand_spend')
+            busy_wait(0.001)
+            profiler.stop(token)
+        profiler.close()
+        
+        stats = pstats.Stats(os.path.join(self.tmpdir.name, f'update_brand_spend.{os.getpid()}.prof'))
+        calls = {func[2]: value[1] for func, value in stats.stats.items()}
+        self.assertEqual(calls['busy_wait'], 3)
+    
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TaskProfiler(1, self.tmpdir.name, mode='perf')
+
+
+class TestStageTimer(unittest.TestCase):
+    def test_marks_record_time_since_previous_mark(self):
+        histogram = Histogram('stage_seconds', 'Stages', ['task', 'stage'], registry=Registry(), buckets=(0.005, 1))
+        stages = StageTimer(histogram, 'update_brand_spend')
+        
+        busy_wait(0.01)
+        stages.mark('lookup')
+        stages.mark('logging')
+        
+        self.assertEqual(histogram.labels('update_brand_spend', 'lookup').counts, [0, 1, 0])
+        self.assertEqual(histogram.labels('update_brand_spend', 'logging').counts, [1, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
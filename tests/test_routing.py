@@ -0,0 +1,47 @@
+import unittest
+from src.routing import BrandRouter, HashRing, rebalance_plan
+
+
+class TestHashRing(unittest.TestCase):
+    def setUp(self):
+        self.brands = [f"Brand {i}" for i in range(2000)]
+    
+    def test_placement_is_stable(self):
+        ring = HashRing(4)
+        self.assertEqual(ring.queues, ['brand-shard-0', 'brand-shard-1', 'brand-shard-2', 'brand-shard-3'])
+        for brand in self.brands[:50]:
+            self.assertEqual(ring.queue_for(brand), HashRing(4).queue_for(brand))
+    
+    def test_brands_spread_over_shards(self):
+        ring = HashRing(4)
+        counts = {}
+        for brand in self.brands:
+            queue = ring.queue_for(brand)
+            counts[queue] = counts.get(queue, 0) + 1
+        self.assertEqual(len(counts), 4)
+        for count in counts.values():
+            self.assertGreater(count, len(self.brands) / 4 * 0.6)
+    
+    def test_adding_a_shard_moves_few_brands(self):
+        moves = rebalance_plan(self.brands, 4, 5)
+        # Ideal is 1/5 of the brands, all of them moving to the new shard
+        self.assertLess(len(moves), len(self.brands) * 0.3)
+        self.assertTrue(all(new == 'brand-shard-4' for _old, new in moves.values()))
+
+
+class TestBrandRouter(unittest.TestCase):
+    def setUp(self):
+        self.ring = HashRing(3)
+        self.router = BrandRouter(self.ring)
+    
+    def test_routes_brand_tasks(self):
+        expected = {'queue': self.ring.queue_for("Brand A")}
+        self.assertEqual(self.router('src.celery_tasks.update_brand_spend', ("Brand A", 10), {}, {}), expected)
+        self.assertEqual(self.router('celery_tasks.initialize_brand', ("Brand A", 1, 1, {}), {}, {}), expected)
+        self.assertEqual(self.router('celery_tasks.update_brand_spend', (), {'brand_name': "Brand A"}, {}), expected)
+    
+    def test_ignores_other_tasks(self):
+        self.assertIsNone(self.router('celery_tasks.check_campaign_status', (), {}, {}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime, timezone
+
+from src.models.campaign import Campaign
+from src.models.schedule import Schedule, dayparting_to_json, parse_days
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+# 2024-01-01 is a Monday
+MONDAY = datetime(2024, 1, 1)
+
+
+class TestSchedule(unittest.TestCase):
+    def test_parse_days(self):
+        self.assertEqual(parse_days('mon-fri'), (0, 1, 2, 3, 4))
+        self.assertEqual(parse_days('sat, sun'), (5, 6))
+        self.assertEqual(parse_days('fri-mon'), (4, 5, 6, 0))
+    
+    def test_minute_resolution_and_weekdays(self):
+        schedule = Schedule.parse('mon-fri 09:15-17:30; sat 10:00-14:00')
+        
+        self.assertFalse(schedule.is_active(MONDAY.replace(hour=9, minute=14)))
+        self.assertTrue(schedule.is_active(MONDAY.replace(hour=9, minute=15)))
+        self.assertTrue(schedule.is_active(MONDAY.replace(hour=17, minute=29)))
+        self.assertFalse(schedule.is_active(MONDAY.replace(hour=17, minute=30)))
+        self.assertTrue(schedule.is_active(datetime(2024, 1, 6, 12)))
+        self.assertFalse(schedule.is_active(datetime(2024, 1, 7, 12)))
+    
+    def test_overnight_window_wraps_into_next_day_and_week(self):
+        schedule = Schedule([('sun', '22:00', '06:00')])
+        
+        self.assertTrue(schedule.is_active(datetime(2024, 1, 7, 23)))
+        self.assertTrue(schedule.is_active(datetime(2024, 1, 8, 5, 59)))
+        self.assertFalse(schedule.is_active(datetime(2024, 1, 8, 6)))
+        self.assertFalse(schedule.is_active(datetime(2024, 1, 6, 23)))
+    
+    def test_next_transition(self):
+        schedule = Schedule.parse('mon-fri 09:00-17:30')
+        
+        self.assertEqual(schedule.next_transition(MONDAY.replace(hour=3)), MONDAY.replace(hour=9))
+        self.assertEqual(schedule.next_transition(MONDAY.replace(hour=9)), MONDAY.replace(hour=17, minute=30))
+        # Friday evening sleeps through the weekend to the next Monday
+        self.assertEqual(schedule.next_transition(datetime(2024, 1, 5, 18, 0, 42)), datetime(2024, 1, 8, 9))
+        self.assertIsNone(Schedule([(0, 24)]).next_transition(MONDAY))
+    
+    def test_text_round_trip(self):
+        schedule = Schedule([((5, 6), 10, '14:30'), ('22:00', '06:00')])
+        
+        self.assertEqual(str(schedule), 'sat,sun 10:00-14:30; 22:00-06:00')
+        self.assertEqual(Schedule.parse(str(schedule)), schedule)
+        self.assertEqual(dayparting_to_json(schedule), str(schedule))
+        self.assertEqual(dayparting_to_json((9, 17)), [9, 17])
+    
+    def test_campaign_accepts_schedules_and_tuples(self):
+        overnight = Campaign("Night", '22:00-06:00')
+        
+        self.assertEqual(overnight.activation_mask, 0)
+        self.assertTrue(overnight.is_within_dayparting(MONDAY.replace(hour=2)))
+        self.assertFalse(overnight.is_within_dayparting(MONDAY.replace(hour=12)))
+        # The tuple form keeps its hour mask, running overnight like the schedule when it wraps
+        self.assertIsNone(Campaign("Day", (9, 17)).schedule)
+        tuple_overnight = Campaign("Tuple", (22, 6))
+        self.assertTrue(tuple_overnight.is_within_dayparting(MONDAY.replace(hour=23)))
+        self.assertTrue(tuple_overnight.is_within_dayparting(MONDAY.replace(hour=2)))
+        self.assertFalse(tuple_overnight.is_within_dayparting(MONDAY.replace(hour=12)))
+    
+    def test_campaigns_share_compiled_schedules(self):
+        first = Campaign("First", 'mon-fri 09:00-17:00')
+        second = Campaign("Second", ' mon-fri 09:00-17:00 ')
+        
+        self.assertIs(first.schedule, second.schedule)
+        self.assertIsNot(Campaign("Third", 'mon-fri 09:00-18:00').schedule, first.schedule)
+        with self.assertRaises(TypeError):
+            first.schedule.bits[0] = 0
+    
+    @unittest.skipIf(pytz is None, "pytz not installed")
+    def test_brand_time_zone(self):
+        schedule = Schedule.parse('mon-fri 09:00-17:00 @ America/New_York')
+        
+        # 14:00 UTC is 09:00 in New York in winter
+        self.assertFalse(schedule.is_active(MONDAY.replace(hour=13, minute=59)))
+        self.assertTrue(schedule.is_active(MONDAY.replace(hour=14)))
+        self.assertEqual(schedule.next_transition(MONDAY.replace(hour=12)), MONDAY.replace(hour=14))
+        aware = datetime(2024, 7, 1, 12, tzinfo=timezone.utc)
+        self.assertEqual(schedule.next_transition(aware), datetime(2024, 7, 1, 13, tzinfo=timezone.utc))
+
+
+if __name__ == '__main__':
+    unittest.main()
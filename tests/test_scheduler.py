@@ -0,0 +1,114 @@
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from src.models.brand import Brand
+from src.models.campaign import Campaign
+from src.services.scheduler import TransitionScheduler
+
+
+def make_brand(name, *dayparting):
+    brand = Brand(name, monthly_budget=1000, daily_budget=100)
+    for index, hours in enumerate(dayparting):
+        brand.add_campaign(Campaign(f"{name}-{index}", hours))
+    return brand
+
+
+class TestTransitionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 1, 1, 8, 30)
+        self.scheduler = TransitionScheduler(clock=lambda: self.start)
+
+    def test_campaign_activates_when_its_window_opens(self):
+        brand = make_brand('acme', (9, 17))
+        self.scheduler.track(brand)
+        self.assertEqual(self.scheduler.next_due(), datetime(2024, 1, 1, 9))
+
+        self.assertEqual(self.scheduler.run_due(datetime(2024, 1, 1, 8, 59)), [])
+        self.assertEqual(self.scheduler.run_due(datetime(2024, 1, 1, 9)), brand.campaigns)
+        self.assertTrue(brand.campaigns[0].is_active)
+        self.assertEqual(self.scheduler.next_due(), datetime(2024, 1, 1, 17))
+
+        self.scheduler.run_due(datetime(2024, 1, 1, 17))
+        self.assertFalse(brand.campaigns[0].is_active)
+
+    def test_work_is_proportional_to_transitions(self):
+        brands = [make_brand(f'brand-{index}', (9, 17), (0, 24)) for index in range(50)]
+        for brand in brands:
+            self.scheduler.track(brand)
+        # All-day campaigns never transition, so only one entry per brand is queued
+        self.assertEqual(len(self.scheduler), 50)
+
+        # Hours with no transitions process nothing
+        self.scheduler.run_due(datetime(2024, 1, 1, 8, 59))
+        self.assertEqual(self.scheduler.processed, 0)
+        self.scheduler.run_due(datetime(2024, 1, 1, 9))
+        self.scheduler.run_due(datetime(2024, 1, 1, 16))
+        self.assertEqual(self.scheduler.processed, 50)
+        self.scheduler.run_due(datetime(2024, 1, 1, 23))
+        self.assertEqual(self.scheduler.processed, 100)
+        self.assertFalse(any(brand.campaigns[0].is_active for brand in brands))
+
+    def test_scheduled_campaigns_follow_minute_windows(self):
+        brand = make_brand('acme', 'mon-fri 09:15-09:45')
+        self.scheduler.track(brand)
+        self.assertEqual(self.scheduler.next_due(), datetime(2024, 1, 1, 9, 15))
+        self.scheduler.run_due(datetime(2024, 1, 1, 9, 15))
+        self.assertTrue(brand.campaigns[0].is_active)
+        self.assertEqual(self.scheduler.next_due(), datetime(2024, 1, 1, 9, 45))
+
+    def test_exhausted_brand_stays_paused_until_refreshed(self):
+        refreshed = []
+        scheduler = TransitionScheduler(refresh=lambda brand, now: refreshed.append((brand, now)),
+                                        clock=lambda: self.start)
+        brand = make_brand('acme', (9, 17))
+        brand.budget_exhausted = True
+        scheduler.track(brand)
+        scheduler.schedule_refresh(brand, datetime(2024, 1, 2))
+
+        self.assertEqual(scheduler.run_due(datetime(2024, 1, 1, 9)), [])
+        self.assertFalse(brand.campaigns[0].is_active)
+        scheduler.run_due(datetime(2024, 1, 2))
+        self.assertEqual(refreshed, [(brand, datetime(2024, 1, 2))])
+
+    def test_default_clock_is_utc(self):
+        scheduler = TransitionScheduler()
+        scheduler.track(make_brand('acme', (9, 17)))
+        self.assertEqual(scheduler.next_due().utcoffset(), timedelta(0))
+
+    def test_entries_of_replaced_brands_are_dropped(self):
+        current = {}
+        scheduler = TransitionScheduler(is_current=lambda brand: current.get(brand.name) is brand,
+                                        clock=lambda: self.start)
+        old = current['acme'] = make_brand('acme', (9, 17))
+        scheduler.track(old)
+        new = current['acme'] = make_brand('acme', (10, 17))
+        scheduler.track(new)
+
+        scheduler.run_due(datetime(2024, 1, 1, 10))
+        self.assertFalse(old.campaigns[0].is_active)
+        self.assertTrue(new.campaigns[0].is_active)
+        self.assertEqual(len(scheduler), 1)
+
+    def test_run_forever_wakes_for_earlier_entries(self):
+        now = [datetime(2024, 1, 1, 8, 59, 59, 950000)]
+        scheduler = TransitionScheduler(clock=lambda: now[0])
+        brand = make_brand('acme', (9, 17))
+        changed = threading.Event()
+        stop = threading.Event()
+
+        def on_changed(campaigns):
+            stop.set()
+            changed.set()
+
+        thread = threading.Thread(target=scheduler.run_forever, args=(stop, on_changed, 0.01))
+        thread.start()
+        scheduler.track(brand, now[0])
+        now[0] += timedelta(seconds=1)
+        self.assertTrue(changed.wait(2))
+        thread.join(2)
+        self.assertTrue(brand.campaigns[0].is_active)
+
+
+if __name__ == '__main__':
+    unittest.main()
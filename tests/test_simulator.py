@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import csv
+import tempfile
+from datetime import datetime
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulator import FleetSimulator, generate_brands, run_parallel
+
+
+class TestFleetSimulator(unittest.TestCase):
+    def simulate(self, **kwargs):
+        options = dict(brand_count=30, days=3, events_per_day=100, seed=1)
+        options.update(kwargs)
+        simulator = FleetSimulator(**options)
+        return simulator, simulator.run()
+    
+    def test_runs_on_the_virtual_clock(self):
+        seen = []
+        
+        def record(service, current_time):
+            seen.append(current_time)
+            return []
+        
+        with patch('src.simulator.CampaignService.update_for_time', autospec=True, side_effect=record):
+            simulator, summary = self.simulate(brand_count=1, start=datetime(2024, 3, 30))
+        
+        self.assertEqual(summary['checks'], 72)
+        self.assertEqual(seen[0], datetime(2024, 3, 30))
+        self.assertEqual(seen[-1], datetime(2024, 4, 1, 23))
+        self.assertGreater(simulator.now(), datetime(2024, 4, 1, 23))
+    
+    def test_same_seed_gives_same_results(self):
+        _, first = self.simulate()
+        _, second = self.simulate()
+        
+        for key in ('arrivals', 'spend', 'overspend', 'underdelivered'):
+            self.assertEqual(first[key], second[key])
+    
+    def test_spend_follows_diurnal_curve(self):
+        simulator, summary = self.simulate(days=2)
+        
+        night = sum(simulator.hourly_arrivals[2:5])
+        evening = sum(simulator.hourly_arrivals[18:21])
+        self.assertGreater(evening, 5 * night)
+        self.assertEqual(sum(simulator.hourly_arrivals), summary['arrivals'])
+    
+    def test_daily_resets_restore_budget(self):
+        simulator, _ = self.simulate(demand_ratio=3)
+        
+        # Brands keep spending after running out on day one
+        daily_budget = sum(outcome.daily_budget for outcome in simulator.outcomes)
+        self.assertGreater(sum(outcome.spend for outcome in simulator.outcomes), 2 * daily_budget)
+        self.assertGreater(sum(outcome.pauses for outcome in simulator.outcomes), 2 * len(simulator.outcomes))
+    
+    def test_checking_less_often_costs_overspend_and_underdelivery(self):
+        _, hourly = self.simulate(check_interval=3600)
+        _, rarely = self.simulate(check_interval=4 * 3600)
+        
+        self.assertGreater(rarely['overspend'], hourly['overspend'])
+        self.assertGreater(rarely['underdelivered'], hourly['underdelivered'])
+    
+    def test_hour_aligned_checks_never_miss_dayparting(self):
+        _, aligned = self.simulate(demand_ratio=0.5)
+        _, offset = self.simulate(demand_ratio=0.5, check_offset=600)
+        
+        self.assertEqual(aligned['underdelivered'], 0)
+        self.assertGreater(offset['underdelivered'], 0)
+    
+    def test_pacing_reduces_overspend(self):
+        _, unpaced = self.simulate(brand_count=60, days=4)
+        _, paused = self.simulate(brand_count=60, days=4, pacing='pause')
+        _, throttled = self.simulate(brand_count=60, days=4, pacing='throttle')
+        
+        self.assertEqual(paused['arrivals'], unpaced['arrivals'])
+        self.assertGreater(paused['paced_pauses'], 0)
+        self.assertLess(paused['overspend'], unpaced['overspend'])
+        self.assertLess(throttled['overspend'], unpaced['overspend'])
+        
+        with self.assertRaises(ValueError):
+            FleetSimulator(brand_count=1, pacing='sometimes')
+    
+    def test_write_report(self):
+        simulator, summary = self.simulate()
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'report.csv')
+            simulator.write_report(path)
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+        
+        self.assertEqual(len(rows), 30)
+        self.assertAlmostEqual(sum(float(row['overspend']) for row in rows), summary['overspend'], places=0)
+
+
+
+class TestRunParallel(unittest.TestCase):
+    def setUp(self):
+        self.specs = generate_brands(30, events_per_day=100, seed=1)
+    
+    def test_specs_are_plain_tuples(self):
+        self.assertEqual(len(self.specs), 30)
+        self.assertIsInstance(self.specs[0], tuple)
+        self.assertEqual(self.specs, generate_brands(30, events_per_day=100, seed=1))
+    
+    def test_sharded_run_matches_single_process(self):
+        simulator = FleetSimulator(specs=self.specs, days=3)
+        single = simulator.run()
+        
+        merged, outcomes = run_parallel(self.specs, 3, days=3)
+        
+        self.assertEqual(merged['workers'], 3)
+        for key in ('brands', 'checks', 'arrivals', 'spend_events', 'brands_overspent', 'peak_arrivals_per_sec'):
+            self.assertEqual(merged[key], single[key])
+        for key in ('spend', 'overspend', 'underdelivered'):
+            self.assertAlmostEqual(merged[key], single[key], places=6)
+        self.assertEqual([outcome.name for outcome in outcomes], [brand.name for brand in simulator.brands])
+        self.assertEqual([outcome.pauses for outcome in outcomes], [outcome.pauses for outcome in simulator.outcomes])
+    
+    def test_no_brands_gives_an_empty_result(self):
+        summary, outcomes = run_parallel([], 2, days=3)
+        
+        self.assertEqual(outcomes, [])
+        self.assertEqual((summary['brands'], summary['arrivals'], summary['overspend_pct']), (0, 0, 0.0))
+        with self.assertRaises(ValueError):
+            run_parallel(self.specs, 0, days=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
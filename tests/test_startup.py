@@ -0,0 +1,52 @@
+import unittest
+import subprocess
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Import time budget for `--help`, on top of a bare interpreter start. Loading
+# Celery alone costs well over this, so the budget catches eager imports
+# creeping back into the entry points. Override on slow machines.
+IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', '60'))
+
+
+def imported_modules(argv):
+    """Run python -X importtime and return {module: self time in microseconds}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+class TestStartup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline = imported_modules(['-c', 'pass'])
+    
+    def assert_fast_start(self, script):
+        modules = imported_modules([script, '--help'])
+        extra = {name: us for name, us in modules.items() if name not in self.baseline}
+        
+        for heavy in ('celery', 'coloredlogs', 'src.models.brand', 'src.celery_tasks'):
+            self.assertNotIn(heavy, extra, f"{script} --help imports {heavy}")
+        
+        total_ms = sum(extra.values()) / 1000
+        slowest = sorted(extra, key=extra.get, reverse=True)[:5]
+        self.assertLess(total_ms, IMPORT_BUDGET_MS,
+                        f"{script} --help spent {total_ms:.1f} ms importing modules; slowest: {slowest}")
+    
+    def test_cli_help_startup(self):
+        self.assert_fast_start('src/cli.py')
+    
+    def test_main_startup(self):
+        self.assert_fast_start('src/main.py')
+
+
+if __name__ == '__main__':
+    unittest.main()
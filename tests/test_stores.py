@@ -0,0 +1,210 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+from src.stores.factory import create_store
+from src.stores.memory_store import MemoryStore
+from src.stores.sqlite_store import SQLiteStore
+
+
+class StoreContract:
+    """Behaviour shared by every brand state store backend."""
+
+    def test_save_and_load_brand(self):
+        self.store.save_brand("Brand A", 3000, 100, {"Campaign 1": (9, 17)})
+        record = self.store.load_brand("Brand A")
+        self.assertEqual(record['monthly_budget'], 3000)
+        self.assertEqual(record['daily_budget'], 100)
+        self.assertEqual(record['campaigns'], {"Campaign 1": [9, 17]})
+        self.assertEqual(record['daily_spend'], 0)
+        self.assertEqual(record['monthly_spend'], 0)
+        self.assertIsNone(self.store.load_brand("Missing"))
+
+    def test_add_spend_returns_totals(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.assertEqual(self.store.add_spend("Brand A", 20), (20, 20))
+        # Counters are integer micros
+        self.assertEqual(self.store.add_spend("Brand A", 5500000), (5500020, 5500020))
+        self.assertIsInstance(self.store.get_spend(["Brand A"])["Brand A"][0], int)
+
+    def test_save_brand_keeps_existing_spend(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.store.add_spend("Brand A", 40)
+        self.store.save_brand("Brand A", 5000, 200, {"Campaign 1": (0, 24)})
+        record = self.store.load_brand("Brand A")
+        self.assertEqual(record['daily_budget'], 200)
+        self.assertEqual(record['daily_spend'], 40)
+
+    def test_get_spend_and_resets(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.store.save_brand("Brand B", 2000, 200, {})
+        self.store.add_spend("Brand A", 10)
+        self.store.add_spend("Brand B", 30)
+        self.assertEqual(sorted(self.store.brand_names()), ["Brand A", "Brand B"])
+        self.assertEqual(self.store.get_spend(["Brand A", "Brand B", "Missing"]),
+                         {"Brand A": (10, 10), "Brand B": (30, 30)})
+
+        self.store.reset_daily()
+        self.assertEqual(self.store.get_spend(["Brand A"]), {"Brand A": (0, 10)})
+        self.store.reset_monthly()
+        self.assertEqual(self.store.get_spend(["Brand B"]), {"Brand B": (0, 0)})
+
+    def test_set_spend(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.store.add_spend("Brand A", 10)
+        self.store.set_spend("Brand A", 25, 400)
+        self.assertEqual(self.store.get_spend(["Brand A"]), {"Brand A": (25, 400)})
+
+    def test_spend_in_a_later_period_resets_counters(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.assertEqual(self.store.add_spend("Brand A", 10, 100, 10), (10, 10))
+        self.assertEqual(self.store.add_spend("Brand A", 5, 100, 10), (15, 15))
+        # Reads in the next day see a fresh daily counter before any spend is recorded
+        self.assertEqual(self.store.get_spend(["Brand A"], 101, 10), {"Brand A": (0, 15)})
+        record = self.store.load_brand("Brand A", 101, 10)
+        self.assertEqual((record['daily_spend'], record['daily_period']), (0, 101))
+
+        self.assertEqual(self.store.add_spend("Brand A", 7, 101, 10), (7, 22))
+        # Spend stamped with an earlier period does not reset the current one
+        self.assertEqual(self.store.add_spend("Brand A", 1, 100, 10), (8, 23))
+        self.assertEqual(self.store.add_spend("Brand A", 2, 131, 11), (2, 2))
+
+    def test_set_spend_with_periods(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.store.set_spend("Brand A", 25, 400, 100, 10)
+        self.assertEqual(self.store.get_spend(["Brand A"], 100, 10), {"Brand A": (25, 400)})
+        self.assertEqual(self.store.get_spend(["Brand A"], 101, 10), {"Brand A": (0, 400)})
+
+    def test_node_spend(self):
+        keys = ['["Acme", "Search"]', '["Acme"]', '[]']
+        self.assertEqual(self.store.add_node_spend(keys, 10, 100, 10), [(10, 10)] * 3)
+        self.assertEqual(self.store.add_node_spend(keys[1:], 5, 100, 10), [(15, 15)] * 2)
+        self.assertEqual(self.store.get_node_spend(keys + ['["Globex"]'], 100, 10),
+                         {keys[0]: (10, 10), keys[1]: (15, 15), keys[2]: (15, 15)})
+        self.assertEqual(self.store.get_node_spend(keys[:1], 101, 10), {keys[0]: (0, 10)})
+        self.assertEqual(self.store.add_node_spend(keys[:1], 1, 101, 10), [(1, 11)])
+
+    def test_clear(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.store.add_node_spend(['[]'], 10)
+        self.store.clear()
+        self.assertEqual(self.store.brand_names(), [])
+        self.assertEqual(self.store.get_node_spend(['[]']), {})
+
+
+class SharedStoreContract(StoreContract):
+    """Stores shared between worker processes also share spend event claims."""
+
+    def test_claim_and_release_event(self):
+        self.assertTrue(self.store.claim_event("evt-1", 60))
+        self.assertFalse(self.store.claim_event("evt-1", 60))
+        self.assertTrue(self.store.claim_event("evt-2", 60))
+        self.store.release_event("evt-1")
+        self.assertTrue(self.store.claim_event("evt-1", 60))
+
+
+class TestMemoryStore(StoreContract, unittest.TestCase):
+    def setUp(self):
+        self.store = MemoryStore()
+
+
+class TestSQLiteStore(SharedStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'state.db')
+        self.store = SQLiteStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_state_survives_reopen(self):
+        self.store.save_brand("Brand A", 3000, 100, {})
+        self.store.add_spend("Brand A", 75)
+        self.store.close()
+
+        self.store = SQLiteStore(self.path)
+        self.assertEqual(self.store.get_spend(["Brand A"]), {"Brand A": (75, 75)})
+
+    def test_event_claims_expire(self):
+        with patch('src.stores.sqlite_store.time.time', return_value=1000.0):
+            self.assertTrue(self.store.claim_event("evt-1", 60))
+        with patch('src.stores.sqlite_store.time.time', return_value=1059.0):
+            self.assertFalse(self.store.claim_event("evt-1", 60))
+        with patch('src.stores.sqlite_store.time.time', return_value=1061.0):
+            self.assertTrue(self.store.claim_event("evt-1", 60))
+
+    def test_migrates_currency_unit_spend(self):
+        self.store.close()
+        os.remove(self.path)
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE brands (name TEXT PRIMARY KEY, monthly_budget REAL NOT NULL, '
+                     'daily_budget REAL NOT NULL, campaigns TEXT NOT NULL, daily_spend REAL NOT NULL DEFAULT 0, '
+                     'monthly_spend REAL NOT NULL DEFAULT 0)')
+        conn.execute("INSERT INTO brands VALUES ('Brand A', 3000, 100, '{}', 12.5, 40.1)")
+        conn.commit()
+        conn.close()
+
+        self.store = SQLiteStore(self.path)
+        self.assertEqual(self.store.get_spend(["Brand A"]), {"Brand A": (12500000, 40100000)})
+        self.assertEqual(self.store.add_spend("Brand A", 1), (12500001, 40100001))
+        # Reopening does not migrate again
+        self.store.close()
+        self.store = SQLiteStore(self.path)
+        self.assertEqual(self.store.get_spend(["Brand A"]), {"Brand A": (12500001, 40100001)})
+
+
+def redis_available():
+    try:
+        import redis
+        return redis.Redis.from_url('redis://localhost:6379/15', socket_connect_timeout=0.2).ping()
+    except Exception:
+        return False
+
+
+@unittest.skipUnless(redis_available(), "Redis server not available")
+class TestRedisStore(SharedStoreContract, unittest.TestCase):
+    def setUp(self):
+        from src.stores.redis_store import RedisStore
+        self.store = RedisStore('redis://localhost:6379/15', prefix='budget-test')
+        self.store.clear()
+
+    def tearDown(self):
+        self.store.clear()
+
+    def test_migrates_currency_unit_spend(self):
+        from src.stores.redis_store import RedisStore
+        client = self.store.client
+        self.store.save_brand("Brand A", 3000, 100, {})
+        client.set('budget-test:spend:Brand A:daily', '12.5')
+        client.set('budget-test:spend:Brand A:daily_period', 100)
+        client.set('budget-test:spend:Brand A:monthly', '40.1')
+        client.delete('budget-test:schema_version')
+
+        self.store = RedisStore('redis://localhost:6379/15', prefix='budget-test')
+        self.assertEqual(self.store.get_spend(["Brand A"], 100), {"Brand A": (12500000, 40100000)})
+        self.assertIsNone(client.get('budget-test:spend:Brand A:daily'))
+        self.assertEqual(self.store.add_spend("Brand A", 1, 100), (12500001, 40100001))
+        # Reopening does not migrate again
+        self.store = RedisStore('redis://localhost:6379/15', prefix='budget-test')
+        self.assertEqual(self.store.get_spend(["Brand A"], 100), {"Brand A": (12500001, 40100001)})
+
+
+class TestCreateStore(unittest.TestCase):
+    def test_memory_url(self):
+        self.assertIsInstance(create_store('memory://'), MemoryStore)
+
+    def test_sqlite_url(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = create_store('sqlite:///' + os.path.join(tmpdir, 'state.db'))
+            self.assertIsInstance(store, SQLiteStore)
+            store.close()
+
+    def test_unsupported_url(self):
+        with self.assertRaises(ValueError):
+            create_store('postgres://localhost/budget')
+
+if __name__ == "__main__":
+    unittest.main()
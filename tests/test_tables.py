@@ -0,0 +1,97 @@
+import unittest
+from datetime import datetime
+from src.models.campaign import Campaign
+from src.models.tables import BrandTable, CampaignView
+from src.services.budget_service import BudgetService
+from src.services.campaign_service import CampaignService
+from src.services.events import EventBus
+from src.services.periods import current_periods
+
+
+class TestBrandTable(unittest.TestCase):
+    def setUp(self):
+        self.table = BrandTable()
+        self.brand = self.table.add_brand("Test Brand", 3000, 100)
+        self.day = self.brand.add_campaign(Campaign("Day Campaign", (9, 17)))
+        self.night = self.brand.add_campaign(Campaign("Night Campaign", (18, 23)))
+        self.other = self.table.add_brand("Other Brand", 500, 50)
+        self.other.add_campaign(Campaign("Other Campaign", (0, 24)))
+    
+    def test_views_read_columns(self):
+        self.assertEqual(len(self.table), 2)
+        self.assertEqual(len(self.table.campaigns), 3)
+        self.assertEqual(self.table.brand("Other Brand"), self.other)
+        self.assertEqual(self.brand.name, "Test Brand")
+        self.assertEqual(self.brand.daily_budget, 100)
+        self.assertEqual(self.brand.campaigns, [self.day, self.night])
+        self.assertEqual(self.day.dayparting_hours, (9, 17))
+        self.assertEqual(list(self.table.campaigns.brand_ids), [0, 0, 1])
+    
+    def test_campaign_view_state(self):
+        self.assertFalse(self.day.is_active)
+        self.day.activate()
+        self.assertTrue(self.day.is_active)
+        self.assertEqual(self.table.campaigns.is_active[self.day.row], 1)
+        self.assertTrue(self.day.is_within_dayparting(datetime(2023, 1, 1, 9, 0)))
+        self.assertFalse(self.day.is_within_dayparting(datetime(2023, 1, 1, 17, 0)))
+    
+    def test_budget_service_on_view(self):
+        events = EventBus()
+        received = []
+        events.subscribe(received.append)
+        service = BudgetService(self.brand, events=events)
+        self.day.activate()
+        
+        service.update_daily_spend(60)
+        self.assertEqual(self.brand.current_daily_spend, 60)
+        self.assertTrue(self.day.is_active)
+        
+        service.update_daily_spend(40)
+        self.assertTrue(self.brand.budget_exhausted)
+        self.assertFalse(self.day.is_active)
+        self.assertEqual(len(received), 1)
+        
+        service.reset_daily()
+        self.assertEqual(self.brand.current_daily_spend, 0)
+        self.assertFalse(self.brand.budget_exhausted)
+    
+    def test_budget_periods_on_view(self):
+        service = BudgetService(self.brand, events=EventBus())
+        self.assertIsNone(self.brand.daily_period)
+        
+        service.update_spend(100, current_periods(0))
+        self.assertEqual((self.brand.daily_period, self.brand.monthly_period), current_periods(0))
+        self.assertTrue(self.brand.budget_exhausted)
+        self.assertIsNone(self.other.daily_period)
+        
+        # First use in a new day resets the daily counter
+        service.update_spend(5, current_periods(86400))
+        self.assertEqual(self.brand.current_daily_spend, 5)
+        self.assertEqual(self.brand.current_monthly_spend, 105)
+        self.assertEqual(self.brand.daily_period, current_periods(86400)[0])
+        self.assertFalse(self.brand.budget_exhausted)
+    
+    def test_campaign_service_on_view(self):
+        service = CampaignService(self.brand)
+        service.activate_campaigns(datetime(2023, 1, 1, 10, 0))
+        self.assertTrue(self.day.is_active)
+        self.assertFalse(self.night.is_active)
+        
+        changed = service.update_for_time(datetime(2023, 1, 1, 18, 0))
+        self.assertEqual(changed, [self.day, self.night])
+        self.assertTrue(self.night.is_active)
+        
+        changed = service.update_for_time(datetime(2023, 1, 1, 19, 0))
+        self.assertEqual(changed, [])
+    
+    def test_campaign_added_after_index_built(self):
+        service = CampaignService(self.brand)
+        service.update_for_time(datetime(2023, 1, 1, 10, 0))
+        late = self.brand.add_campaign(Campaign("Late Campaign", (10, 12)))
+        
+        self.assertIsInstance(late, CampaignView)
+        changed = service.update_for_time(datetime(2023, 1, 1, 11, 0))
+        self.assertEqual(changed, [late])
+
+if __name__ == "__main__":
+    unittest.main()